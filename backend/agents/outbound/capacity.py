@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+import urllib.request
+from collections import deque
+from typing import Any, Dict
+
+from livekit.agents.utils.hw import get_cpu_monitor
+
+logger = logging.getLogger("outbound-clinical-trial-agent")
+
+# Worker capacity configuration
+MAX_CONCURRENT_CALLS = int(os.getenv("AGENT_MAX_CONCURRENT_CALLS", "4"))
+NUM_IDLE_PROCESSES = int(os.getenv("AGENT_NUM_IDLE_PROCESSES", "2"))
+LOAD_THRESHOLD = float(os.getenv("AGENT_LOAD_THRESHOLD", "0.75"))
+CAPACITY_REPORT_URL = os.getenv("CAPACITY_REPORT_URL")  # e.g. http://localhost:8000/api/capacity/heartbeat
+CAPACITY_REPORT_INTERVAL = float(os.getenv("CAPACITY_REPORT_INTERVAL", "5"))
+
+
+class WorkerCapacity:
+    """
+    Load calculation for the outbound worker, used as WorkerOptions.load_fnc.
+
+    The worker stops accepting jobs once load reaches LOAD_THRESHOLD. Load is the
+    higher of two signals, each scaled so that it hits the threshold at its limit:
+    - active calls: reaches the threshold at MAX_CONCURRENT_CALLS
+    - CPU: moving average of host/cgroup CPU usage (0-1)
+
+    Calls run in separate job processes, so the worker's own event loop says nothing
+    about how they are doing; their CPU use is what shows up here.
+
+    With CAPACITY_REPORT_URL set, a background thread posts the latest snapshot to
+    the API every CAPACITY_REPORT_INTERVAL, off LiveKit's load-reporting path.
+    """
+
+    def __init__(self, max_calls: int = MAX_CONCURRENT_CALLS, threshold: float = LOAD_THRESHOLD):
+        if max_calls < 1:
+            raise ValueError(f"AGENT_MAX_CONCURRENT_CALLS must be at least 1, got {max_calls}")
+        self.max_calls = max_calls
+        self.threshold = threshold
+
+        self.cpu_monitor = get_cpu_monitor()
+        self.cpu_samples: deque[float] = deque(maxlen=5)
+        self.lock = threading.Lock()
+        self.cpu_thread = threading.Thread(target=self._sample_cpu, daemon=True, name="worker_cpu_sampler")
+        self.cpu_thread.start()
+
+        self.last_snapshot: Dict[str, Any] = {}
+        if CAPACITY_REPORT_URL:
+            self.report_thread = threading.Thread(target=self._report_loop, daemon=True, name="worker_capacity_reporter")
+            self.report_thread.start()
+
+    def _sample_cpu(self):
+        while True:
+            cpu = self.cpu_monitor.cpu_percent(interval=0.5)
+            with self.lock:
+                self.cpu_samples.append(cpu)
+
+    def _cpu(self) -> float:
+        with self.lock:
+            return sum(self.cpu_samples) / len(self.cpu_samples) if self.cpu_samples else 0.0
+
+    def load(self, worker) -> float:
+        """Compute worker load in [0, 1]; passed to WorkerOptions as load_fnc."""
+        active_calls = len(worker.active_jobs)
+        cpu = self._cpu()
+        call_load = active_calls / self.max_calls * self.threshold
+        load = min(1.0, max(call_load, cpu))
+
+        self.last_snapshot = {
+            "worker_id": worker.id or f"{socket.gethostname()}-{os.getpid()}",
+            "active_calls": active_calls,
+            "max_calls": self.max_calls,
+            "available_calls": 0 if load >= self.threshold else self.max_calls - active_calls,
+            "cpu": round(cpu, 3),
+            "load": round(load, 3),
+            "load_threshold": self.threshold,
+        }
+        return load
+
+    def _report_loop(self):
+        while True:
+            time.sleep(CAPACITY_REPORT_INTERVAL)
+            if self.last_snapshot:
+                self.report(self.last_snapshot)
+
+    def report(self, snapshot: Dict[str, Any]):
+        """Send a capacity snapshot to the API (runs on the reporter thread)."""
+        try:
+            request = urllib.request.Request(
+                CAPACITY_REPORT_URL,
+                data=json.dumps(snapshot).encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            urllib.request.urlopen(request, timeout=2).close()
+        except Exception as e:
+            logger.warning("Failed to report worker capacity: %s", e)
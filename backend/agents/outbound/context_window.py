@@ -0,0 +1,153 @@
+import os
+import logging
+from typing import Any, Dict
+
+from livekit.agents import llm
+
+logger = logging.getLogger("outbound-clinical-trial-agent")
+
+# Token budget for conversation history sent to the LLM (instructions and tool results are extra)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("AGENT_CONTEXT_TOKEN_BUDGET", "800"))
+# Token budget for the summary line standing in for dropped turns
+CONTEXT_SUMMARY_TOKENS = int(os.getenv("AGENT_CONTEXT_SUMMARY_TOKENS", "200"))
+# When over budget, trim history down to this fraction of it, so the prompt prefix
+# (and OpenAI's prompt cache) stays stable for several turns instead of shifting every turn
+CONTEXT_TRIM_TO = 0.6
+
+# Per-message overhead in the chat completion format
+MESSAGE_OVERHEAD_TOKENS = 4
+# Longest excerpt of a dropped caller turn kept in the summary
+SUMMARY_EXCERPT_CHARS = 160
+
+TOOL_ITEM_TYPES = ("function_call", "function_call_output")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token for English with the gpt-4o tokenizer)."""
+    return len(text) // 4 + 1
+
+
+def item_tokens(item: llm.ChatItem) -> int:
+    if item.type == "message":
+        return estimate_tokens(item.text_content or "") + MESSAGE_OVERHEAD_TOKENS
+    if item.type == "function_call":
+        return estimate_tokens(item.name + item.arguments) + MESSAGE_OVERHEAD_TOKENS
+    return estimate_tokens(item.output) + MESSAGE_OVERHEAD_TOKENS
+
+
+def is_instructions(item: llm.ChatItem) -> bool:
+    return item.type == "message" and item.role in ("system", "developer")
+
+
+def is_pinned(item: llm.ChatItem) -> bool:
+    """Instructions (system prompt and trial block) and tool calls/results are never dropped."""
+    return item.type in TOOL_ITEM_TYPES or is_instructions(item)
+
+
+class ContextWindow:
+    """
+    Bounds the chat history a ClinicalTrialAgent sends to the LLM by a token budget.
+
+    The agent's own chat context keeps the full call; only the copy passed to the
+    LLM is trimmed. Instructions and tool calls/results are always kept. Older
+    conversation turns move behind a cutoff and are replaced by one short summary of
+    what the caller said. The cutoff only moves when history exceeds the budget,
+    and then jumps to CONTEXT_TRIM_TO of it, so most turns reuse the same prefix.
+    """
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET, summary_tokens: int = CONTEXT_SUMMARY_TOKENS):
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.dropped_ids: set[str] = set()
+        self.summary: str | None = None
+
+        # Per LLM request: (history items sent, estimated prompt tokens)
+        self.requests: list[tuple[int, int]] = []
+        # Per LLM request, from the provider's metrics: (prompt tokens, ttft seconds)
+        self.observed: list[tuple[int, float]] = []
+
+    def _summarize(self, dropped: list[llm.ChatItem]) -> str | None:
+        """Extractive summary of dropped turns; the caller's most recent statements win when space runs out."""
+        excerpts, used = [], 0
+        for item in reversed(dropped):
+            if item.type != "message" or item.role != "user" or not item.text_content:
+                continue
+            excerpt = item.text_content.strip()[:SUMMARY_EXCERPT_CHARS]
+            cost = estimate_tokens(excerpt) + 2
+            if used + cost > self.summary_tokens:
+                break
+            excerpts.append(f'"{excerpt}"')
+            used += cost
+        if not excerpts:
+            return None
+        return (
+            "Earlier in this call (older turns omitted), the participant said: "
+            + "; ".join(reversed(excerpts))
+            + ". Do not repeat information you already gave."
+        )
+
+    def apply(self, chat_ctx: llm.ChatContext) -> llm.ChatContext:
+        """
+        Return the context to send for this LLM request.
+
+        Args:
+            chat_ctx: The full chat context passed to llm_node
+
+        Returns:
+            A new ChatContext: instructions, the summary, then tool items and recent turns in order
+        """
+        conversation = [
+            item for item in chat_ctx.items
+            if not is_pinned(item) and item.id not in self.dropped_ids
+        ]
+        history_tokens = sum(item_tokens(item) for item in conversation)
+
+        if history_tokens > self.token_budget:
+            # Drop oldest turns until history fits the trimmed budget; always keep the latest turn
+            target = int(self.token_budget * CONTEXT_TRIM_TO)
+            newly_dropped = []
+            while len(conversation) > 1 and history_tokens > target:
+                item = conversation.pop(0)
+                history_tokens -= item_tokens(item)
+                newly_dropped.append(item)
+            self.dropped_ids.update(item.id for item in newly_dropped)
+            self.summary = self._summarize(
+                [item for item in chat_ctx.items if item.id in self.dropped_ids]
+            )
+            logger.info(
+                "Context window trimmed %d items (%d dropped in total), history now ~%d tokens",
+                len(newly_dropped), len(self.dropped_ids), history_tokens,
+            )
+
+        items = []
+        summary_inserted = self.summary is None
+        for item in chat_ctx.items:
+            if item.id in self.dropped_ids and not is_pinned(item):
+                continue
+            if not summary_inserted and not is_instructions(item):
+                # Summary goes right after the instructions, before the first recent turn
+                items.append(llm.ChatMessage(role="system", content=[self.summary]))
+                summary_inserted = True
+            items.append(item)
+
+        bounded = llm.ChatContext(items)
+        self.requests.append((len(items), sum(item_tokens(item) for item in items)))
+        return bounded
+
+    def observe(self, prompt_tokens: int, ttft: float):
+        """Record the provider-reported prompt size and time to first token of an LLM request."""
+        self.observed.append((prompt_tokens, ttft))
+
+    def summary_stats(self) -> Dict[str, Any]:
+        prompt_tokens = [tokens for tokens, _ in self.observed]
+        ttfts = [ttft for _, ttft in self.observed if ttft > 0]
+        return {
+            "llm_requests": len(self.requests),
+            "dropped_items": len(self.dropped_ids),
+            "max_estimated_tokens": max((tokens for _, tokens in self.requests), default=None),
+            "prompt_tokens_first": prompt_tokens[0] if prompt_tokens else None,
+            "prompt_tokens_last": prompt_tokens[-1] if prompt_tokens else None,
+            "prompt_tokens_max": max(prompt_tokens, default=None),
+            "ttft_first_s": round(ttfts[0], 3) if ttfts else None,
+            "ttft_last_s": round(ttfts[-1], 3) if ttfts else None,
+        }
@@ -0,0 +1,138 @@
+import os
+import re
+import time
+import logging
+from collections import Counter
+from typing import Any, Dict
+
+logger = logging.getLogger("outbound-clinical-trial-agent")
+
+FAST_PATH_ENABLED = os.getenv("AGENT_FAST_PATH", "1") != "0"
+# Longer utterances usually carry more than one question - leave those to the LLM
+FAST_PATH_MAX_WORDS = int(os.getenv("AGENT_FAST_PATH_MAX_WORDS", "12"))
+# LLM time-to-first-token assumed until the first real LLM turn of the call is measured
+DEFAULT_LLM_TTFT = float(os.getenv("AGENT_FAST_PATH_DEFAULT_TTFT", "0.7"))
+
+# Fixed answers from OUTBOUND_SYSTEM_INSTRUCTIONS; per-trial values from the dispatch
+# metadata override these. Only the compensation answer quotes money, so a trial's
+# compensation_info can't be contradicted by another canned line
+DEFAULT_ANSWERS: Dict[str, str] = {
+    "compensation": "$500 per visit, 6 visits total. Paid after each completed visit. Plus free treatment.",
+    "duration": "6 months total. Monthly visits, about 2 hours each.",
+    "consent": "Your ResearchGate account agreement includes consent for trial contact. You checked that box when you signed up. It's in your account settings.",
+    "not_interested": "No problem! If you change your mind, reach out to research@clinicaltrials.com. Have a great day!",
+}
+
+INTENT_PATTERNS: Dict[str, re.Pattern] = {
+    "compensation": re.compile(
+        r"\b(compensation|compensated|how much (do|does|will|would) (it|you|they|this) pay|"
+        r"(do|will|would) i get paid|what('s| is) the pay)\b"
+    ),
+    # About the trial, not this phone call ("how long will this call take" goes to the LLM)
+    "duration": re.compile(
+        r"^(?!.*\b(call|conversation|chat|phone)\b).*"
+        r"\b(how long (is|does|will|would) (the |this )?(trial|study|program)|how long (does|will|would) it (last|run)|"
+        r"how many (visits|months|weeks)|(trial |study )?duration|time commitment)\b"
+    ),
+    "consent": re.compile(
+        r"\b(when did i (consent|agree|give consent|sign up)|i (never|didn't|did not) (consented|consent|agreed|agree))\b"
+    ),
+    "not_interested": re.compile(
+        r"^(no,? )?(thanks,? |thank you,? )?(i'm |i am )?not (really )?interested( thanks| thank you)?$"
+    ),
+}
+
+# Words that signal the caller wants more than the canned answer covers
+HEDGE_PATTERN = re.compile(r"\b(but|and also|also|what about|unless|maybe)\b")
+# A caller correcting us right after a canned answer counts as a false match
+CORRECTION_PATTERN = re.compile(
+    r"^(no,? )?(that's not what i (asked|meant)|i (asked|meant)|i didn't ask|that doesn't answer)"
+)
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Lowercase and strip punctuation other than apostrophes."""
+    text = re.sub(r"[^\w\s'$]", " ", transcript.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def match_intent(transcript: str) -> str | None:
+    """
+    Match a final transcript to a canned-answer intent.
+
+    Returns None (fall back to the LLM) unless exactly one intent matches a short,
+    unhedged utterance.
+    """
+    text = normalize_transcript(transcript)
+    if not text or len(text.split()) > FAST_PATH_MAX_WORDS or HEDGE_PATTERN.search(text):
+        return None
+
+    matches = [intent for intent, pattern in INTENT_PATTERNS.items() if pattern.search(text)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def build_answer_table(trial_data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Build the per-trial canned answers.
+
+    Compensation and duration use the trial's compensation_info and trial_duration
+    when provided; any intent can be overridden with a "canned_answers" mapping in
+    the dispatch metadata (LaunchCallRequest.canned_answers).
+    """
+    answers = dict(DEFAULT_ANSWERS)
+
+    compensation_info = (trial_data.get("compensation_info") or "").strip().rstrip(".")
+    if compensation_info:
+        answers["compensation"] = f"{compensation_info}. Plus free treatment."
+    trial_duration = (trial_data.get("trial_duration") or "").strip().rstrip(".")
+    if trial_duration:
+        answers["duration"] = f"{trial_duration}."
+
+    answers.update(trial_data.get("canned_answers") or {})
+    return answers
+
+
+class FastPathStats:
+    """Per-call fast-path counters: matches, fallbacks, estimated latency saved and precision."""
+
+    def __init__(self):
+        self.matches: Counter = Counter()
+        self.fallbacks = 0
+        self.corrections = 0
+        self.latency_saved = 0.0
+        self.llm_ttfts: list[float] = []
+        self.last_reply_intent: str | None = None
+
+    def observe_llm_ttft(self, ttft: float):
+        """Record the time to first token of an LLM turn in this call."""
+        self.llm_ttfts.append(ttft)
+
+    def match(self, transcript: str) -> str | None:
+        """Match a user turn, updating counters; returns the intent or None."""
+        started = time.perf_counter()
+
+        if self.last_reply_intent and CORRECTION_PATTERN.search(normalize_transcript(transcript)):
+            self.corrections += 1
+            logger.info("Fast-path answer for %r was corrected", self.last_reply_intent)
+        self.last_reply_intent = None
+
+        intent = match_intent(transcript)
+        if intent is None:
+            self.fallbacks += 1
+            return None
+
+        llm_ttft = sum(self.llm_ttfts) / len(self.llm_ttfts) if self.llm_ttfts else DEFAULT_LLM_TTFT
+        self.latency_saved += max(0.0, llm_ttft - (time.perf_counter() - started))
+        self.matches[intent] += 1
+        self.last_reply_intent = intent
+        return intent
+
+    def summary(self) -> Dict[str, Any]:
+        total_matches = sum(self.matches.values())
+        return {
+            "matches": dict(self.matches),
+            "fallbacks": self.fallbacks,
+            "corrections": self.corrections,
+            "precision": round(1 - self.corrections / total_matches, 3) if total_matches else None,
+            "latency_saved_s": round(self.latency_saved, 3),
+        }
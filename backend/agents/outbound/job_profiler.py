@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger("outbound-clinical-trial-agent")
+
+# Fraction of calls profiled without being asked to (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("AGENT_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("AGENT_PROFILE_DIR", str(Path(__file__).parent / ".profiles")))
+PROFILE_MAX_REPORTS = int(os.getenv("AGENT_PROFILE_MAX_REPORTS", "50"))
+PROFILE_MAX_MB = float(os.getenv("AGENT_PROFILE_MAX_MB", "200"))
+# Stack sampling interval of the CPU profiler
+PROFILE_INTERVAL_MS = float(os.getenv("AGENT_PROFILE_INTERVAL_MS", "10"))
+# tracemalloc hooks every allocation and can slow allocation-heavy Python code several-fold
+# while a job is profiled; set to 0 to keep only the CPU and event-loop parts
+PROFILE_MEMORY = os.getenv("AGENT_PROFILE_MEMORY", "1") == "1"
+
+# Event-loop probe interval, and the cap on stored (lag, tasks) samples per job
+LOOP_PROBE_INTERVAL = 0.1
+MAX_LOOP_SAMPLES = 3000
+TRACEMALLOC_FRAMES = 1  # top_growth groups by line, so deeper tracebacks only add overhead
+TOP_ALLOCATIONS = 30
+MAX_STACK_DEPTH = 64
+
+
+def should_profile(trial_data: Dict[str, Any]) -> bool:
+    """Profile a job when dispatch metadata asks for it, or for a sampled fraction of calls."""
+    if trial_data.get("profile"):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class StackSampler:
+    """
+    Sampling CPU profiler for one thread, in collapsed-stack ("folded") format.
+
+    A daemon thread reads the target thread's current frame every interval; the target
+    runs untouched, so the cost is the sampler's own CPU. Output loads directly into
+    flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            # Raw (code, line) pairs; names are only formatted when the report is written
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append((frame.f_code, frame.f_lineno))
+                frame = frame.f_back
+            self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _label(code, lineno: int) -> str:
+        return f"{code.co_name} ({Path(code.co_filename).name}:{lineno})"
+
+    def folded(self) -> str:
+        return "".join(
+            ";".join(self._label(*entry) for entry in reversed(stack)) + f" {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+    def top_functions(self, limit: int = 20) -> list[Dict[str, Any]]:
+        """Leaf functions by share of samples (where the thread was actually running)."""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[self._label(*stack[0])] += count
+        return [
+            {"function": leaf, "samples": count, "share": round(count / self.samples, 3)}
+            for leaf, count in leaves.most_common(limit)
+        ]
+
+
+class JobProfiler:
+    """
+    Opt-in per-job profile: sampled CPU stacks, tracemalloc snapshots at call start and
+    end, event-loop lag and asyncio task counts.
+
+    Started from entrypoint (on the job's event loop thread) and stopped from a
+    shutdown callback, which writes <job_id>.json plus a <job_id>.folded stack file to
+    PROFILE_DIR and trims the directory to the retention limits.
+    """
+
+    def __init__(self, job_id: str, room_name: str, reason: str):
+        self.job_id = job_id
+        self.room_name = room_name
+        self.reason = reason
+        self.sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+        self.loop_samples: list[tuple[float, float, int]] = []  # (t, lag ms, tasks)
+        self.started_tracemalloc = False
+        self.start_snapshot: tracemalloc.Snapshot | None = None
+        self._probe_task: asyncio.Task | None = None
+
+    def start(self):
+        self.started_at = datetime.now(timezone.utc)
+        self.wall_start = time.monotonic()
+        self.cpu_start = time.process_time()
+
+        if PROFILE_MEMORY:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self.started_tracemalloc = True
+            self.start_snapshot = tracemalloc.take_snapshot()
+
+        self.sampler.start()
+        self._probe_task = asyncio.create_task(self._probe_loop())
+        logger.info("🔬 Profiling job %s (%s)", self.job_id, self.reason)
+
+    async def _probe_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LOOP_PROBE_INTERVAL
+            await asyncio.sleep(LOOP_PROBE_INTERVAL)
+            lag_ms = max(0.0, loop.time() - expected) * 1000
+            if len(self.loop_samples) < MAX_LOOP_SAMPLES:
+                self.loop_samples.append(
+                    (round(time.monotonic() - self.wall_start, 2), round(lag_ms, 2), len(asyncio.all_tasks()))
+                )
+
+    def _memory_report(self) -> Dict[str, Any]:
+        if self.start_snapshot is None:
+            return {}
+        end_snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = end_snapshot.filter_traces(filters).compare_to(
+            self.start_snapshot.filter_traces(filters), "lineno"
+        )
+        return {
+            "traced_current_mb": round(current / 1e6, 2),
+            "traced_peak_mb": round(peak / 1e6, 2),
+            "top_growth": [
+                {
+                    "location": str(stat.traceback[0]),
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count_diff": stat.count_diff,
+                }
+                for stat in diff[:TOP_ALLOCATIONS]
+            ],
+        }
+
+    def _loop_report(self) -> Dict[str, Any]:
+        lags = sorted(lag for _, lag, _ in self.loop_samples)
+        tasks = [count for _, _, count in self.loop_samples]
+        if not lags:
+            return {}
+        return {
+            "lag_p50_ms": lags[len(lags) // 2],
+            "lag_p95_ms": lags[int(len(lags) * 0.95)],
+            "lag_max_ms": lags[-1],
+            "tasks_max": max(tasks),
+            "tasks_last": tasks[-1],
+            "samples": self.loop_samples,
+        }
+
+    async def stop(self, reason: str = ""):
+        """Stop profiling and write the report; registered as the job's shutdown callback."""
+        if self._probe_task:
+            self._probe_task.cancel()
+        # Joining the sampler thread can take up to one interval; keep it off the loop
+        await asyncio.to_thread(self.sampler.stop)
+        wall = time.monotonic() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+
+        report = {
+            "job_id": self.job_id,
+            "room_name": self.room_name,
+            "reason": self.reason,
+            "shutdown_reason": reason,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(wall, 2),
+            "cpu_seconds": round(cpu, 2),
+            "cpu_utilization": round(cpu / wall, 3) if wall else None,
+            "cpu_samples": self.sampler.samples,
+            "top_functions": self.sampler.top_functions(),
+            "memory": self._memory_report(),
+            "event_loop": self._loop_report(),
+        }
+        try:
+            await asyncio.to_thread(self._write, report, self.sampler.folded())
+        except Exception as e:
+            logger.warning("Failed to write profile for job %s: %s", self.job_id, e)
+
+    def _write(self, report: Dict[str, Any], folded: str):
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.started_at.strftime('%Y%m%dT%H%M%S')}-{self.job_id}"
+        (PROFILE_DIR / f"{stem}.json").write_text(json.dumps(report, indent=2, default=str))
+        (PROFILE_DIR / f"{stem}.folded").write_text(folded)
+        logger.info("🔬 Profile for job %s written to %s.json", self.job_id, PROFILE_DIR / stem)
+        enforce_retention()
+
+
+def enforce_retention(directory: Path = PROFILE_DIR):
+    """Delete the oldest reports until at most PROFILE_MAX_REPORTS remain within PROFILE_MAX_MB."""
+    reports = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    max_bytes = PROFILE_MAX_MB * 1024 * 1024
+    total = 0
+    for index, report in enumerate(reports):
+        folded = report.with_suffix(".folded")
+        size = report.stat().st_size + (folded.stat().st_size if folded.exists() else 0)
+        total += size
+        if index >= PROFILE_MAX_REPORTS or total > max_bytes:
+            report.unlink(missing_ok=True)
+            folded.unlink(missing_ok=True)
+
+
+def start_job_profiler(job_id: str, room_name: str, trial_data: Dict[str, Any]) -> JobProfiler | None:
+    """Start a profiler for this job if it is opted in or sampled; otherwise return None."""
+    if not should_profile(trial_data):
+        return None
+    profiler = JobProfiler(job_id, room_name, "requested" if trial_data.get("profile") else "sampled")
+    profiler.start()
+    return profiler
@@ -0,0 +1,77 @@
+import os
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict
+
+logger = logging.getLogger("outbound-clinical-trial-agent")
+
+
+@dataclass(frozen=True)
+class MediaProfile:
+    """Per-call audio processing settings - the main per-call CPU costs in the worker."""
+
+    name: str
+    # Name of the livekit.plugins.noise_cancellation factory (BVCTelephony, NC) or None to disable
+    noise_cancellation: str | None
+    # Silero VAD parameters
+    vad_sample_rate: int
+    vad_min_speech_duration: float
+    vad_min_silence_duration: float
+    vad_activation_threshold: float
+    # Deepgram STT parameters
+    stt_sample_rate: int
+    interim_results: bool
+
+
+MEDIA_PROFILES: Dict[str, MediaProfile] = {
+    # Noisy lines: background voice cancellation, 16kHz VAD/STT, interim transcripts for fast turns
+    "full": MediaProfile(
+        name="full",
+        noise_cancellation="BVCTelephony",
+        vad_sample_rate=16000,
+        vad_min_speech_duration=0.1,
+        vad_min_silence_duration=1.5,
+        vad_activation_threshold=0.5,
+        stt_sample_rate=16000,
+        interim_results=True,
+    ),
+    # Typical lines: lighter noise cancellation, VAD and STT at the native 8kHz telephony rate
+    "lite": MediaProfile(
+        name="lite",
+        noise_cancellation="NC",
+        vad_sample_rate=8000,
+        vad_min_speech_duration=0.1,
+        vad_min_silence_duration=1.5,
+        vad_activation_threshold=0.5,
+        stt_sample_rate=8000,
+        interim_results=True,
+    ),
+    # Clean lines: no noise cancellation, 8kHz, final transcripts only
+    "minimal": MediaProfile(
+        name="minimal",
+        noise_cancellation=None,
+        vad_sample_rate=8000,
+        vad_min_speech_duration=0.15,
+        vad_min_silence_duration=1.5,
+        vad_activation_threshold=0.6,
+        stt_sample_rate=8000,
+        interim_results=False,
+    ),
+}
+
+DEFAULT_MEDIA_PROFILE = os.getenv("AGENT_MEDIA_PROFILE", "full")
+
+
+def select_media_profile(trial_data: Dict[str, Any]) -> MediaProfile:
+    """
+    Pick the media profile for a call.
+
+    Uses "media_profile" from the dispatch metadata, then AGENT_MEDIA_PROFILE, then "full".
+    Unknown names fall back to "full" so a bad value never drops a call.
+    """
+    name = trial_data.get("media_profile") or DEFAULT_MEDIA_PROFILE
+    profile = MEDIA_PROFILES.get(name)
+    if profile is None:
+        logger.warning("Unknown media profile '%s' - using 'full'", name)
+        profile = MEDIA_PROFILES["full"]
+    return profile
@@ -5,8 +5,9 @@ import logging
 import os
 import sys
 import json
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import AsyncIterable, Dict, Any
 from dotenv import load_dotenv
 
 # Add the current directory and parent directory to sys.path for imports
@@ -16,23 +17,47 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 from livekit import agents, api, rtc
 from livekit.agents import (
     JobContext,
+    JobProcess,
     WorkerOptions,
     AgentSession,
     Agent,
     RunContext,
+    FunctionTool,
+    ModelSettings,
+    JobRequest,
     function_tool,
     get_job_context,
     cli,
-    RoomInputOptions
+    llm,
+    RoomInputOptions,
+    StopResponse,
 )
-from livekit.plugins import deepgram, openai, cartesia, silero, noise_cancellation
 from services.supabase_service import SupabaseService
+from services.patient_cache import PatientCache
+from services.call_ledger import get_call_ledger, utc_now
+from services.rate_limiter import get_rate_limiter
+from services.trunk_pool import LEASE_HEARTBEAT_SECONDS, get_trunk_pool, is_trunk_failure
+from services.structured_logging import bind_call_context, configure_logging, flush_logs
+from capacity import WorkerCapacity, LOAD_THRESHOLD, NUM_IDLE_PROCESSES
+from media_profiles import DEFAULT_MEDIA_PROFILE, MEDIA_PROFILES, select_media_profile
+import providers
+from fast_path import FAST_PATH_ENABLED, FastPathStats, build_answer_table
+from tts_cache import get_tts_cache
+from context_window import ContextWindow
+from job_profiler import start_job_profiler
+from voicemail_detector import (
+    FRAME_MS,
+    MACHINE,
+    MAX_ANALYSIS_MS,
+    UNKNOWN,
+    VOICEMAIL_DETECTION_ENABLED,
+    VoicemailDetector,
+)
 
 
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Handlers come from the agents CLI; each job routes them through a queue (see entrypoint)
 logger = logging.getLogger("outbound-clinical-trial-agent")
 
 # Clinical trial organization configuration
@@ -41,6 +66,9 @@ ORGANIZATION_PHONE = os.getenv("ORGANIZATION_PHONE", "+1234567890")
 outbound_trunk_id = os.getenv("OUTBOUND_SIP_TRUNK_ID")
 twilio_caller_id = os.getenv("TWILIO_CALLER_ID")
 
+# Longest an STT stream, LLM turn or TTS request waits for the host-wide provider request quota
+PROVIDER_QUOTA_WAIT_SECONDS = float(os.getenv("PROVIDER_QUOTA_WAIT_SECONDS", os.getenv("LLM_QUOTA_WAIT_SECONDS", "2")))
+
 OUTBOUND_SYSTEM_INSTRUCTIONS = f"""You are Jocelyn, a recruiter inviting people to participate in a clinical trial as research SUBJECTS/PATIENTS. You found them on ResearchGate's patient recruitment platform.
 
 CRITICAL CONTEXT - Who you're calling:
@@ -177,9 +205,11 @@ REMEMBER: You are Jocelyn. Keep responses conversational and brief. Mention Rese
         self.call_completed = False
         self.voicemail_detected = False
         self.status_updated = False  # Track if mark_contacted() was already called
+        self.call_outcome: str | None = None  # Recorded in the call ledger when the job ends
 
         # Parse trial information from metadata
         self.participant_phone = trial_data.get('phone_number', 'Unknown')
+        self.patient_id = trial_data.get('patient_id')
         self.participant_name = participant_name
         self.trial_name = trial_name
         self.trial_description = trial_description
@@ -191,19 +221,51 @@ REMEMBER: You are Jocelyn. Keep responses conversational and brief. Mention Rese
         # Keep reference to participant for call management
         self.participant: rtc.RemoteParticipant | None = None
 
-        # Initialize Supabase service for database updates
+        # Canned answers for common questions, served without an LLM round trip
+        self.canned_answers = build_answer_table(trial_data)
+        self.fast_path = FastPathStats()
+        # Held so the event loop's weak reference isn't the only one to the pending hang-up
+        self.hangup_task: asyncio.Task | None = None
+
+        # Synthesized audio for fixed and repeated lines, shared across calls
+        self.tts_cache = get_tts_cache(providers.TTS_MODEL, providers.TTS_VOICE)
+
+        # Token-bounded history for LLM requests, so long calls don't get slower every turn
+        self.context_window = ContextWindow()
+
+        # Initialize Supabase service for database updates. Job processes don't
+        # subscribe to the patient change feed, so nothing would invalidate a cache here
         try:
-            self.supabase_service = SupabaseService()
+            self.supabase_service = SupabaseService(cache=PatientCache(max_entries=0))
         except Exception as e:
-            logger.warning(f"Failed to initialize Supabase service: {e}")
+            logger.warning("Failed to initialize Supabase service: %s", e)
             self.supabase_service = None
 
-        logger.info(f"ClinicalTrialAgent initialized for participant: {self.participant_name}")
+        logger.info("ClinicalTrialAgent initialized")
 
 
     def set_participant(self, participant: rtc.RemoteParticipant):
         self.participant = participant
 
+    def say_cached(self, *segments: str, live_prefix: str | None = None):
+        """
+        Speak fixed text through the TTS cache; cache hits play without a TTS request.
+
+        Segments are cached separately. A personalized opening (e.g. the name in the
+        greeting) goes in live_prefix: it is synthesized for this call only and never
+        cached, and doesn't stop the rest of the line from being reused.
+        """
+        text = " ".join(([live_prefix] if live_prefix else []) + list(segments))
+        return self.session.say(
+            text,
+            audio=self.tts_cache.audio_for_segments(
+                self.session.tts,
+                list(segments),
+                live_prefix=live_prefix,
+                before_synthesis=lambda: self.wait_for_quota("cartesia"),
+            ),
+        )
+
     async def hangup(self):
         """Helper function to hang up the call by deleting the room"""
         job_ctx = get_job_context()
@@ -213,11 +275,72 @@ REMEMBER: You are Jocelyn. Keep responses conversational and brief. Mention Rese
             )
         )
 
+    async def wait_for_quota(self, provider: str):
+        """Take a request token from the host-wide provider bucket"""
+        if not await get_rate_limiter().wait_for_request(provider, timeout=PROVIDER_QUOTA_WAIT_SECONDS):
+            # Waiting longer would leave dead air; send the request and let the plugin retry
+            logger.warning("%s request quota exhausted after %ss wait", provider, PROVIDER_QUOTA_WAIT_SECONDS)
+
+    async def stt_node(self, audio: AsyncIterable[rtc.AudioFrame], model_settings: ModelSettings):
+        """Take a Deepgram request token before opening the STT stream"""
+        await self.wait_for_quota("deepgram")
+        async for event in Agent.default.stt_node(self, audio, model_settings):
+            yield event
+
+    async def llm_node(
+        self,
+        chat_ctx: llm.ChatContext,
+        tools: list[FunctionTool],
+        model_settings: ModelSettings,
+    ):
+        """Bound the history to the context budget and take an OpenAI request token before each LLM request"""
+        await self.wait_for_quota("openai")
+        chat_ctx = self.context_window.apply(chat_ctx)
+        async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+            yield chunk
+
+    async def tts_node(self, text: AsyncIterable[str], model_settings: ModelSettings):
+        """Take a Cartesia request token before each synthesized reply"""
+        await self.wait_for_quota("cartesia")
+        async for frame in Agent.default.tts_node(self, text, model_settings):
+            yield frame
+
+    async def on_user_turn_completed(self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage):
+        """Answer common recruiting questions from the canned-answer table, skipping the LLM"""
+        if not FAST_PATH_ENABLED:
+            return
+
+        transcript = new_message.text_content or ""
+        intent = self.fast_path.match(transcript)
+        if intent is None:
+            return
+
+        logger.info("⚡ Fast-path answer for '%s'", intent)
+
+        # StopResponse drops the turn, so keep the user message in history for later LLM turns
+        chat_ctx = self.chat_ctx.copy()
+        chat_ctx.items.append(new_message)
+        await self.update_chat_ctx(chat_ctx)
+
+        handle = self.say_cached(self.canned_answers[intent])
+        if intent == "not_interested":
+            self.hangup_task = asyncio.create_task(self.hangup_after_playout(handle))
+
+        raise StopResponse()
+
+    async def hangup_after_playout(self, handle):
+        """Let the closing line finish, then end the call"""
+        await handle.wait_for_playout()
+        self.call_outcome = "not_interested"
+        self.call_completed = True
+        await self.hangup()
+
     @function_tool()
     async def detected_answering_machine(self, ctx: RunContext) -> str:
         """Call this tool only when you clearly hear a voicemail greeting with specific automated phrases like 'Thanks for calling', 'You have reached the voicemail', 'leave a message after the beep', or other pre-recorded messages. Do NOT use this if a real person is talking to you."""
         logger.info("Voicemail detected by agent - hanging up immediately")
         self.voicemail_detected = True
+        self.call_outcome = "voicemail"
         self.call_completed = True
 
         # Hang up immediately without leaving any message
@@ -231,11 +354,13 @@ REMEMBER: You are Jocelyn. Keep responses conversational and brief. Mention Rese
     async def end_call_successful(self, ctx: RunContext) -> str:
         """Call this when the conversation is complete and customer is informed"""
         logger.info("Call completed successfully")
+        self.call_outcome = "completed"
         self.call_completed = True
 
-        # Wait for final message to play out, then hang up
+        # Let the current reply finish, play the fixed closing line from the TTS cache, then hang up
         response_text = "Thank you! Have a great day!"
         await ctx.wait_for_playout()
+        await self.say_cached(response_text).wait_for_playout()
         await self.hangup()
 
         return response_text
@@ -268,14 +393,14 @@ REMEMBER: You are Jocelyn. Keep responses conversational and brief. Mention Rese
 
             if result['success']:
                 self.status_updated = True  # Mark as updated to prevent duplicates
-                logger.info(f"✅ Successfully updated status to 'Contacted' for {self.participant_phone}")
+                logger.info("✅ Successfully updated status to 'Contacted' for patient %s", self.patient_id or "-")
                 return "Status updated to Contacted successfully"
             else:
-                logger.warning(f"⚠️ {result['message']}")
+                logger.warning("⚠️ %s", result['message'])
                 return f"Could not update status: {result['message']}"
 
         except Exception as e:
-            logger.error(f"❌ Failed to update status: {e}")
+            logger.error("❌ Failed to update status: %s", e)
             return f"Failed to update status: {str(e)}"
 
     async def mark_contacted_programmatically(self):
@@ -303,16 +428,67 @@ REMEMBER: You are Jocelyn. Keep responses conversational and brief. Mention Rese
 
             if result['success']:
                 self.status_updated = True
-                logger.info(f"✅ Auto-updated status to 'Contacted' for {self.participant_phone}")
+                logger.info("✅ Auto-updated status to 'Contacted' for patient %s", self.patient_id or "-")
             else:
-                logger.warning(f"⚠️ Auto-update failed: {result['message']}")
+                logger.warning("⚠️ Auto-update failed: %s", result['message'])
 
         except Exception as e:
-            logger.error(f"❌ Failed to auto-update status: {e}")
+            logger.error("❌ Failed to auto-update status: %s", e)
+
+
+def prewarm(proc: JobProcess):
+    """Load the default media profile's plugins and VAD model while the process is idle."""
+    profile = MEDIA_PROFILES.get(DEFAULT_MEDIA_PROFILE, MEDIA_PROFILES["full"])
+    providers.load_plugins(profile)
+    providers.build_vad(profile)
+
+
+async def detect_answering_machine(participant: rtc.RemoteParticipant) -> VoicemailDetector:
+    """Classify the callee's first seconds of audio as a person or an answering machine."""
+    detector = VoicemailDetector(sample_rate=8000)
+    stream = rtc.AudioStream.from_participant(
+        participant=participant,
+        track_source=rtc.TrackSource.SOURCE_MICROPHONE,
+        sample_rate=8000,
+        num_channels=1,
+        frame_size_ms=FRAME_MS,
+    )
+
+    async def listen():
+        async for event in stream:
+            if detector.push(event.frame.data) is not None:
+                return
+
+    try:
+        # A track that never publishes audio also ends here, undecided
+        await asyncio.wait_for(listen(), timeout=MAX_ANALYSIS_MS / 1000 + 1.0)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await stream.aclose()
+    return detector
+
+
+async def request_fnc(req: JobRequest):
+    """Only accept a call when every provider it streams to has quota left on this host."""
+    if await asyncio.to_thread(get_rate_limiter().has_call_capacity):
+        await req.accept()
+    else:
+        logger.warning("Rejecting job %s: provider quota exhausted on this host", req.id)
+        await req.reject()
 
 
 async def entrypoint(ctx: JobContext):
-    logger.info(f"connecting to room {ctx.room.name}")
+    # Log off the event loop, with this call's room and job on every record
+    configure_logging()
+    bind_call_context(room=ctx.room.name, job_id=ctx.job.id)
+
+    async def flush_call_logs():
+        await asyncio.to_thread(flush_logs)
+
+    ctx.add_shutdown_callback(flush_call_logs)
+
+    logger.info("connecting to room %s", ctx.room.name)
     await ctx.connect()
 
     # Extract clinical trial data from job metadata
@@ -323,17 +499,45 @@ async def entrypoint(ctx: JobContext):
         if ctx.job.metadata:
             trial_data = json.loads(ctx.job.metadata)
             phone_number = trial_data.get("phone_number")
-            logger.info(f"Extracted trial data from job metadata: {trial_data}")
+            bind_call_context(patient_id=trial_data.get("patient_id"), campaign_id=trial_data.get("campaign_id"))
+            logger.debug("Extracted trial data from job metadata", extra={"trial_data": trial_data})
         else:
             logger.error("No job metadata available")
             ctx.shutdown()
             return
 
     except Exception as e:
-        logger.error(f"Error extracting trial data from job metadata: {e}")
+        logger.error("Error extracting trial data from job metadata: %s", e)
         ctx.shutdown()
         return
 
+    # Opt-in profiling (dispatch metadata "profile" or AGENT_PROFILE_SAMPLE_RATE); None when off
+    profiler = start_job_profiler(ctx.job.id, ctx.room.name, trial_data)
+    if profiler:
+        ctx.add_shutdown_callback(profiler.stop)
+
+    # SIP trunk pool lease taken by the API for this call: renewed while the call runs
+    # (the pool reclaims leases that miss their heartbeat) and returned when the job ends
+    sip_lease_id = trial_data.get("sip_lease_id")
+    if sip_lease_id:
+        async def renew_trunk_lease():
+            while True:
+                try:
+                    await asyncio.to_thread(
+                        get_trunk_pool().renew, sip_lease_id, trial_data["sip_trunk_id"], trial_data["caller_id"]
+                    )
+                except Exception as e:
+                    logger.warning("Failed to renew SIP trunk lease: %s", e)
+                await asyncio.sleep(LEASE_HEARTBEAT_SECONDS)
+
+        lease_heartbeat = asyncio.create_task(renew_trunk_lease())
+
+        async def release_trunk_lease():
+            lease_heartbeat.cancel()
+            await asyncio.to_thread(get_trunk_pool().release, sip_lease_id)
+
+        ctx.add_shutdown_callback(release_trunk_lease)
+
     if not phone_number:
         logger.error("No phone number provided for outbound call")
         ctx.shutdown()
@@ -353,39 +557,61 @@ async def entrypoint(ctx: JobContext):
         ctx.shutdown()
         return
 
-    logger.info(f"📱 Using caller ID: {caller_id}")
+    bind_call_context(trunk_id=trunk_id)
+    logger.info("📱 Using caller ID: %s", caller_id)
+
+    # Call ledger entry (written by the API on dispatch) is keyed by room name
+    call_times: Dict[str, float] = {}
+
+    async def record_call(**fields):
+        """Update this call's ledger entry off the event loop; ledger problems never affect the call"""
+        if "status" in fields:
+            bind_call_context(call_state=fields["status"])
+        try:
+            if not await asyncio.to_thread(get_call_ledger().update_call, ctx.room.name, **fields):
+                logger.warning("No call ledger entry for room %s; %s not recorded", ctx.room.name, ", ".join(fields))
+        except Exception as e:
+            logger.warning("Failed to update call ledger: %s", e)
+
+    async def record_trunk_result(success: bool, error: str | None = None):
+        """Feed the dial result into the trunk's health and circuit breaker, off the event loop"""
+        try:
+            await asyncio.to_thread(get_trunk_pool().record_result, trunk_id, success, error)
+        except Exception as e:
+            logger.warning("Failed to record SIP trunk result: %s", e)
+
+    # Hold one STT, LLM and TTS session slot for the life of the call
+    provider_leases = await asyncio.to_thread(get_rate_limiter().acquire_call_slots)
+    if provider_leases is None:
+        logger.error("Provider concurrency limit reached, not placing call")
+        await record_call(status="failed", error="Provider concurrency limit reached")
+        ctx.shutdown()
+        return
+
+    async def release_provider_leases():
+        await asyncio.to_thread(get_rate_limiter().release, provider_leases)
+
+    ctx.add_shutdown_callback(release_provider_leases)
 
     # Create clinical trial agent
     agent = ClinicalTrialAgent(trial_data)
     logger.info("📞 Using clinical trial recruitment agent")
 
     participant_identity = phone_number
-    
-    # Create STT instance with optimized settings for faster transcription
-    stt_instance = deepgram.STT(
-        model="nova-3",
-        language="en",
-        # Enable interim results for faster feedback
-        interim_results=True,
-    )
 
-    # Create agent session with voice pipeline components
+    # Media profile decides noise cancellation, VAD and STT settings (the main per-call CPU costs)
+    media_profile = select_media_profile(trial_data)
+    logger.info("🎚️ Using media profile: %s", media_profile.name)
+
+    # Create agent session with voice pipeline components; plugins load on first use
     session = AgentSession(
-        stt=stt_instance,
-        llm=openai.LLM(
-            model="gpt-4o-mini",  # More capable model for better conversation context
-            temperature=0.7,  # Slightly creative but not too random
-        ),
-        tts=cartesia.TTS(
-            model="sonic-2",
-            voice="93c78f8b-0e6c-4ca6-addd-10ad39d0aa6d",  # Customer service voice
-        ),
-        vad=silero.VAD.load(
-            # Optimize VAD for telephone audio quality
-            min_speech_duration=0.1,  # Faster detection of speech start
-            min_silence_duration=1.5,  # Wait 1.5 seconds of silence before considering speech ended
-        ),
-        preemptive_generation=True,
+        stt=providers.build_stt(media_profile),
+        llm=providers.build_llm(),
+        tts=providers.build_tts(),
+        vad=providers.build_vad(media_profile),
+        # Preemptive generation would start the LLM request (and take its quota token)
+        # before on_user_turn_completed can answer from the fast path and stop the turn
+        preemptive_generation=not FAST_PATH_ENABLED,
         use_tts_aligned_transcript=True,
     )
 
@@ -406,10 +632,36 @@ async def entrypoint(ctx: JobContext):
             )
 
             if is_substantial:
-                logger.info(f"🎯 First substantial response detected: '{transcript}' ({word_count} words) - triggering mark_contacted()")
+                logger.info("🎯 First substantial response detected (%d words) - triggering mark_contacted()", word_count)
                 asyncio.create_task(agent.mark_contacted_programmatically())
             else:
-                logger.debug(f"Non-substantial response: '{transcript}' - waiting for more context")
+                # Word count only: the caller's words stay out of the logs
+                logger.debug("Non-substantial response (%d words) - waiting for more context", word_count)
+
+    # Track LLM latency (for the fast path) and prompt size per turn (for the context window)
+    @session.on("metrics_collected")
+    def on_metrics_collected(event):
+        if event.metrics.type == "llm_metrics":
+            agent.fast_path.observe_llm_ttft(event.metrics.ttft)
+            agent.context_window.observe(event.metrics.prompt_tokens, event.metrics.ttft)
+
+    async def log_call_stats():
+        logger.info("⚡ Fast-path stats: %s", agent.fast_path.summary())
+        logger.info("🔊 TTS cache stats: %s", agent.tts_cache.metrics())
+        logger.info("🧠 Context window stats: %s", agent.context_window.summary_stats())
+
+        # Close out the ledger entry; no_answer/failed calls already have their final status
+        if "answered" in call_times:
+            await record_call(
+                status="ended",
+                outcome=agent.call_outcome or "hung_up",
+                ended_at=utc_now(),
+                duration_seconds=round(time.monotonic() - call_times["answered"], 2),
+            )
+        else:
+            await record_call(ended_at=utc_now())
+
+    ctx.add_shutdown_callback(log_call_stats)
 
     # Start the session first before dialing, to ensure that when the user picks up
     # the agent does not miss anything the user says
@@ -418,8 +670,8 @@ async def entrypoint(ctx: JobContext):
             agent=agent,
             room=ctx.room,
             room_input_options=RoomInputOptions(
-                # Enable background voice cancellation optimized for telephony
-                noise_cancellation=noise_cancellation.BVCTelephony(),
+                # Background voice cancellation per media profile (None disables it)
+                noise_cancellation=providers.build_noise_cancellation(media_profile),
                 participant_identity=participant_identity,
                 pre_connect_audio=True,
                 close_on_disconnect=True,
@@ -429,14 +681,6 @@ async def entrypoint(ctx: JobContext):
 
     # `create_sip_participant` starts dialing the participant
     try:
-        logger.info(f"🔥 OUTBOUND CALL DEBUG - Starting call process")
-        logger.info(f"📞 Target: {phone_number}")
-        logger.info(f"🏢 Trunk ID: {trunk_id}")
-        logger.info(f"🏠 Room: {ctx.room.name}")
-        logger.info(f"👤 Participant Identity: {participant_identity}")
-        logger.info(f"🔗 LiveKit URL: {os.getenv('LIVEKIT_URL')}")
-        
-        # Log the complete SIP request details
         sip_request = api.CreateSIPParticipantRequest(
             room_name=ctx.room.name,
             sip_trunk_id=trunk_id,
@@ -448,38 +692,42 @@ async def entrypoint(ctx: JobContext):
             wait_until_answered=True,
         )
         
-        logger.info(f"🛠️ SIP Request Details:")
-        logger.info(f"   room_name: {sip_request.room_name}")
-        logger.info(f"   sip_trunk_id: {sip_request.sip_trunk_id}")
-        logger.info(f"   sip_call_to: {sip_request.sip_call_to}")
-        logger.info(f"   sip_number: {sip_request.sip_number}")
-        logger.info(f"   participant_identity: {sip_request.participant_identity}")
-        logger.info(f"   participant_name: {sip_request.participant_name}")
-        logger.info(f"   wait_until_answered: {sip_request.wait_until_answered}")
-        
-        logger.info(f"🚀 Creating SIP participant - initiating call...")
+        logger.debug(
+            "🛠️ SIP request details",
+            extra={
+                "sip_trunk_id": sip_request.sip_trunk_id,
+                "sip_call_to": sip_request.sip_call_to,
+                "sip_number": sip_request.sip_number,
+                "wait_until_answered": sip_request.wait_until_answered,
+                "livekit_url": os.getenv("LIVEKIT_URL"),
+            },
+        )
+        logger.info("🚀 Creating SIP participant via trunk %s - initiating call...", trunk_id)
         
         # Create SIP participant with improved voicemail detection settings
         sip_task = asyncio.create_task(
             ctx.api.sip.create_sip_participant(sip_request)
         )
+        call_times["dialing"] = time.monotonic()
+        await record_call(status="dialing", started_at=utc_now())
         
         # Wait for SIP participant creation with a longer timeout since we're waiting for answer
         try:
-            logger.info(f"⏱️ Waiting for SIP participant creation (60s timeout)...")
+            logger.info("⏱️ Waiting for SIP participant creation (60s timeout)...")
             sip_participant = await asyncio.wait_for(sip_task, timeout=60.0)
-            logger.info(f"✅ SIP participant created successfully!")
-            logger.info(f"🎉 Participant answered! Call connected.")
-            logger.info(f"📊 SIP Participant Details:")
-            logger.info(f"   Identity: {sip_participant.participant_identity if hasattr(sip_participant, 'participant_identity') else 'N/A'}")
-            logger.info(f"   SIP Call ID: {sip_participant.sip_call_id if hasattr(sip_participant, 'sip_call_id') else 'N/A'}")
+            await record_trunk_result(True)
+            logger.info(
+                "🎉 Participant answered! Call connected (SIP call ID %s)",
+                getattr(sip_participant, "sip_call_id", "N/A"),
+            )
         except asyncio.TimeoutError:
-            logger.error("❌ TIMEOUT: Call was not answered within 60 seconds")
-            logger.error("   This could indicate:")
-            logger.error("   1. SIP routing issue between LiveKit and Twilio")
-            logger.error("   2. Twilio BYOC trunk misconfiguration")
-            logger.error("   3. Target number unreachable/busy")
+            logger.error(
+                "❌ TIMEOUT: Call was not answered within 60 seconds "
+                "(SIP routing between LiveKit and Twilio, Twilio BYOC trunk configuration, or target unreachable/busy)"
+            )
             sip_task.cancel()
+            # Nobody answering says nothing about the trunk, so the breaker doesn't see it
+            await record_call(status="no_answer", error="Not answered within 60 seconds")
             ctx.shutdown()
             return
         
@@ -492,13 +740,45 @@ async def entrypoint(ctx: JobContext):
                 ctx.wait_for_participant(identity=participant_identity), 
                 timeout=10.0  # Short timeout since call should already be answered
             )
-            logger.info(f"Participant answered! Joined: {participant.identity}")
+            logger.info("Participant answered! Joined: %s", participant.identity)
+
+            call_times["answered"] = time.monotonic()
+            await record_call(
+                status="in_progress",
+                answered_at=utc_now(),
+                ring_seconds=round(call_times["answered"] - call_times["dialing"], 2),
+            )
 
             agent.set_participant(participant)
 
-            # Wait briefly to detect if this is voicemail vs real person
-            logger.info("Waiting to detect if voicemail or real person...")
-            await asyncio.sleep(2.0)  # Give time for voicemail greeting to start
+            if VOICEMAIL_DETECTION_ENABLED:
+                # Greet a person as soon as they pause; hang up on a machine before speaking.
+                # Undecided calls proceed and the detected_answering_machine tool stays the fallback.
+                logger.info("Listening for voicemail or real person...")
+                # Keep the greeting out of STT and turn detection until the verdict is in,
+                # so it can't start a reply or be interrupted by one
+                session.input.set_audio_enabled(False)
+                try:
+                    detector = await detect_answering_machine(participant)
+                finally:
+                    session.input.set_audio_enabled(True)
+                logger.info(
+                    "Answering machine detection: %s (%s) after %dms",
+                    detector.verdict or UNKNOWN,
+                    detector.reason or "no audio",
+                    detector.elapsed_ms,
+                )
+                if detector.verdict == MACHINE:
+                    logger.info("Voicemail detected from audio - hanging up before greeting")
+                    agent.voicemail_detected = True
+                    agent.call_outcome = "voicemail"
+                    agent.call_completed = True
+                    await agent.hangup()
+                    return
+            else:
+                # Wait briefly to detect if this is voicemail vs real person
+                logger.info("Waiting to detect if voicemail or real person...")
+                await asyncio.sleep(2.0)  # Give time for voicemail greeting to start
 
             # Generate initial greeting - Jocelyn recruiting them to participate
             participant_name = trial_data.get('participant_name', 'there')
@@ -508,9 +788,12 @@ async def entrypoint(ctx: JobContext):
             # This makes the greeting more natural and focused
             condition = trial_name.split('&')[0].strip() if '&' in trial_name else trial_name
 
-            initial_greeting = f"Hi {participant_name}, this is Jocelyn. I found your profile on ResearchGate and wanted to reach out about a {condition} clinical trial. Is now a good time?"
-            logger.info(f"🎙️ Starting conversation with greeting: '{initial_greeting}'")
-            await session.say(initial_greeting)
+            # Split so the condition-specific part of the greeting is served from the TTS
+            # cache; the name is synthesized live and never cached
+            greeting_name = f"Hi {participant_name},"
+            greeting_body = f"this is Jocelyn. I found your profile on ResearchGate and wanted to reach out about a {condition} clinical trial. Is now a good time?"
+            logger.info("🎙️ Starting conversation with greeting: '%s'", greeting_body)
+            await agent.say_cached(greeting_body, live_prefix=greeting_name)
 
             # Add debugging to monitor conversation state
             logger.info("📞 Initial greeting completed - agent is now listening for response")
@@ -525,38 +808,46 @@ async def entrypoint(ctx: JobContext):
             
         except asyncio.TimeoutError:
             logger.info("Participant did not answer within 60 seconds - ending call")
+            await record_call(status="no_answer", error="Participant did not join after answer")
             ctx.shutdown()
             return
 
     except api.TwirpError as e:
-        logger.error(f"🚨 TWIRP ERROR - SIP participant creation failed!")
-        logger.error(f"   Error message: {e.message}")
-        logger.error(f"   SIP status code: {e.metadata.get('sip_status_code', 'N/A')}")
-        logger.error(f"   SIP status: {e.metadata.get('sip_status', 'N/A')}")
-        logger.error(f"   Full metadata: {e.metadata}")
-        logger.error("   📋 Troubleshooting steps:")
-        logger.error("   1. Check LiveKit SIP trunk configuration")
-        logger.error("   2. Verify Twilio BYOC trunk settings")
-        logger.error("   3. Confirm SIP credentials are correct")
-        logger.error("   4. Check LiveKit → Twilio routing")
+        logger.error(
+            "🚨 TWIRP ERROR - SIP participant creation failed: %s (SIP %s %s); "
+            "check the LiveKit SIP trunk, Twilio BYOC trunk settings, SIP credentials and LiveKit → Twilio routing",
+            e.message,
+            e.metadata.get("sip_status_code", "N/A"),
+            e.metadata.get("sip_status", "N/A"),
+            extra={"sip_metadata": dict(e.metadata)},
+        )
+        await record_call(status="failed", error=f"TwirpError: {e.message}")
+        if is_trunk_failure(e.metadata.get("sip_status_code"), e.code):
+            await record_trunk_result(False, f"TwirpError: {e.message}")
         ctx.shutdown()
     except Exception as e:
-        logger.error(f"💥 UNEXPECTED ERROR during outbound call!")
-        logger.error(f"   Error type: {type(e).__name__}")
-        logger.error(f"   Error details: {str(e)}")
-        logger.error(f"   Phone: {phone_number}")
-        logger.error(f"   Trunk: {trunk_id}")
-        logger.error(f"   Room: {ctx.room.name}")
-        import traceback
-        logger.error(f"   Traceback: {traceback.format_exc()}")
+        logger.exception("💥 UNEXPECTED ERROR during outbound call: %s: %s", type(e).__name__, e)
+        await record_call(status="failed", error=f"{type(e).__name__}: {e}")
         ctx.shutdown()
 
 
 
 if __name__ == "__main__":
+    # download-files discovers plugins by import, so load them all up front for it
+    if "download-files" in sys.argv:
+        for plugin_name in providers.PLUGIN_MODULES:
+            providers.load_plugin(plugin_name)
+
+    # Capacity-aware load: stop taking jobs when active calls or worker CPU hit their limits
+    capacity = WorkerCapacity()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            request_fnc=request_fnc,
             agent_name="outbound-caller",
+            load_fnc=capacity.load,
+            load_threshold=LOAD_THRESHOLD,
+            num_idle_processes=NUM_IDLE_PROCESSES,
         )
     )
\ No newline at end of file
@@ -0,0 +1,104 @@
+import time
+import logging
+import importlib
+from types import ModuleType
+from typing import Dict
+
+from media_profiles import MediaProfile
+
+logger = logging.getLogger("outbound-clinical-trial-agent")
+
+# Provider plugins, imported only when a call's media profile needs them
+PLUGIN_MODULES: Dict[str, str] = {
+    "deepgram": "livekit.plugins.deepgram",
+    "openai": "livekit.plugins.openai",
+    "cartesia": "livekit.plugins.cartesia",
+    "silero": "livekit.plugins.silero",
+    "noise_cancellation": "livekit.plugins.noise_cancellation",
+}
+
+# Provider configuration
+STT_MODEL = "nova-3"
+LLM_MODEL = "gpt-4o-mini"  # More capable model for better conversation context
+LLM_TEMPERATURE = 0.7  # Slightly creative but not too random
+TTS_MODEL = "sonic-2"
+TTS_VOICE = "93c78f8b-0e6c-4ca6-addd-10ad39d0aa6d"  # Customer service voice
+
+_plugins: Dict[str, ModuleType] = {}
+_vads: Dict[str, object] = {}
+
+
+def load_plugin(name: str) -> ModuleType:
+    """
+    Import a provider plugin on first use.
+
+    LiveKit plugins register themselves on import and must be imported on the main
+    thread; entrypoint and prewarm both run there in the job process.
+    """
+    module = _plugins.get(name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(PLUGIN_MODULES[name])
+        _plugins[name] = module
+        logger.info("Loaded plugin %s in %.0fms", name, (time.perf_counter() - started) * 1000)
+    return module
+
+
+def plugins_for_profile(profile: MediaProfile) -> list[str]:
+    """Names of the plugins a call with this media profile needs."""
+    names = ["deepgram", "openai", "cartesia", "silero"]
+    if profile.noise_cancellation:
+        names.append("noise_cancellation")
+    return names
+
+
+def load_plugins(profile: MediaProfile):
+    """Import every plugin the media profile needs."""
+    for name in plugins_for_profile(profile):
+        load_plugin(name)
+
+
+def build_stt(profile: MediaProfile):
+    return load_plugin("deepgram").STT(
+        model=STT_MODEL,
+        language="en",
+        # Interim results give faster feedback at the cost of more events per turn
+        interim_results=profile.interim_results,
+        sample_rate=profile.stt_sample_rate,
+    )
+
+
+def build_llm():
+    return load_plugin("openai").LLM(
+        model=LLM_MODEL,
+        temperature=LLM_TEMPERATURE,
+    )
+
+
+def build_tts():
+    return load_plugin("cartesia").TTS(
+        model=TTS_MODEL,
+        voice=TTS_VOICE,
+    )
+
+
+def build_vad(profile: MediaProfile):
+    """Load the Silero VAD for a profile once per process; the model load is the slow part."""
+    vad = _vads.get(profile.name)
+    if vad is None:
+        vad = load_plugin("silero").VAD.load(
+            # Optimize VAD for telephone audio quality
+            min_speech_duration=profile.vad_min_speech_duration,
+            min_silence_duration=profile.vad_min_silence_duration,
+            activation_threshold=profile.vad_activation_threshold,
+            sample_rate=profile.vad_sample_rate,
+        )
+        _vads[profile.name] = vad
+    return vad
+
+
+def build_noise_cancellation(profile: MediaProfile):
+    """Noise cancellation options for the profile, or None when disabled."""
+    if not profile.noise_cancellation:
+        return None
+    return getattr(load_plugin("noise_cancellation"), profile.noise_cancellation)()
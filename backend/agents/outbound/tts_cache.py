@@ -0,0 +1,265 @@
+import os
+import time
+import wave
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+
+from livekit import rtc
+
+logger = logging.getLogger("outbound-clinical-trial-agent")
+
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", str(Path(__file__).parent / ".tts_cache")))
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "64"))
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "512"))
+
+# Cached audio is played back in 100ms frames
+PLAYBACK_FRAME_MS = 100
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace; casing and punctuation are kept since they change prosody."""
+    return " ".join(text.split())
+
+
+class CachedAudio:
+    """PCM16 audio for one synthesized utterance."""
+
+    def __init__(self, pcm: bytes, sample_rate: int, num_channels: int):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+
+    def frames(self) -> list[rtc.AudioFrame]:
+        samples_per_frame = self.sample_rate * PLAYBACK_FRAME_MS // 1000
+        frame_bytes = samples_per_frame * self.num_channels * 2
+        return [
+            rtc.AudioFrame(
+                self.pcm[i:i + frame_bytes],
+                self.sample_rate,
+                self.num_channels,
+                len(self.pcm[i:i + frame_bytes]) // (self.num_channels * 2),
+            )
+            for i in range(0, len(self.pcm), frame_bytes)
+        ]
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech, in memory and on disk.
+
+    Keys are sha256(model, voice, normalized text). Memory is an LRU bounded by
+    TTS_CACHE_MEMORY_MB; the disk directory (shared by all job processes on the host)
+    is trimmed oldest-first to TTS_CACHE_DISK_MB. Each process counts the directory
+    once and then adds its own writes, rescanning only when that count goes over the
+    limit, so the bound is approximate while several processes are writing.
+
+    Only fixed, non-personal text belongs here: anything naming the callee is
+    synthesized with live() and never stored.
+    """
+
+    def __init__(self, model: str, voice: str):
+        self.model = model
+        self.voice = voice
+        self.cache_dir = TTS_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_memory_bytes = int(TTS_CACHE_MEMORY_MB * 1024 * 1024)
+        self.max_disk_bytes = int(TTS_CACHE_DISK_MB * 1024 * 1024)
+
+        self.memory: OrderedDict[str, CachedAudio] = OrderedDict()
+        self.memory_bytes = 0
+        # Bytes of WAV files in cache_dir, counted on the first write
+        self.disk_bytes: int | None = None
+
+        self.hits = 0
+        self.misses = 0
+        self.first_audio_times: Dict[str, list[float]] = {"hit": [], "miss": []}
+
+    def key(self, text: str) -> str:
+        content = f"{self.model}\0{self.voice}\0{normalize_text(text)}"
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _remember(self, key: str, audio: CachedAudio):
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key).pcm)
+        self.memory[key] = audio
+        self.memory_bytes += len(audio.pcm)
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted.pcm)
+
+    def _read_disk(self, key: str) -> CachedAudio | None:
+        path = self.cache_dir / f"{key}.wav"
+        try:
+            with wave.open(str(path), "rb") as wav:
+                audio = CachedAudio(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getnchannels())
+            path.touch()  # keep recently used files from being trimmed
+            return audio
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Discarding unreadable TTS cache file %s: %s", path.name, e)
+            path.unlink(missing_ok=True)
+            return None
+
+    def _write_disk(self, key: str, audio: CachedAudio):
+        if self.disk_bytes is None:
+            self.disk_bytes = sum(size for _, _, size in self._scan_disk())
+
+        path = self.cache_dir / f"{key}.wav"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with wave.open(str(tmp_path), "wb") as wav:
+            wav.setnchannels(audio.num_channels)
+            wav.setsampwidth(2)
+            wav.setframerate(audio.sample_rate)
+            wav.writeframes(audio.pcm)
+        written = tmp_path.stat().st_size
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        tmp_path.replace(path)
+
+        self.disk_bytes += written - replaced
+        if self.disk_bytes > self.max_disk_bytes:
+            self._trim_disk()
+
+    def _scan_disk(self) -> list[tuple[float, Path, int]]:
+        """(mtime, path, size) of every cached WAV file, oldest first."""
+        files = []
+        for path in self.cache_dir.glob("*.wav"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # trimmed by another process
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+        return sorted(files)
+
+    def _trim_disk(self):
+        """Delete the oldest files until the directory fits in max_disk_bytes."""
+        files = self._scan_disk()
+        total = sum(size for _, _, size in files)
+        for _, old, size in files:
+            if total <= self.max_disk_bytes:
+                break
+            old.unlink(missing_ok=True)
+            total -= size
+        self.disk_bytes = total
+
+    async def lookup(self, text: str) -> CachedAudio | None:
+        """Return cached audio for text from memory, then disk."""
+        key = self.key(text)
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory.move_to_end(key)
+            return audio
+
+        audio = await asyncio.to_thread(self._read_disk, key)
+        if audio is not None:
+            self._remember(key, audio)
+        return audio
+
+    async def store(self, text: str, audio: CachedAudio):
+        key = self.key(text)
+        self._remember(key, audio)
+        try:
+            await asyncio.to_thread(self._write_disk, key, audio)
+        except Exception as e:
+            logger.warning("Failed to write TTS cache file: %s", e)
+
+    async def audio(
+        self, tts, text: str, before_synthesis: Callable[[], Awaitable[None]] | None = None
+    ) -> AsyncIterator[rtc.AudioFrame]:
+        """
+        Yield audio frames for text: from the cache on a hit, otherwise streamed from
+        the TTS provider and stored once synthesis completes.
+
+        before_synthesis is awaited before a request goes to the provider (e.g. to take
+        a request token); cache hits skip it.
+        """
+        started = time.perf_counter()
+
+        cached = await self.lookup(text)
+        if cached is not None:
+            self.hits += 1
+            self.first_audio_times["hit"].append(time.perf_counter() - started)
+            for frame in cached.frames():
+                yield frame
+            return
+
+        self.misses += 1
+        if before_synthesis:
+            await before_synthesis()
+        chunks: list[bytes] = []
+        sample_rate = num_channels = None
+        async with tts.synthesize(normalize_text(text)) as stream:
+            async for synthesized in stream:
+                frame = synthesized.frame
+                if sample_rate is None:
+                    self.first_audio_times["miss"].append(time.perf_counter() - started)
+                    sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                chunks.append(bytes(frame.data))
+                yield frame
+
+        # Only complete syntheses are stored; an interrupted say() never reaches here
+        if chunks:
+            await self.store(text, CachedAudio(b"".join(chunks), sample_rate, num_channels))
+
+    async def live(
+        self, tts, text: str, before_synthesis: Callable[[], Awaitable[None]] | None = None
+    ) -> AsyncIterator[rtc.AudioFrame]:
+        """Yield audio frames streamed from the TTS provider, bypassing the cache entirely."""
+        if before_synthesis:
+            await before_synthesis()
+        async with tts.synthesize(normalize_text(text)) as stream:
+            async for synthesized in stream:
+                yield synthesized.frame
+
+    async def audio_for_segments(
+        self,
+        tts,
+        segments: list[str],
+        live_prefix: str | None = None,
+        before_synthesis: Callable[[], Awaitable[None]] | None = None,
+    ) -> AsyncIterator[rtc.AudioFrame]:
+        """
+        Yield audio for several segments in order, each cached independently.
+
+        live_prefix (e.g. "Hi <name>,") is spoken first and synthesized live, so
+        personal text never reaches memory or disk.
+        """
+        if live_prefix:
+            async for frame in self.live(tts, live_prefix, before_synthesis):
+                yield frame
+        for segment in segments:
+            async for frame in self.audio(tts, segment, before_synthesis):
+                yield frame
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "avg_first_audio_hit_ms": _avg_ms(self.first_audio_times["hit"]),
+            "avg_first_audio_miss_ms": _avg_ms(self.first_audio_times["miss"]),
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+def _avg_ms(samples: list[float]) -> float | None:
+    return round(sum(samples) / len(samples) * 1000, 1) if samples else None
+
+
+_tts_caches: Dict[tuple[str, str], TTSCache] = {}
+
+
+def get_tts_cache(model: str, voice: str) -> TTSCache:
+    """Return the process-wide TTS cache for a model and voice (shared across jobs run by this process)."""
+    if (model, voice) not in _tts_caches:
+        _tts_caches[(model, voice)] = TTSCache(model, voice)
+    return _tts_caches[(model, voice)]
@@ -0,0 +1,157 @@
+import os
+from collections import deque
+
+import numpy as np
+
+# Audio-level answering machine detection, run on the callee's track right after answer
+VOICEMAIL_DETECTION_ENABLED = os.getenv("VOICEMAIL_DETECTION", "1") == "1"
+# Hang up on a recorded greeting as well as on a beep. The beep comes after the whole
+# greeting, usually past MAX_ANALYSIS_MS, so on its own it catches few machines
+SPEECH_CUE_ENABLED = os.getenv("VOICEMAIL_SPEECH_CUE", "1") == "1"
+# Words run together without a pause that make a recorded greeting; people answer with
+# "Hello?" or their name (a few words) and wait for the caller
+GREETING_WORDS = int(os.getenv("VOICEMAIL_GREETING_WORDS", "5"))
+# ...lasting at least this long, so a quick "Hello? Hello?" is not taken for one
+GREETING_MIN_MS = int(os.getenv("VOICEMAIL_GREETING_MIN_MS", "1000"))
+# Silence that ends an utterance: a short utterance followed by this much silence is a person
+AFTER_GREETING_SILENCE_MS = int(os.getenv("VOICEMAIL_AFTER_GREETING_SILENCE_MS", "450"))
+# Nobody speaking for this long after answer: treat as a person waiting for us to talk
+INITIAL_SILENCE_MS = 2000
+# Give up and fall back to the LLM's detected_answering_machine tool after this long
+MAX_ANALYSIS_MS = 2500
+
+HUMAN, MACHINE, UNKNOWN = "human", "machine", "unknown"
+
+# Frame length fed to push()
+FRAME_MS = 20
+# A frame is speech when it is this far above the noise floor (and above SPEECH_MIN_DB)
+SPEECH_SNR_DB = 10.0
+SPEECH_MIN_DB = -48.0
+# Noise floor: the quietest frame in this window, so it follows a noisy line from the start
+NOISE_WINDOW_MS = 1000
+# Gaps shorter than this are between words, not a pause
+PAUSE_MS = 200
+# Gaps at least this long separate words; shorter dips are within a word
+WORD_GAP_MS = 40
+
+# Beeps: one spectral peak holding nearly all in-band energy, at a fixed frequency
+BEEP_BAND_HZ = (350.0, 2600.0)
+BEEP_PEAK_RATIO = 0.9
+BEEP_PEAK_WIDTH_HZ = 100.0  # half the Hann main lobe of a 20ms frame
+BEEP_MIN_MS = 160
+BEEP_FREQ_TOLERANCE_HZ = 20.0
+FFT_SIZE = 512
+
+
+class VoicemailDetector:
+    """
+    Classifies the first seconds after answer as a person or an answering machine.
+
+    Fed 20ms frames of 16-bit mono PCM; each frame costs one RMS and at most one FFT
+    in NumPy. Two cues mark a machine:
+    - a beep: a single steady tone holding nearly all band energy for BEEP_MIN_MS
+    - a greeting cadence: GREETING_WORDS words over at least GREETING_MIN_MS without
+      a pause, with speech_cue (VOICEMAIL_SPEECH_CUE, on by default)
+    A short utterance followed by AFTER_GREETING_SILENCE_MS of silence, or silence
+    from the start, is a person. Until one of these fires, verdict is None; after
+    MAX_ANALYSIS_MS it is UNKNOWN and the call proceeds as before.
+    """
+
+    def __init__(self, sample_rate: int = 8000, speech_cue: bool = SPEECH_CUE_ENABLED):
+        self.sample_rate = sample_rate
+        self.speech_cue = speech_cue
+        self.window = None
+        self.freqs = np.fft.rfftfreq(FFT_SIZE, 1 / sample_rate)
+        self.band = (self.freqs >= BEEP_BAND_HZ[0]) & (self.freqs <= BEEP_BAND_HZ[1])
+        self.peak_bins = int(BEEP_PEAK_WIDTH_HZ / (sample_rate / FFT_SIZE))
+
+        self.elapsed_ms = 0
+        self.levels: deque[float] = deque(maxlen=NOISE_WINDOW_MS // FRAME_MS)
+        self.heard_speech = False
+        self.utterance_ms = 0  # from the first word of the current utterance, gaps included
+        self.words = 0  # in the current utterance
+        self.silence_ms = 0
+        self.tone_ms = 0
+        self.tone_hz = 0.0
+
+        self.verdict: str | None = None
+        self.reason: str | None = None
+        self.decided_at_ms: int | None = None
+
+    def _decide(self, verdict: str, reason: str) -> str:
+        self.verdict, self.reason, self.decided_at_ms = verdict, reason, self.elapsed_ms
+        return verdict
+
+    def _tone(self, x: np.ndarray) -> float | None:
+        """Frequency of a dominant pure tone in this frame, or None."""
+        if self.window is None or len(self.window) != len(x):
+            self.window = np.hanning(len(x)).astype(np.float32)
+        power = np.abs(np.fft.rfft(x * self.window, FFT_SIZE)) ** 2
+        in_band = power[self.band]
+        total = in_band.sum()
+        if total <= 0:
+            return None
+        peak = int(in_band.argmax())
+        if in_band[max(0, peak - self.peak_bins):peak + self.peak_bins + 1].sum() / total < BEEP_PEAK_RATIO:
+            return None
+        return float(self.freqs[self.band][peak])
+
+    def push(self, pcm: bytes | np.ndarray) -> str | None:
+        """
+        Analyze one frame of audio.
+
+        Args:
+            pcm: 16-bit mono samples at sample_rate (any frame length; 20ms expected)
+
+        Returns:
+            HUMAN, MACHINE or UNKNOWN once decided, otherwise None
+        """
+        if self.verdict is not None:
+            return self.verdict
+
+        samples = np.frombuffer(pcm, dtype=np.int16) if isinstance(pcm, (bytes, memoryview)) else pcm
+        x = samples.astype(np.float32) / 32768.0
+        frame_ms = round(len(x) * 1000 / self.sample_rate)
+        self.elapsed_ms += frame_ms
+
+        level_db = 10 * np.log10(float(np.dot(x, x)) / max(len(x), 1) + 1e-12)
+        # The first frame only seeds the noise floor
+        speech = bool(self.levels) and level_db > max(min(self.levels) + SPEECH_SNR_DB, SPEECH_MIN_DB)
+        self.levels.append(level_db)
+
+        # Beep: the same tone for BEEP_MIN_MS; speech harmonics glide with the pitch
+        tone = self._tone(x) if speech else None
+        if tone is not None and self.tone_ms and abs(tone - self.tone_hz) <= BEEP_FREQ_TOLERANCE_HZ:
+            self.tone_ms += frame_ms
+            if self.tone_ms >= BEEP_MIN_MS:
+                return self._decide(MACHINE, f"beep at {self.tone_hz:.0f}Hz")
+        else:
+            self.tone_ms = frame_ms if tone is not None else 0
+            self.tone_hz = tone or 0.0
+
+        if speech:
+            if not self.heard_speech or self.silence_ms >= PAUSE_MS:
+                # A new utterance starts after a pause
+                self.utterance_ms = 0
+                self.words = 1
+            else:
+                self.utterance_ms += self.silence_ms
+                if self.silence_ms >= WORD_GAP_MS:
+                    self.words += 1
+            self.heard_speech = True
+            self.utterance_ms += frame_ms
+            self.silence_ms = 0
+
+            if self.speech_cue and self.words >= GREETING_WORDS and self.utterance_ms >= GREETING_MIN_MS:
+                return self._decide(MACHINE, f"{self.words} words in {self.utterance_ms}ms without a pause")
+        else:
+            self.silence_ms += frame_ms
+
+            if self.heard_speech and self.silence_ms >= AFTER_GREETING_SILENCE_MS:
+                return self._decide(HUMAN, f"{self.utterance_ms}ms greeting then silence")
+            if not self.heard_speech and self.elapsed_ms >= INITIAL_SILENCE_MS:
+                return self._decide(HUMAN, "silent after answer")
+
+        if self.elapsed_ms >= MAX_ANALYSIS_MS:
+            return self._decide(UNKNOWN, "no decision")
+        return None
@@ -1,8 +1,32 @@
+import time
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 
-from models import LaunchCallRequest, LaunchCallResponse
-from services.livekit_service import LiveKitService
+from models import (
+    LaunchCallRequest,
+    LaunchCallResponse,
+    StatsResponse,
+    StatsReconcileResponse,
+    WorkerHeartbeat,
+    CapacityReport,
+    QuotaReport,
+    SearchResponse,
+    TrunkPoolReport,
+    CallRecord,
+    CallListResponse,
+)
+from services.supabase_service import get_supabase_service
+from services.stats_service import get_stats_service
+from services.patient_cache import etag_matches, get_patient_cache
+from services.capacity_service import get_capacity_service
+from services.call_ledger import get_call_ledger
+from services.rate_limiter import get_rate_limiter
+from services.export_service import EXPORT_FORMATS, ExportQuery, check_format, stream_export
+from services.search_service import get_search_index
+from services.trunk_pool import get_trunk_pool
 
 logger = logging.getLogger(__name__)
 
@@ -15,9 +39,10 @@ async def launch_call(request: LaunchCallRequest):
     Launch an outbound call to a clinical trial participant.
 
     This endpoint:
-    1. Creates a LiveKit room
-    2. Dispatches the clinical trial agent with participant data
-    3. The agent will make an outbound SIP call to the participant
+    1. Leases a SIP trunk and caller ID from the pool (unless sip_trunk_id is given)
+    2. Creates a LiveKit room
+    3. Dispatches the clinical trial agent with participant data
+    4. The agent will make an outbound SIP call to the participant
 
     Args:
         request: LaunchCallRequest containing participant information
@@ -25,26 +50,82 @@ async def launch_call(request: LaunchCallRequest):
     Returns:
         LaunchCallResponse with room name and job ID
     """
+    # Pick a trunk and caller ID; an explicit sip_trunk_id bypasses the pool
+    trunk_pool = get_trunk_pool()
+    lease = None
+    if trunk_pool.trunks and not request.sip_trunk_id:
+        lease = await asyncio.to_thread(trunk_pool.acquire, caller_id=request.caller_id)
+        if lease is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="No SIP trunk available: every trunk is at capacity or out of rotation",
+            )
+
     try:
-        logger.info(f"Launching call to {request.participant_name} at {request.phone_number}")
+        logger.info("Launching call to patient %s (campaign %s)", request.patient_id or "-", request.campaign_id or "-")
 
-        # Initialize LiveKit service
-        livekit_service = LiveKitService()
+        # Imported on first use so API replicas start without loading the LiveKit SDK
+        from services.livekit_service import LiveKitService
 
-        # Launch the outbound call
-        room_name, job_id = await livekit_service.launch_outbound_call(
-            participant_name=request.participant_name,
-            participant_context=request.participant_context,
-            phone_number=request.phone_number,
-            trial_name=request.trial_name,
-            trial_description=request.trial_description,
-            compensation_info=request.compensation_info,
-            contact_info=request.contact_info,
-            sip_trunk_id=request.sip_trunk_id,
-            caller_id=request.caller_id,
-        )
+        # Record the call before dispatching it, so the worker's first ledger update
+        # can't arrive before the row exists
+        room_name = LiveKitService.new_room_name()
+        try:
+            await asyncio.to_thread(
+                get_call_ledger().record_dispatch,
+                room_name=room_name,
+                phone_number=request.phone_number,
+                participant_name=request.participant_name,
+                patient_id=request.patient_id,
+                campaign_id=request.campaign_id,
+                media_profile=request.media_profile,
+            )
+        except Exception as e:
+            logger.error("Failed to record call for room %s in ledger: %s", room_name, e)
+
+        try:
+            # Initialize LiveKit service
+            livekit_service = LiveKitService()
+
+            # Launch the outbound call
+            room_name, job_id = await livekit_service.launch_outbound_call(
+                participant_name=request.participant_name,
+                participant_context=request.participant_context,
+                phone_number=request.phone_number,
+                trial_name=request.trial_name,
+                trial_description=request.trial_description,
+                compensation_info=request.compensation_info,
+                contact_info=request.contact_info,
+                trial_duration=request.trial_duration,
+                canned_answers=request.canned_answers,
+                sip_trunk_id=lease["trunk_id"] if lease else request.sip_trunk_id,
+                caller_id=lease["caller_id"] if lease else request.caller_id,
+                sip_lease_id=lease["lease_id"] if lease else None,
+                media_profile=request.media_profile,
+                patient_id=request.patient_id,
+                campaign_id=request.campaign_id,
+                profile=request.profile,
+                room_name=room_name,
+            )
+        except Exception as e:
+            # The job never reached a worker, so nothing else will release the lease
+            if lease:
+                await asyncio.to_thread(trunk_pool.release, lease["lease_id"])
+            try:
+                await asyncio.to_thread(
+                    get_call_ledger().update_call, room_name, status="failed", error=f"Dispatch failed: {e}"
+                )
+            except Exception as ledger_error:
+                logger.error("Failed to record dispatch failure for room %s in ledger: %s", room_name, ledger_error)
+            raise
 
-        logger.info(f"Call launched successfully to room {room_name} with job {job_id}")
+        logger.info("Call launched successfully to room %s with job %s", room_name, job_id)
+
+        # Key the ledger row by job ID so the call's progress can be queried with it
+        try:
+            await asyncio.to_thread(get_call_ledger().set_job_id, room_name, job_id)
+        except Exception as e:
+            logger.error("Failed to record job %s in ledger: %s", job_id, e)
 
         return LaunchCallResponse(
             success=True,
@@ -54,20 +135,298 @@ async def launch_call(request: LaunchCallRequest):
         )
 
     except ValueError as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Configuration error: {str(e)}",
         )
 
     except Exception as e:
-        logger.error(f"Failed to launch call: {e}")
+        logger.error("Failed to launch call: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to launch call: {str(e)}",
         )
 
 
+@router.get("/stats", response_model=StatsResponse)
+async def get_stats():
+    """
+    Dashboard aggregates: patient counts per study type, status and eligibility label.
+
+    Served from in-memory counters maintained from row changes, so response time
+    does not depend on the number of patients.
+    """
+    stats_service = get_stats_service()
+    if not stats_service.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Dashboard stats are not ready yet",
+        )
+    return stats_service.snapshot()
+
+
+@router.post("/stats/reconcile", response_model=StatsReconcileResponse)
+async def reconcile_stats():
+    """
+    Reconcile the dashboard counters against a full scan of the patient table.
+
+    Any drift found is reported and the counters are replaced with the scan result.
+    """
+    try:
+        return await get_stats_service().reconcile(get_supabase_service())
+
+    except ValueError as e:
+        logger.error("Configuration error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Configuration error: {str(e)}",
+        )
+
+    except Exception as e:
+        logger.error("Failed to reconcile stats: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to reconcile stats: {str(e)}",
+        )
+
+
+@router.get("/cache/patients")
+async def get_patient_cache_metrics():
+    """Hit/miss metrics for the patient read-through cache."""
+    return get_patient_cache().metrics()
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_patients(q: str, limit: int = Query(20, ge=1, le=1000)):
+    """
+    Search patients by name, email or phone (any format).
+
+    Served from an in-memory trigram index maintained from row changes, so it
+    does not scan CrobotMaster.
+
+    Args:
+        q: Search text, at least 2 characters
+        limit: Maximum number of results
+    """
+    index = get_search_index()
+    if not index.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Patient search index is not ready yet",
+        )
+    started = time.perf_counter()
+    results, truncated = index.search(q, limit)
+    return {
+        "query": q,
+        "results": results,
+        "truncated": truncated,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+@router.get("/search/metrics")
+async def get_search_metrics():
+    """Size and query latency of the patient search index."""
+    return get_search_index().metrics()
+
+
+@router.get("/patients/{patient_id}")
+async def get_patient(patient_id: str, if_none_match: str | None = Header(None)):
+    """
+    Retrieve a patient record through the read-through cache.
+
+    Responses carry an ETag; a request whose If-None-Match matches the current
+    record gets 304 Not Modified with no body.
+    """
+    try:
+        found = await get_supabase_service().get_patient(patient_id)
+
+    except ValueError as e:
+        logger.error("Configuration error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Configuration error: {str(e)}",
+        )
+
+    except Exception as e:
+        logger.error("Failed to retrieve patient %s: %s", patient_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve patient: {str(e)}",
+        )
+
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Patient {patient_id} not found",
+        )
+
+    record, etag = found
+    # no-cache: browsers may store the record but must revalidate with If-None-Match
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(if_none_match, etag):
+        get_patient_cache().record_not_modified()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return JSONResponse(content=jsonable_encoder(record), headers=headers)
+
+
+@router.post("/capacity/heartbeat", status_code=status.HTTP_204_NO_CONTENT)
+async def capacity_heartbeat(heartbeat: WorkerHeartbeat):
+    """Receive a capacity snapshot from an agent worker."""
+    get_capacity_service().record(heartbeat.model_dump())
+
+
+@router.get("/capacity", response_model=CapacityReport)
+async def get_capacity(batch_size: int | None = None):
+    """
+    Report fleet capacity from recent worker heartbeats.
+
+    Args:
+        batch_size: Optional size of the next campaign batch to check against
+    """
+    return get_capacity_service().report(batch_size)
+
+
+@router.get("/quotas", response_model=QuotaReport)
+async def get_quotas():
+    """Report STT, LLM and TTS quota use shared by the agent workers on this host."""
+    limiter = get_rate_limiter()
+    usage = await asyncio.to_thread(limiter.usage)
+    return {"providers": usage, "accepting_calls": limiter.has_call_capacity(usage=usage)}
+
+
+@router.get("/trunks", response_model=TrunkPoolReport)
+async def get_trunks():
+    """Report load, health and circuit breaker state of the SIP trunk pool."""
+    return {"trunks": await asyncio.to_thread(get_trunk_pool().usage)}
+
+
+@router.get("/export")
+async def export_patients(
+    export_format: str = Query("csv", alias="format"),
+    columns: str | None = None,
+    patient_status: str | None = Query(None, alias="status"),
+    eligibility_label: str | None = None,
+    study_type: str | None = None,
+    call_outcome: str | None = None,
+    batch_size: int = Query(1000, ge=100, le=10000),
+):
+    """
+    Stream patients joined with their latest call outcome.
+
+    Rows are fetched from Supabase in keyset-paginated batches and encoded batch by
+    batch, so memory stays flat however many rows are exported.
+
+    Args:
+        format: csv, ndjson, arrow (IPC stream) or parquet
+        columns: Comma-separated patient and call columns (e.g. patient_id,status,last_call_outcome)
+        status: Filter by patient status
+        eligibility_label: Filter by eligibility label
+        study_type: Filter by study type (as in /stats)
+        call_outcome: Filter by the outcome of the patient's latest call
+        batch_size: Rows fetched per upstream request
+    """
+    try:
+        check_format(export_format)
+        query = ExportQuery(
+            columns=columns,
+            filters={"status": patient_status, "eligibility_label": eligibility_label},
+            study_type=study_type,
+            call_outcome=call_outcome,
+            batch_size=batch_size,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    try:
+        supabase_service = get_supabase_service()
+        table_columns = await asyncio.to_thread(supabase_service.patient_columns)
+
+    except ValueError as e:
+        logger.error("Configuration error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Configuration error: {str(e)}",
+        )
+
+    # Checked before the response starts, so a bad column can't fail a 200 mid-stream
+    try:
+        query.resolve_columns(table_columns)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        stream_export(supabase_service, get_call_ledger(), query, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="patients.{extension}"'},
+    )
+
+
+@router.get("/calls", response_model=CallListResponse)
+async def list_calls(
+    patient_id: str | None = None,
+    phone_number: str | None = None,
+    campaign_id: str | None = None,
+    call_status: str | None = Query(None, alias="status"),
+    since: str | None = None,
+    until: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+):
+    """
+    List calls from the call ledger, newest first.
+
+    Args:
+        patient_id: Filter by patient
+        phone_number: Filter by phone number (any format)
+        campaign_id: Filter by campaign
+        status: Filter by call status
+        since: Only calls dispatched at or after this ISO timestamp
+        until: Only calls dispatched before this ISO timestamp
+        limit: Page size
+        cursor: next_cursor from the previous page
+    """
+    try:
+        calls, next_cursor = await asyncio.to_thread(
+            get_call_ledger().list_calls,
+            filters={
+                "patient_id": patient_id,
+                "phone_number": phone_number,
+                "campaign_id": campaign_id,
+                "status": call_status,
+            },
+            since=since,
+            until=until,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"calls": calls, "next_cursor": next_cursor}
+
+
+@router.get("/calls/{job_id}", response_model=CallRecord)
+async def get_call(job_id: str):
+    """Return the ledger entry for a call launched by launch-call."""
+    call = await asyncio.to_thread(get_call_ledger().get_call, job_id)
+    if call is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Call {job_id} not found",
+        )
+    return call
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -0,0 +1,133 @@
+"""
+Cold-start benchmark for the agent worker and the API.
+
+Each measurement runs in a fresh interpreter and reports the median of --runs:
+- api_import:   import main (FastAPI app and routes)
+- api_ready:    spawn uvicorn until GET /api/health answers
+- agent_import: import outbound_agent (plugins are loaded lazily, so none are imported)
+- agent_ready:  import outbound_agent and run prewarm() for the default media profile
+
+Exits non-zero when a median exceeds its budget, so startup regressions fail the check.
+Supabase credentials are blanked in the child processes so the API measures startup,
+not the initial stats scan.
+
+Usage:
+    uv run python benchmarks/cold_start.py [--runs 5] [--budget api_ready=3000 ...]
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+AGENT_DIR = BACKEND_DIR / "agents" / "outbound"
+
+# Default budgets in milliseconds
+BUDGETS_MS = {
+    "api_import": 1500,
+    "api_ready": 4000,
+    "agent_import": 3000,
+    "agent_ready": 8000,
+}
+
+TIMED_SNIPPET = """
+import sys, time
+started = time.perf_counter()
+{code}
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    env["SUPABASE_URL"] = ""
+    env["SUPABASE_SK"] = ""
+    return env
+
+
+def run_timed(code: str, cwd: Path) -> float:
+    """Run code in a fresh interpreter and return the milliseconds it reports."""
+    result = subprocess.run(
+        [sys.executable, "-c", TIMED_SNIPPET.format(code=code)],
+        cwd=cwd,
+        env=child_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_api_ready(timeout: float = 30.0) -> float:
+    """Milliseconds from spawning uvicorn to the first successful health check."""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=child_env(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1):
+                    return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"API did not become ready within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+MEASUREMENTS = {
+    "api_import": lambda: run_timed("import main", BACKEND_DIR),
+    "api_ready": measure_api_ready,
+    "agent_import": lambda: run_timed("import outbound_agent", AGENT_DIR),
+    "agent_ready": lambda: run_timed("import outbound_agent\noutbound_agent.prewarm(None)", AGENT_DIR),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=list(MEASUREMENTS), default=list(MEASUREMENTS))
+    parser.add_argument("--budget", action="append", default=[], metavar="NAME=MS", help="Override a budget")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    for override in args.budget:
+        name, ms = override.split("=")
+        budgets[name] = float(ms)
+
+    failed = []
+    print(f"{'measurement':<14}{'median ms':>12}{'max ms':>10}{'budget':>10}")
+    for name in args.only:
+        samples = [MEASUREMENTS[name]() for _ in range(args.runs)]
+        median = statistics.median(samples)
+        status = "" if median <= budgets[name] else "  OVER BUDGET"
+        print(f"{name:<14}{median:>12.0f}{max(samples):>10.0f}{budgets[name]:>10.0f}{status}")
+        if status:
+            failed.append(name)
+
+    if failed:
+        print(f"Startup regression: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Throughput and peak-memory benchmark for the streaming patient export.
+
+Runs the /api/export pipeline (fetch -> study type filter -> call ledger join ->
+projection -> encoder) over a synthetic patient source that pages like
+SupabaseService.iter_patient_batches, joined against a real call ledger with one
+call for every --call-ratio of patients. Each format/size runs in a fresh process, so
+peak RSS is that export's alone; with a constant-memory pipeline it should be the
+same for 100k and 1M rows.
+
+Parquet and Arrow need pyarrow; they are skipped when it is not installed.
+
+Usage:
+    uv run python benchmarks/export.py [--rows 100000 1000000] [--formats csv ndjson arrow parquet]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+STUDY_DISEASES = ["oncology - breast cancer", "eczema", "obesity", "stroke recovery", "asthma"]
+STATUSES = ["not_contacted", "contacted", "interested", "not_interested"]
+
+
+class SyntheticPatients:
+    """Generates CrobotMaster-shaped rows in patient_id order, one batch at a time."""
+
+    def __init__(self, total: int):
+        self.total = total
+
+    def iter_patient_batches(self, columns: str = "*", batch_size: int = 1000, filters=None):
+        rng = random.Random(7)
+        for start in range(0, self.total, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, self.total)):
+                row = {
+                    "patient_id": f"p{i:08d}",
+                    "name": f"Patient {i}",
+                    "phone": f"+1555{i % 10_000_000:07d}",
+                    "email": f"patient{i}@example.com",
+                    "qualified_disease": rng.choice(STUDY_DISEASES),
+                    "status": rng.choice(STATUSES),
+                    "eligibility_label": rng.choice(["eligible", "ineligible", "review"]),
+                    "age": 18 + i % 70,
+                }
+                if all(row.get(k) == v for k, v in (filters or {}).items()):
+                    batch.append(row if columns == "*" else {c: row.get(c) for c in columns.split(",")})
+            yield batch
+
+
+def build_ledger(path: str, rows: int, call_ratio: int):
+    from services.call_ledger import CallLedger
+
+    ledger = CallLedger(path)
+    with ledger.conn:
+        ledger.conn.executemany(
+            """
+            INSERT INTO calls (job_id, room_name, patient_id, phone_number, status, outcome,
+                               created_at, duration_seconds, updated_at)
+            VALUES (?, ?, ?, '+15550000000', 'ended', ?, ?, ?, ?)
+            """,
+            (
+                (f"job-{i}", f"room-{i}", f"p{i:08d}", random.choice(["completed", "voicemail", "hung_up"]),
+                 f"2026-01-01T00:00:{i % 60:02d}", 42.0, "2026-01-01T00:00:00")
+                for i in range(0, rows, call_ratio)
+            ),
+        )
+    return ledger
+
+
+def run_one(export_format: str, rows: int, call_ratio: int, columns: str | None) -> dict:
+    """Run one export in this process and report its throughput and peak RSS."""
+    from services.export_service import ExportQuery, stream_export
+
+    ledger = build_ledger(os.path.join(tempfile.mkdtemp(), "ledger.db"), rows, call_ratio)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    query = ExportQuery(columns=columns)
+    started = time.perf_counter()
+    size = chunks = 0
+    for chunk in stream_export(SyntheticPatients(rows), ledger, query, export_format):
+        size += len(chunk)
+        chunks += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        "format": export_format,
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_s": round(rows / elapsed),
+        "mb_per_s": round(size / elapsed / 1e6, 1),
+        "output_mb": round(size / 1e6, 1),
+        "chunks": chunks,
+        "baseline_rss_mb": round(baseline_kb / 1024, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--formats", nargs="+", default=["csv", "ndjson", "arrow", "parquet"])
+    parser.add_argument("--call-ratio", type=int, default=3, help="One ledger call per N patients")
+    parser.add_argument("--columns", default=None, help="Column projection (default: all)")
+    parser.add_argument("--child", nargs=2, metavar=("FORMAT", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.child[0], int(args.child[1]), args.call_ratio, args.columns)))
+        return
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        args.formats = [f for f in args.formats if f not in ("arrow", "parquet")]
+        print("pyarrow not installed; skipping arrow and parquet")
+
+    print(f"{'format':<9}{'rows':>10}{'rows/s':>10}{'MB/s':>8}{'out MB':>9}{'base RSS':>10}{'peak RSS':>10}")
+    for export_format in args.formats:
+        for rows in args.rows:
+            command = [sys.executable, __file__, "--child", export_format, str(rows), "--call-ratio", str(args.call_ratio)]
+            if args.columns:
+                command += ["--columns", args.columns]
+            result = json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout.splitlines()[-1])
+            print(
+                f"{result['format']:<9}{result['rows']:>10}{result['rows_per_s']:>10}{result['mb_per_s']:>8}"
+                f"{result['output_mb']:>9}{result['baseline_rss_mb']:>10}{result['peak_rss_mb']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Event-loop time spent logging per call, before and after the queued structured logging.
+
+Replays the log statements of one outbound call (entrypoint plus dispatch_agent) for
+--calls concurrent calls on one event loop, timing only the logging statements:
+- before: the eager f-string statements, including the trial_data dump, straight into
+  the root handlers
+- after:  the lazy %-style statements behind configure_logging(): the caller snapshots
+  the call context and enqueues; rendering, redaction and the handlers run on the
+  listener thread
+
+Two downstream handlers are measured:
+- ipc:    what a job process has: livekit's LogQueueHandler formats, copies and pickles
+          each record on the caller's thread and sends it to the worker over a socket.
+          The job root logger is at NOTSET, so library DEBUG records (--library-debug
+          per call) take the same path until they are filtered in the worker.
+- stream: what the API process had from logging.basicConfig: a StreamHandler on stderr
+          (here a file), written synchronously.
+
+--sink-delay-ms makes every write stall, as when stdout is a full pipe or a slow log
+shipper (for ipc the write is already on livekit's sender thread).
+
+Usage:
+    uv run python benchmarks/logging_overhead.py [--calls 200] [--library-debug 100] [--sink-delay-ms 0]
+"""
+
+import sys
+import copy
+import time
+import json
+import queue
+import pickle
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+import statistics
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services import structured_logging
+from services.structured_logging import bind_call_context, configure_logging, flush_logs
+
+logger = logging.getLogger("outbound-clinical-trial-agent")
+library_logger = logging.getLogger("livekit.agents")
+
+
+class IPCForwardHandler(logging.Handler):
+    """Like livekit.agents.ipc.LogQueueHandler: format, copy and pickle here, send from a thread."""
+
+    def __init__(self, sink_delay: float):
+        super().__init__()
+        self.sink_delay = sink_delay
+        self.send_queue = queue.SimpleQueue()
+        self.sender, self.receiver = socket.socketpair()
+        threading.Thread(target=self._forward, daemon=True).start()
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _forward(self):
+        while True:
+            data = self.send_queue.get()
+            if self.sink_delay:
+                time.sleep(self.sink_delay)
+            self.sender.sendall(data)
+
+    def _drain(self):
+        while self.receiver.recv(1 << 16):
+            pass
+
+    def emit(self, record: logging.LogRecord):
+        msg = self.format(record)
+        record = copy.copy(record)
+        record.message, record.msg, record.args = msg, msg, None
+        record.exc_info = record.exc_text = record.stack_info = None
+        self.send_queue.put_nowait(pickle.dumps(record))
+
+
+class SlowStreamHandler(logging.StreamHandler):
+    def __init__(self, stream, sink_delay: float):
+        super().__init__(stream)
+        self.sink_delay = sink_delay
+
+    def emit(self, record: logging.LogRecord):
+        if self.sink_delay:
+            time.sleep(self.sink_delay)
+        super().emit(record)
+
+
+def trial_data(i: int) -> dict:
+    return {
+        "participant_name": f"Patient {i}",
+        "phone_number": f"+1555{i:07d}",
+        "trial_name": "Chronic Kidney Disease & Oncology",
+        "trial_description": "A 12 week study of a new treatment for CKD stage 3 " * 3,
+        "eligibility_criteria": "Patient with chronic kidney disease stage 3, eGFR 30-59, age 40-75",
+        "compensation_info": "$500",
+        "contact_info": "research@example.org",
+        "additional_context": "Patient with chronic kidney disease stage 3, eGFR 30-59, age 40-75",
+        "patient_id": f"P{i}",
+        "campaign_id": "ckd-fall",
+    }
+
+
+def old_call_logs(i: int, data: dict):
+    """The statements one call logged before, in order (as f-strings, evaluated eagerly)."""
+    room, trunk, phone = f"outbound-call-{i:012x}", "ST_primary", data["phone_number"]
+    yield lambda: logger.info(f"Dispatched agent to room {room} with job ID: AJ_{i}")
+    yield lambda: logger.info(f"Trial data: {data}")
+    yield lambda: logger.info(f"connecting to room {room}")
+    yield lambda: logger.info(f"Extracted trial data from job metadata: {data}")
+    yield lambda: logger.info(f"📱 Using caller ID: +15550001001")
+    yield lambda: logger.info("📞 Using clinical trial recruitment agent")
+    yield lambda: logger.info(f"🎚️ Using media profile: full")
+    for line in (
+        "🔥 OUTBOUND CALL DEBUG - Starting call process", f"📞 Target: {phone}", f"🏢 Trunk ID: {trunk}",
+        f"🏠 Room: {room}", f"👤 Participant Identity: {phone}", "🔗 LiveKit URL: wss://example.livekit.cloud",
+        "🛠️ SIP Request Details:", f"   room_name: {room}", f"   sip_trunk_id: {trunk}",
+        f"   sip_call_to: {phone}", "   sip_number: +15550001001", f"   participant_identity: {phone}",
+        "   participant_name: Clinical Trial Recruitment Agent", "   wait_until_answered: True",
+        "🚀 Creating SIP participant - initiating call...", "⏱️ Waiting for SIP participant creation (60s timeout)...",
+        "✅ SIP participant created successfully!", "🎉 Participant answered! Call connected.",
+        "📊 SIP Participant Details:", f"   Identity: {phone}", f"   SIP Call ID: SCL_{i:08x}",
+    ):
+        yield lambda line=line: logger.info(line)
+    yield lambda: logger.info(f"Participant answered! Joined: {phone}")
+    yield lambda: logger.info(f"🎙️ Starting conversation with greeting: 'Hi {data['participant_name']}, this is Jocelyn...'")
+    for turn in range(6):
+        yield lambda: logger.info(f"⚡ Fast-path answer for 'compensation': 'how much does it pay'")
+        yield lambda: logger.debug(f"Non-substantial response: 'yeah' - waiting for more context")
+    yield lambda: logger.info(f"⚡ Fast-path stats for room {room}: {{'hits': 3, 'misses': 3, 'ttft_p50': 0.42}}")
+    yield lambda: logger.info(f"🔊 TTS cache stats: {{'hits': 5, 'misses': 2, 'bytes': 183040}}")
+    yield lambda: logger.info(f"🧠 Context window stats: {{'turns': 12, 'trimmed': 2, 'tokens': 2210}}")
+
+
+def new_call_logs(i: int, data: dict):
+    """The same call's statements after the change: lazy arguments, one record per event."""
+    room, trunk, phone = f"outbound-call-{i:012x}", "ST_primary", data["phone_number"]
+    yield lambda: bind_call_context(room=room, patient_id=data["patient_id"], campaign_id=data["campaign_id"])
+    yield lambda: bind_call_context(job_id=f"AJ_{i}")
+    yield lambda: logger.info("Dispatched agent to room %s with job ID: %s", room, f"AJ_{i}")
+    yield lambda: logger.debug("Trial data", extra={"trial_data": data})
+    yield lambda: logger.info("connecting to room %s", room)
+    yield lambda: logger.debug("Extracted trial data from job metadata", extra={"trial_data": data})
+    yield lambda: bind_call_context(trunk_id=trunk)
+    yield lambda: logger.info("📱 Using caller ID: %s", "+15550001001")
+    yield lambda: logger.info("📞 Using clinical trial recruitment agent")
+    yield lambda: logger.info("🎚️ Using media profile: %s", "full")
+    yield lambda: logger.debug("🛠️ SIP request details", extra={"sip_trunk_id": trunk, "sip_call_to": phone})
+    yield lambda: logger.info("🚀 Creating SIP participant via trunk %s - initiating call...", trunk)
+    yield lambda: logger.info("⏱️ Waiting for SIP participant creation (60s timeout)...")
+    yield lambda: logger.info("🎉 Participant answered! Call connected (SIP call ID %s)", f"SCL_{i:08x}")
+    yield lambda: bind_call_context(call_state="in_progress")
+    yield lambda: logger.info("Participant answered! Joined: %s", phone)
+    yield lambda: logger.info("🎙️ Starting conversation with greeting: '%s'", "this is Jocelyn...")
+    for turn in range(6):
+        yield lambda: logger.info("⚡ Fast-path answer for '%s'", "compensation")
+        yield lambda: logger.debug("Non-substantial response: '%s' - waiting for more context", "yeah")
+    yield lambda: logger.info("⚡ Fast-path stats: %s", {"hits": 3, "misses": 3, "ttft_p50": 0.42})
+    yield lambda: logger.info("🔊 TTS cache stats: %s", {"hits": 5, "misses": 2, "bytes": 183040})
+    yield lambda: logger.info("🧠 Context window stats: %s", {"turns": 12, "trimmed": 2, "tokens": 2210})
+
+
+async def run_call(i: int, statements, library_debug: int, timings: list, stalls: list):
+    data = trial_data(i)
+    spent = 0.0
+    for n, statement in enumerate(statements(i, data)):
+        started = time.perf_counter()
+        statement()
+        # Library chatter between our statements, e.g. livekit.agents debug records
+        for _ in range(library_debug // 30):
+            library_logger.debug("speech event %s", n)
+        elapsed = time.perf_counter() - started
+        spent += elapsed
+        stalls.append(elapsed)
+        await asyncio.sleep(0)
+    timings.append(spent)
+
+
+async def run_calls(args, statements) -> tuple[list, list]:
+    timings, stalls = [], []
+    await asyncio.gather(*(run_call(i, statements, args.library_debug, timings, stalls) for i in range(args.calls)))
+    return timings, stalls
+
+
+def downstream(kind: str, sink_delay: float, log_file) -> logging.Handler:
+    if kind == "ipc":
+        return IPCForwardHandler(sink_delay)
+    handler = SlowStreamHandler(log_file, sink_delay)
+    handler.setFormatter(logging.Formatter(structured_logging.TEXT_FORMAT))
+    return handler
+
+
+def reset_logging():
+    root = logging.getLogger()
+    if structured_logging._listener is not None:
+        structured_logging._listener.stop()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    structured_logging._listener = structured_logging._handler = None
+    structured_logging._call_context.set({})
+
+
+def measure(kind: str, variant: str, args, log_file) -> dict:
+    reset_logging()
+    root = logging.getLogger()
+    root.addHandler(downstream(kind, args.sink_delay_ms / 1000, log_file))
+    # A job process's root forwards everything; the API process logs at INFO
+    root.setLevel(logging.NOTSET if kind == "ipc" else logging.INFO)
+    if variant == "after":
+        configure_logging("INFO")
+
+    started = time.perf_counter()
+    timings, stalls = asyncio.run(run_calls(args, old_call_logs if variant == "before" else new_call_logs))
+    loop_seconds = time.perf_counter() - started
+    if variant == "after":
+        flush_logs()
+    drained_seconds = time.perf_counter() - started
+    return {
+        "loop_us_per_call_mean": round(statistics.mean(timings) * 1e6),
+        "loop_us_per_call_p95": round(sorted(timings)[int(len(timings) * 0.95)] * 1e6),
+        "longest_stall_us": round(max(stalls) * 1e6),
+        "loop_seconds": round(loop_seconds, 3),
+        "written_by_seconds": round(drained_seconds, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--library-debug", type=int, default=100, help="Library DEBUG records per call")
+    parser.add_argument("--sink-delay-ms", type=float, default=0.0, help="Stall per handler write")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryFile("w") as log_file:
+        for kind in ("ipc", "stream"):
+            for variant in ("before", "after"):
+                print(f"{kind} {variant}: {json.dumps(measure(kind, variant, args, log_file))}")
+    reset_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Prompt size and time to first token against turn number for a simulated long call.
+
+Replays a scripted Q&A call turn by turn with ClinicalTrialAgent's real instructions
+(system prompt plus trial block) and a mark_contacted tool call early on. For every turn
+it reports the prompt tokens of the full history and of the history bounded by
+ContextWindow.
+
+Offline, time to first token is modeled as --ttft-base + prompt tokens x
+--ttft-per-1k; with --live each turn's context is sent to the configured OpenAI model
+(OPENAI_API_KEY required) and the measured TTFT and provider prompt_tokens are reported.
+
+Usage:
+    uv run python benchmarks/long_call.py [--turns 40] [--budget 800] [--live]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "agents" / "outbound"))
+
+from livekit.agents import llm
+from context_window import CONTEXT_TOKEN_BUDGET, ContextWindow, item_tokens
+
+TRIAL_DATA = {
+    "participant_name": "Dana Whitfield",
+    "phone_number": "+15555550123",
+    "trial_name": "SKIN-RELIEF Phase II Study",
+    "trial_description": "A 12-week study of a topical treatment for moderate to severe eczema.",
+    "eligibility_criteria": "Adults 18-65 with a diagnosis of atopic dermatitis for at least one year.",
+    "compensation_info": "$75 per visit, up to $600 total, plus travel reimbursement.",
+    "contact_info": "study-team@example.org",
+}
+
+# (participant turn, agent reply) pairs, cycled for as many turns as requested
+SCRIPT = [
+    ("Hi, who is this?", "Hi Dana, this is Jocelyn. I found your profile on ResearchGate and wanted to tell you about a paid eczema study. Do you have a minute?"),
+    ("Sure, what is the study about exactly?", "It's a 12-week study testing a topical treatment for moderate to severe eczema. You'd apply a cream daily and come in for check-ups so the team can see how your skin responds."),
+    ("How often would I have to come in?", "There are eight visits over the twelve weeks, roughly every week and a half. Each visit takes about an hour, and the team can usually offer early morning or evening slots."),
+    ("What does it pay?", "You'd receive $75 per visit, up to $600 in total, and travel costs are reimbursed on top of that."),
+    ("Are there any side effects I should know about?", "The most common ones reported so far are mild redness or stinging where the cream is applied. The study doctor goes over all known risks with you before you agree to anything."),
+    ("Can I keep using my current moisturizer?", "Usually a plain moisturizer is fine, but the study team will review everything you use at the screening visit and tell you what to pause."),
+    ("What if I want to drop out halfway?", "You can leave at any time for any reason, and you'd still be paid for the visits you completed."),
+    ("Is it a placebo study?", "Yes, some participants receive an inactive cream. Neither you nor the doctors will know which one you have until the study ends."),
+    ("Where is the clinic?", "The clinic is downtown, near the central station. There's free parking, and they'll reimburse transit fares as well."),
+    ("Do I need a referral from my dermatologist?", "No referral is needed. The screening visit includes an exam by the study dermatologist."),
+]
+
+
+def build_context(turns: int, instructions: str) -> list[llm.ChatContext]:
+    """Return the full chat context as it stands at each LLM request."""
+    ctx = llm.ChatContext.empty()
+    ctx.add_message(role="system", content=instructions)
+    snapshots = []
+    for turn in range(turns):
+        question, answer = SCRIPT[turn % len(SCRIPT)]
+        ctx.add_message(role="user", content=question)
+        snapshots.append(ctx.copy())
+        if turn == 1:
+            ctx.items.append(llm.FunctionCall(call_id="call_1", name="mark_contacted", arguments="{}"))
+            ctx.items.append(llm.FunctionCallOutput(
+                call_id="call_1", name="mark_contacted", output="Marked as contacted", is_error=False,
+            ))
+        ctx.add_message(role="assistant", content=answer)
+    return snapshots
+
+
+async def measure_ttft(model, chat_ctx: llm.ChatContext) -> tuple[float, int | None]:
+    """Send one request; return (seconds to first content, provider prompt tokens)."""
+    started = time.perf_counter()
+    ttft = None
+    prompt_tokens = None
+    async with model.chat(chat_ctx=chat_ctx) as stream:
+        async for chunk in stream:
+            if ttft is None and chunk.delta and chunk.delta.content:
+                ttft = time.perf_counter() - started
+            if chunk.usage:
+                prompt_tokens = chunk.usage.prompt_tokens
+    return ttft or 0.0, prompt_tokens
+
+
+async def run(args):
+    import outbound_agent
+    import providers
+
+    instructions = outbound_agent.ClinicalTrialAgent(TRIAL_DATA).instructions
+    window = ContextWindow(token_budget=args.budget)
+    model = providers.build_llm() if args.live else None
+
+    print(f"{'turn':>4}{'full tok':>10}{'bounded tok':>13}{'full ttft':>11}{'bounded ttft':>14}")
+    for turn, full_ctx in enumerate(build_context(args.turns, instructions), start=1):
+        bounded_ctx = window.apply(full_ctx)
+        full_tokens = sum(item_tokens(item) for item in full_ctx.items)
+        bounded_tokens = sum(item_tokens(item) for item in bounded_ctx.items)
+
+        if args.live:
+            full_ttft, full_reported = await measure_ttft(model, full_ctx)
+            bounded_ttft, bounded_reported = await measure_ttft(model, bounded_ctx)
+            full_tokens = full_reported or full_tokens
+            bounded_tokens = bounded_reported or bounded_tokens
+        else:
+            full_ttft = args.ttft_base + full_tokens / 1000 * args.ttft_per_1k
+            bounded_ttft = args.ttft_base + bounded_tokens / 1000 * args.ttft_per_1k
+
+        print(f"{turn:>4}{full_tokens:>10}{bounded_tokens:>13}{full_ttft * 1000:>10.0f}ms{bounded_ttft * 1000:>12.0f}ms")
+
+    print(f"dropped items: {len(window.dropped_ids)}; summary: {window.summary}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET, help="History token budget")
+    parser.add_argument("--live", action="store_true", help="Measure TTFT against the real LLM")
+    parser.add_argument("--ttft-base", type=float, default=0.35, help="Modeled TTFT at zero prompt tokens (s)")
+    parser.add_argument("--ttft-per-1k", type=float, default=0.06, help="Modeled TTFT per 1k prompt tokens (s)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
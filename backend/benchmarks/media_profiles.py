@@ -0,0 +1,231 @@
+"""
+CPU-per-call benchmark for each media profile on recorded 8kHz telephony audio.
+
+Replays a mono 8kHz 16-bit WAV file through the per-call audio path of each
+profile - noise cancellation, Silero VAD at the profile's sample rate and
+resampling to the STT sample rate - and reports process CPU time per minute of
+audio and the resulting estimate of concurrent calls per core.
+
+Noise cancellation is an audio filter that only runs on a track subscribed in a
+LiveKit room, so the audio is published by a "caller" participant and read back
+by an "agent" participant with the profile's filter, as the agent reads the SIP
+participant. This needs LIVEKIT_URL, LIVEKIT_API_KEY and LIVEKIT_API_SECRET and
+plays the audio in real time. Both participants run in this process, so every
+profile also pays the Opus encode/decode of the room path; the "transport" row
+measures that path alone, to subtract from the others. --offline skips the room
+and noise cancellation for a quick VAD/resampling comparison.
+
+Each profile gets an untimed warm-up pass over the first --warmup seconds (model
+sessions, resamplers and the room path settle) before the timed pass.
+
+Usage:
+    uv run python benchmarks/media_profiles.py recordings/call_8k.wav [--profiles full lite minimal] [--warmup 5] [--offline]
+"""
+
+import os
+import sys
+import time
+import wave
+import asyncio
+import argparse
+from pathlib import Path
+from typing import AsyncIterator
+
+from dotenv import load_dotenv
+
+# Ahead of this directory, where this script would shadow the agent's media_profiles module
+sys.path.insert(0, str(Path(__file__).parent.parent / "agents" / "outbound"))
+
+from livekit import api, rtc
+from livekit.plugins import silero
+import providers
+from media_profiles import MEDIA_PROFILES, MediaProfile
+
+FRAME_MS = 20
+# Stop reading the agent's stream when no frame has arrived for this long
+STREAM_IDLE_TIMEOUT = 2.0
+
+
+def read_frames(path: str) -> tuple[list[rtc.AudioFrame], float]:
+    """Split a mono 16-bit WAV file into 20ms AudioFrames; returns (frames, duration in seconds)."""
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError("Expected a mono 16-bit WAV file")
+        sample_rate = wav.getframerate()
+        samples_per_frame = sample_rate * FRAME_MS // 1000
+        frames = []
+        while True:
+            data = wav.readframes(samples_per_frame)
+            if len(data) < samples_per_frame * 2:
+                break
+            frames.append(rtc.AudioFrame(data, sample_rate, 1, samples_per_frame))
+        return frames, wav.getnframes() / sample_rate
+
+
+async def offline_frames(frames: list[rtc.AudioFrame]) -> AsyncIterator[rtc.AudioFrame]:
+    for frame in frames:
+        yield frame
+
+
+class RoomPath:
+    """A caller and an agent participant in one room, for reading audio through the room path."""
+
+    def __init__(self):
+        self.caller = rtc.Room()
+        self.agent = rtc.Room()
+
+    async def connect(self):
+        url, key, secret = os.getenv("LIVEKIT_URL"), os.getenv("LIVEKIT_API_KEY"), os.getenv("LIVEKIT_API_SECRET")
+        if not url or not key or not secret:
+            raise SystemExit("Noise cancellation runs in a LiveKit room: set LIVEKIT_URL, LIVEKIT_API_KEY and LIVEKIT_API_SECRET (or pass --offline)")
+        room_name = f"media-profile-bench-{os.getpid()}"
+        for room, identity in ((self.caller, "bench-caller"), (self.agent, "bench-agent")):
+            token = (
+                api.AccessToken(key, secret)
+                .with_identity(identity)
+                .with_grants(api.VideoGrants(room_join=True, room=room_name))
+                .to_jwt()
+            )
+            await room.connect(url, token)
+
+    async def disconnect(self):
+        await self.caller.disconnect()
+        await self.agent.disconnect()
+
+    async def frames(self, frames: list[rtc.AudioFrame], noise_cancellation) -> AsyncIterator[rtc.AudioFrame]:
+        """Publish frames as the caller and yield them as the agent receives them, filtered."""
+        sample_rate = frames[0].sample_rate
+        source = rtc.AudioSource(sample_rate, 1)
+        track = rtc.LocalAudioTrack.create_audio_track("caller-audio", source)
+
+        subscribed: asyncio.Future[rtc.Track] = asyncio.get_running_loop().create_future()
+
+        def on_track_subscribed(remote_track: rtc.Track, *_):
+            if not subscribed.done():
+                subscribed.set_result(remote_track)
+
+        self.agent.on("track_subscribed", on_track_subscribed)
+        options = rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+        publication = await self.caller.local_participant.publish_track(track, options)
+        try:
+            remote_track = await asyncio.wait_for(subscribed, timeout=10)
+        finally:
+            self.agent.off("track_subscribed", on_track_subscribed)
+
+        stream = rtc.AudioStream.from_track(
+            track=remote_track, sample_rate=sample_rate, num_channels=1, noise_cancellation=noise_cancellation
+        )
+
+        async def publish():
+            for frame in frames:
+                await source.capture_frame(frame)
+            await source.wait_for_playout()
+
+        publisher = asyncio.create_task(publish())
+        expected = sum(frame.samples_per_channel for frame in frames)
+        received = 0
+        try:
+            while received < expected:
+                try:
+                    event = await asyncio.wait_for(anext(stream), timeout=STREAM_IDLE_TIMEOUT)
+                except (StopAsyncIteration, asyncio.TimeoutError):
+                    break
+                received += event.frame.samples_per_channel
+                yield event.frame
+        finally:
+            await publisher
+            await stream.aclose()
+            await self.caller.local_participant.unpublish_track(publication.sid)
+            await source.aclose()
+
+
+async def run_pass(profile: MediaProfile | None, vad, frames: AsyncIterator[rtc.AudioFrame]) -> float:
+    """Run frames through the profile's VAD and resampler; returns CPU seconds used."""
+    cpu_start = time.process_time()
+
+    stream = vad.stream() if vad else None
+    consumer = asyncio.create_task(drain(stream)) if stream else None
+    resampler = None
+    async for frame in frames:
+        if profile is None:
+            continue
+        if resampler is None and profile.stt_sample_rate != frame.sample_rate:
+            resampler = rtc.AudioResampler(frame.sample_rate, profile.stt_sample_rate, num_channels=1)
+        stream.push_frame(frame)
+        if resampler:
+            resampler.push(frame)
+    if resampler:
+        resampler.flush()
+    if stream:
+        stream.end_input()
+        await consumer
+        await stream.aclose()
+
+    return time.process_time() - cpu_start
+
+
+async def drain(stream):
+    async for _ in stream:
+        pass
+
+
+async def run_profile(
+    profile: MediaProfile | None, frames: list[rtc.AudioFrame], warmup_frames: int, room: RoomPath | None
+) -> float:
+    """Warm up, then run one call's worth of audio through the profile; returns CPU seconds of the timed pass."""
+    vad = None
+    if profile is not None:
+        vad = silero.VAD.load(
+            min_speech_duration=profile.vad_min_speech_duration,
+            min_silence_duration=profile.vad_min_silence_duration,
+            activation_threshold=profile.vad_activation_threshold,
+            sample_rate=profile.vad_sample_rate,
+        )
+
+    def source(pass_frames: list[rtc.AudioFrame]) -> AsyncIterator[rtc.AudioFrame]:
+        if room is None:
+            return offline_frames(pass_frames)
+        noise_cancellation = providers.build_noise_cancellation(profile) if profile else None
+        return room.frames(pass_frames, noise_cancellation)
+
+    if warmup_frames:
+        await run_pass(profile, vad, source(frames[:warmup_frames]))
+    return await run_pass(profile, vad, source(frames))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wav", help="Mono 16-bit 8kHz telephony recording")
+    parser.add_argument("--profiles", nargs="+", default=list(MEDIA_PROFILES), choices=list(MEDIA_PROFILES))
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of audio in the untimed warm-up pass")
+    parser.add_argument("--offline", action="store_true", help="Skip the room path and noise cancellation")
+    args = parser.parse_args()
+
+    load_dotenv()
+    frames, duration = read_frames(args.wav)
+    warmup_frames = min(len(frames), int(args.warmup * 1000 / FRAME_MS))
+    print(f"Audio: {duration:.1f}s at {frames[0].sample_rate}Hz ({len(frames)} frames), warm-up {args.warmup:.1f}s")
+
+    room = None
+    if not args.offline:
+        room = RoomPath()
+        await room.connect()
+
+    try:
+        runs: list[tuple[str, MediaProfile | None]] = [(name, MEDIA_PROFILES[name]) for name in args.profiles]
+        if room:
+            runs.insert(0, ("transport", None))
+        print(f"{'profile':<10}{'nc':>14}{'cpu s':>10}{'cpu s/min':>12}{'calls/core':>12}")
+        for name, profile in runs:
+            cpu_seconds = await run_profile(profile, frames, warmup_frames, room)
+            per_minute = cpu_seconds / duration * 60
+            calls_per_core = duration / cpu_seconds if cpu_seconds else float("inf")
+            nc = (profile.noise_cancellation if profile else None) if room else "skipped"
+            print(f"{name:<10}{nc or '-':>14}{cpu_seconds:>10.3f}{per_minute:>12.3f}{calls_per_core:>12.1f}")
+    finally:
+        if room:
+            await room.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
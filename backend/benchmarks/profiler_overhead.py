@@ -0,0 +1,110 @@
+"""
+Overhead of the per-job profiler on a synthetic agent workload.
+
+Simulates --calls concurrent calls on one event loop, each handling a 20ms audio frame
+(RMS over 8kHz PCM16 plus a JSON event) every 20ms, and measures process CPU time
+per frame (interleaved over --rounds; the best round is reported, since scheduler noise
+only ever adds time):
+- baseline:  no profiler
+- cpu+loop:  profiling on with AGENT_PROFILE_MEMORY=0 (stack sampler and loop probe)
+- full:      profiling on, including tracemalloc
+
+With profiling off (the default) the only added work is one start_job_profiler() call
+per job, far below the run-to-run noise of the workload, so "off" is measured directly:
+the cost of that call as a fraction of the CPU time of one --call-minutes call.
+Exits non-zero when it exceeds --max-off-overhead (default 2%).
+
+Usage:
+    uv run python benchmarks/profiler_overhead.py [--calls 20] [--seconds 3] [--rounds 5]
+"""
+
+import os
+import sys
+import json
+import time
+import array
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "agents" / "outbound"))
+os.environ.setdefault("AGENT_PROFILE_DIR", tempfile.mkdtemp())
+
+import job_profiler
+
+FRAME_SECONDS = 0.02
+FRAME = array.array("h", (int(1000 * ((i % 40) - 20)) for i in range(160))).tobytes()
+
+
+async def call(seconds: float, counter: list[int]):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    while loop.time() < deadline:
+        samples = array.array("h", FRAME)
+        rms = (sum(s * s for s in samples) / len(samples)) ** 0.5
+        json.dumps({"type": "frame", "rms": rms, "t": loop.time()})
+        counter[0] += 1
+        await asyncio.sleep(FRAME_SECONDS)
+
+
+async def run_mode(mode: str, calls: int, seconds: float) -> float:
+    """Run the workload once; return CPU microseconds per frame."""
+    counter = [0]
+    profiler = None
+    if mode != "baseline":
+        job_profiler.PROFILE_MEMORY = mode == "full"
+        profiler = job_profiler.start_job_profiler(f"bench-{mode}", "bench", {"profile": True})
+
+    started = time.process_time()
+    await asyncio.gather(*(call(seconds, counter) for _ in range(calls)))
+    cpu = time.process_time() - started
+
+    if profiler:
+        await profiler.stop("benchmark")
+    return cpu / counter[0] * 1e6
+
+
+def off_cost_seconds(iterations: int = 100_000) -> float:
+    """CPU seconds of one start_job_profiler() call when the job is not profiled."""
+    started = time.process_time()
+    for _ in range(iterations):
+        job_profiler.start_job_profiler("bench-off", "bench", {})
+    return (time.process_time() - started) / iterations
+
+
+async def main_async(args) -> dict:
+    """Interleave the modes over --rounds and keep each mode's fastest round."""
+    samples = {mode: [] for mode in ("baseline", "cpu+loop", "full")}
+    for _ in range(args.rounds):
+        for mode in samples:
+            samples[mode].append(await run_mode(mode, args.calls, args.seconds))
+    return {mode: min(values) for mode, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--call-minutes", type=float, default=3, help="Call length for the off-mode estimate")
+    parser.add_argument("--max-off-overhead", type=float, default=0.02)
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    baseline = results["baseline"]
+    print(f"{'mode':<10}{'cpu us/frame':>14}{'overhead':>10}")
+    for mode, per_frame in results.items():
+        print(f"{mode:<10}{per_frame:>14.1f}{(per_frame / baseline - 1) * 100:>9.1f}%")
+
+    call_cpu = baseline / 1e6 * args.call_minutes * 60 / FRAME_SECONDS
+    off_overhead = off_cost_seconds() / call_cpu
+    print(f"{'off':<10}{'':>14}{off_overhead * 100:>9.4f}%  (one check per {args.call_minutes:g} min call)")
+
+    if off_overhead > args.max_off_overhead:
+        print(f"Profiler overhead with profiling off exceeds {args.max_off_overhead:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Campaign ramp simulation against the stub provider, with and without the shared limiter.
+
+Starts benchmarks/stub_provider.py in-process with a quota of --rps/--burst, then runs
+--workers processes that each send LLM-style requests as fast as their simulated calls
+produce turns. It runs twice: first with every process sending freely, as the workers
+did before the limiter existed, then with each request first taking a token from one
+shared ProviderRateLimiter file, so the host-wide rate matches the provider quota.
+
+Reports requests served, 429s and the time requests spent waiting for a token.
+Requests still get sent after a 2s wait (as in the agent), so a sustained overload
+shows up as a small residual 429 rate rather than unbounded waits.
+
+Usage:
+    uv run python benchmarks/rate_limit_sim.py [--workers 8] [--seconds 20] [--rps 8] [--burst 20]
+"""
+
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import tempfile
+import statistics
+import threading
+import urllib.error
+import urllib.request
+import multiprocessing
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from stub_provider import StubProvider, make_server
+from services.rate_limiter import ProviderRateLimiter
+
+PROVIDER = "openai"
+
+
+def post(url: str) -> int:
+    request = urllib.request.Request(url, data=b"{}", method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def worker(url: str, seconds: float, turn_interval: float, limiter_path: str | None, results):
+    """One job process: a call producing an LLM turn every turn_interval seconds."""
+    limiter = ProviderRateLimiter(limiter_path) if limiter_path else None
+    codes, waits = [], []
+
+    async def run():
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if limiter:
+                started = time.monotonic()
+                await limiter.wait_for_request(PROVIDER, timeout=2.0)
+                waits.append(time.monotonic() - started)
+            codes.append(await asyncio.to_thread(post, url))
+            await asyncio.sleep(turn_interval)
+
+    asyncio.run(run())
+    results.put({"codes": codes, "waits": waits})
+
+
+def simulate(args, use_limiter: bool) -> dict:
+    provider = StubProvider(args.rps, args.burst, concurrency=1000, latency_ms=args.latency_ms)
+    server = make_server(provider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+    limiter_path = None
+    if use_limiter:
+        limiter_path = os.path.join(tempfile.mkdtemp(), "quotas.db")
+        os.environ[f"{PROVIDER.upper()}_QUOTA"] = f"rps={args.rps},burst={args.burst},concurrency=1000"
+        ProviderRateLimiter(limiter_path)  # create the schema before the workers race for it
+
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=worker, args=(url, args.seconds, args.turn_interval, limiter_path, results))
+        for _ in range(args.workers)
+    ]
+    for proc in procs:
+        proc.start()
+    outcomes = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    server.shutdown()
+
+    codes = [code for outcome in outcomes for code in outcome["codes"]]
+    waits = sorted(wait for outcome in outcomes for wait in outcome["waits"])
+    return {
+        "requests": len(codes),
+        "ok": codes.count(200),
+        "429": codes.count(429),
+        "429_rate": round(codes.count(429) / len(codes), 3) if codes else 0,
+        "p50_wait_ms": round(statistics.median(waits) * 1000, 1) if waits else 0,
+        "p95_wait_ms": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0,
+        "provider": provider.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--turn-interval", type=float, default=0.1, help="Seconds between a call's LLM turns")
+    parser.add_argument("--rps", type=float, default=8)
+    parser.add_argument("--burst", type=float, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    for label, use_limiter in (("without limiter", False), ("with limiter", True)):
+        print(f"{label}: {json.dumps(simulate(args, use_limiter))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Build time, memory and query latency of the patient search index.
+
+Builds PatientSearchIndex over --patients synthetic CrobotMaster rows (names, emails
+and phones in mixed formats), then times queries of each kind against it:
+- name:        full names, first names and 2-3 character prefixes
+- email:       full addresses and local-part fragments
+- phone:       stored numbers typed in another format, and trailing digit fragments
+- update:      apply_change for a renamed patient (incremental re-index)
+
+For reference, the same queries are also run as a linear substring scan over every
+row, which is what the dashboard's ilike filters amount to without an index.
+
+Usage:
+    uv run python benchmarks/search_index.py [--patients 1000000] [--queries 200]
+"""
+
+import sys
+import time
+import random
+import argparse
+import resource
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.search_service import PatientSearchIndex
+
+FIRST_NAMES = [
+    "james", "mary", "robert", "patricia", "john", "jennifer", "michael", "linda", "david", "elizabeth",
+    "william", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah", "charles", "karen",
+    "daniel", "nancy", "matthew", "lisa", "anthony", "betty", "mark", "sandra", "donald", "ashley",
+    "priya", "wei", "fatima", "mohammed", "sofia", "lucas", "amara", "kenji", "olga", "mateo",
+]
+LAST_NAMES = [
+    "smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez", "martinez",
+    "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin",
+    "lee", "perez", "thompson", "white", "harris", "sanchez", "clark", "ramirez", "lewis", "robinson",
+    "patel", "nguyen", "kim", "chen", "okafor", "novak", "schmidt", "rossi", "tanaka", "haddad",
+]
+DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "hotmail.com", "icloud.com", "proton.me"]
+
+
+def phone_formats(digits: str) -> list[str]:
+    """The same 10-digit US number as entered in different places."""
+    area, exchange, line = digits[:3], digits[3:6], digits[6:]
+    return [
+        f"({area}) {exchange}-{line}",
+        f"{area}-{exchange}-{line}",
+        f"+1 {area} {exchange} {line}",
+        f"{area}.{exchange}.{line}",
+        digits,
+    ]
+
+
+def synthetic_rows(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        digits = f"{rng.randint(201, 989)}{rng.randint(200, 999)}{rng.randint(0, 9999):04d}"
+        rows.append({
+            "patient_id": f"P{i:07d}",
+            "name": f"{first.title()} {last.title()}",
+            "email": f"{first}.{last}{rng.randint(1, 9999)}@{rng.choice(DOMAINS)}",
+            "phone": rng.choice(phone_formats(digits)),
+        })
+    return rows
+
+
+def query_mix(rows: list[dict], count: int, seed: int = 11) -> dict[str, list[str]]:
+    rng = random.Random(seed)
+    sample = rng.sample(rows, count)
+    digits = ["".join(c for c in row["phone"] if c.isdigit())[-10:] for row in sample]
+    return {
+        "name": [
+            rng.choice([row["name"], row["name"].split()[0], row["name"].split()[1][:rng.randint(2, 3)]])
+            for row in sample
+        ],
+        "email": [
+            rng.choice([row["email"], row["email"].split("@")[0][-6:]])
+            for row in sample
+        ],
+        "phone": [
+            rng.choice([rng.choice(phone_formats(number)), number[-4:]])
+            for number in digits
+        ],
+    }
+
+
+def linear_scan(rows: list[dict], query: str) -> int:
+    """Unindexed substring match over every row, like OR ilike filters."""
+    needle = query.lower()
+    digits = "".join(c for c in query if c.isdigit())
+    matches = 0
+    for row in rows:
+        if needle in row["name"].lower() or needle in row["email"].lower() or (
+            digits and digits in "".join(c for c in row["phone"] if c.isdigit())
+        ):
+            matches += 1
+    return matches
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200, help="Queries per kind")
+    parser.add_argument("--scan-queries", type=int, default=5, help="Queries per kind for the linear scan")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.patients)
+    rows_rss = peak_rss_mb()
+
+    index = PatientSearchIndex()
+    started = time.perf_counter()
+    index.build(rows)
+    build_seconds = time.perf_counter() - started
+    index_rss = peak_rss_mb() - rows_rss
+    metrics = index.metrics()
+    print(
+        f"built {metrics['patients']} patients in {build_seconds:.1f}s: "
+        f"{metrics['trigrams']} trigrams, {metrics['postings']} postings, ~{index_rss:.0f} MB RSS"
+    )
+
+    queries = query_mix(rows, args.queries)
+    print(f"{'kind':<8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'hits':>7}{'scan p50 ms':>13}")
+    for kind, texts in queries.items():
+        latencies, hits = [], 0
+        for text in texts:
+            started = time.perf_counter()
+            results, _ = index.search(text, args.limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += bool(results)
+
+        scans = []
+        for text in texts[:args.scan_queries]:
+            started = time.perf_counter()
+            linear_scan(rows, text)
+            scans.append((time.perf_counter() - started) * 1000)
+
+        print(
+            f"{kind:<8}{percentile(latencies, 0.5):>9.2f}{percentile(latencies, 0.95):>9.2f}"
+            f"{max(latencies):>9.2f}{hits / len(texts):>6.0%}{percentile(scans, 0.5):>13.0f}"
+        )
+
+    rng = random.Random(13)
+    latencies = []
+    for row in rng.sample(rows, args.queries):
+        started = time.perf_counter()
+        index.apply_change("UPDATE", {"patient_id": row["patient_id"], "name": f"{row['name']} Jr"}, None)
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"{'update':<8}{percentile(latencies, 0.5):>9.3f}{percentile(latencies, 0.95):>9.3f}{max(latencies):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Stand-in for a rate-limited provider API (Deepgram, OpenAI or Cartesia) to test throttling.
+
+Serves POST/GET on any path. Each request takes a token from a token bucket
+(--rps, --burst), and the number of open requests is capped at --concurrency; requests
+over either limit get 429 with a Retry-After header, like the real providers.
+Successful requests are held for --latency-ms to simulate generation time.
+
+GET /stats returns the counts of served and throttled requests as JSON.
+
+Usage:
+    uv run python benchmarks/stub_provider.py [--port 8930] [--rps 8] [--burst 20] [--concurrency 50]
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubProvider:
+    """Token bucket and concurrency limit enforced the way the provider would."""
+
+    def __init__(self, rps: float, burst: float, concurrency: int, latency_ms: float):
+        self.rps = rps
+        self.burst = burst
+        self.concurrency = concurrency
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.active = 0
+        self.served = 0
+        self.throttled = 0
+
+    def admit(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rps)
+            self.updated_at = now
+            if self.tokens < 1 or self.active >= self.concurrency:
+                self.throttled += 1
+                return False
+            self.tokens -= 1
+            self.active += 1
+            return True
+
+    def finish(self):
+        with self.lock:
+            self.active -= 1
+            self.served += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"served": self.served, "throttled": self.throttled, "active": self.active}
+
+
+def make_server(provider: StubProvider, port: int = 0) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: dict, headers: dict | None = None):
+            payload = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            if self.path == "/stats":
+                self._reply(200, provider.stats())
+                return
+            if not provider.admit():
+                self._reply(429, {"error": "rate_limit_exceeded"}, {"Retry-After": "1"})
+                return
+            try:
+                time.sleep(provider.latency)
+                self._reply(200, {"ok": True})
+            finally:
+                provider.finish()
+
+        do_GET = _handle
+        do_POST = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8930)
+    parser.add_argument("--rps", type=float, default=8)
+    parser.add_argument("--burst", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    server = make_server(StubProvider(args.rps, args.burst, args.concurrency, args.latency_ms), args.port)
+    print(f"Stub provider on http://127.0.0.1:{args.port} ({args.rps} rps, burst {args.burst})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Campaign simulation of the SIP trunk pool against a local stand-in for LiveKit's SIP API.
+
+StubSIPService implements create_sip_participant the way the agent calls it: each trunk
+rings for a while and connects, the callee may not answer or be busy (486), and a
+trunk over its concurrent call limit fails with a 503 TwirpError. Trunks can be given
+outage windows (fractions of the run) in which every dial fails fast with a 503, or
+rings for a while before failing with a 500 (a slow carrier error). Ring timeouts are
+the callee not answering and are never counted against the trunk.
+
+Calls arrive at --rate per second. Each goes through the same steps as /api/launch-call
+and the agent: lease a trunk, dial with a timeout, record the result, hold the call,
+release. A call the pool has no trunk for (503) is retried --retries times, as a
+campaign dialer would. Three strategies are compared on the same arrivals:
+- single:      every call on the first trunk, as with OUTBOUND_SIP_TRUNK_ID alone
+- no breaker:  the pool's least-loaded selection without taking bad trunks out
+- pool:        least-loaded, health-weighted selection plus the circuit breaker
+
+Time is compressed: --dial-timeout stands in for the agent's 60s ring timeout.
+
+Usage:
+    uv run python benchmarks/trunk_pool_sim.py [--seconds 30] [--rate 8] [--cooldown 2]
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services import trunk_pool
+from services.trunk_pool import SIPTrunkPool, is_trunk_failure
+
+TRUNKS = [
+    {"trunk_id": "ST_primary", "capacity": 12, "caller_ids": ["+15550001001", "+15550001002"]},
+    {"trunk_id": "ST_secondary", "capacity": 12, "caller_ids": ["+15550002001", {"number": "+15550002002", "capacity": 4}]},
+    {"trunk_id": "ST_backup", "capacity": 6, "caller_ids": ["+15550003001"]},
+]
+# (start, end) as fractions of the run, and how the trunk fails in that window
+OUTAGES = {
+    "ST_secondary": (0.25, 0.55, "error"),
+    "ST_backup": (0.45, 0.75, "slow"),
+}
+
+
+class StubTwirpError(Exception):
+    """Shaped like livekit.api.TwirpError: a code, a message and SIP status metadata."""
+
+    def __init__(self, message: str, sip_status_code: str, code: str = "unavailable"):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.metadata = {"sip_status_code": sip_status_code}
+
+
+class StubSIPService:
+    """Stand-in for ctx.api.sip with per-trunk capacity and scripted outages."""
+
+    def __init__(self, trunks: list[dict], outages: dict, duration: float, seed: int = 5):
+        self.capacity = {trunk["trunk_id"]: trunk["capacity"] for trunk in trunks}
+        self.active = Counter()
+        self.outages = outages
+        self.duration = duration
+        self.started = time.monotonic()
+        self.rng = random.Random(seed)
+
+    def _outage(self, trunk_id: str) -> str | None:
+        if trunk_id not in self.outages:
+            return None
+        start, end, kind = self.outages[trunk_id]
+        progress = (time.monotonic() - self.started) / self.duration
+        return kind if start <= progress < end else None
+
+    async def create_sip_participant(self, request: dict):
+        trunk_id = request["sip_trunk_id"]
+        outage = self._outage(trunk_id)
+        if outage == "error":
+            await asyncio.sleep(0.02)
+            raise StubTwirpError("Service Unavailable", "503")
+        if outage == "slow":
+            await asyncio.sleep(self.rng.uniform(0.3, 0.8))
+            raise StubTwirpError("Server Internal Error", "500")
+        if self.active[trunk_id] >= self.capacity[trunk_id]:
+            raise StubTwirpError("Maximum concurrent calls exceeded", "503")
+
+        self.active[trunk_id] += 1
+        try:
+            roll = self.rng.random()
+            if roll < 0.08:
+                await asyncio.sleep(3600)  # nobody picks up: the caller's ring timeout fires
+            await asyncio.sleep(self.rng.uniform(0.1, 0.5))
+            if roll < 0.13:
+                raise StubTwirpError("Busy Here", "486")
+            return {"participant_identity": request["sip_call_to"], "sip_call_id": f"SCL_{self.rng.getrandbits(32):x}"}
+        except BaseException:
+            self.active[trunk_id] -= 1
+            raise
+
+    def hang_up(self, trunk_id: str):
+        self.active[trunk_id] -= 1
+
+
+async def place_call(pool: SIPTrunkPool | None, sip: StubSIPService, args, results: Counter, per_trunk: Counter, call_seconds: float):
+    """One call through the launch-call route and the agent's dial step."""
+    lease = pool.acquire() if pool else {"lease_id": None, "trunk_id": TRUNKS[0]["trunk_id"], "caller_id": "+15550001001"}
+    for _ in range(args.retries):
+        if lease is not None:
+            break
+        # launch-call answered 503: the campaign dialer retries the patient shortly after
+        results["retried"] += 1
+        await asyncio.sleep(args.retry_after)
+        lease = pool.acquire()
+    if lease is None:
+        results["rejected (no trunk)"] += 1
+        return
+    trunk_id = lease["trunk_id"]
+    per_trunk[trunk_id] += 1
+    try:
+        try:
+            await asyncio.wait_for(
+                sip.create_sip_participant(
+                    {"sip_trunk_id": trunk_id, "sip_number": lease["caller_id"], "sip_call_to": "+15555550123"}
+                ),
+                timeout=args.dial_timeout,
+            )
+        except asyncio.TimeoutError:
+            results["ring timeout"] += 1
+            return
+        except StubTwirpError as e:
+            if is_trunk_failure(e.metadata["sip_status_code"], e.code):
+                results["trunk error"] += 1
+                if pool:
+                    pool.record_result(trunk_id, False, f"TwirpError: {e.message}")
+            else:
+                results["callee busy"] += 1
+            return
+
+        results["connected"] += 1
+        if pool:
+            pool.record_result(trunk_id, True)
+        await asyncio.sleep(call_seconds)
+        sip.hang_up(trunk_id)
+    finally:
+        if pool:
+            pool.release(lease["lease_id"])
+
+
+async def simulate(strategy: str, args) -> dict:
+    pool = None
+    if strategy != "single":
+        trunk_pool.COOLDOWN_SECONDS = args.cooldown
+        trunk_pool.FAILURE_THRESHOLD = args.failure_threshold if strategy == "pool" else 10**9
+        pool = SIPTrunkPool(Path(tempfile.mkdtemp()) / "trunks.db", trunks=TRUNKS)
+
+    # Same arrivals and call lengths for every strategy
+    rng = random.Random(args.seed)
+    schedule, at = [], 0.0
+    while at < args.seconds:
+        schedule.append((at, rng.uniform(*args.call_seconds)))
+        at += rng.expovariate(args.rate)
+
+    sip = StubSIPService(TRUNKS, OUTAGES, args.seconds, seed=args.seed)
+    results, per_trunk = Counter(), Counter()
+    calls = []
+    started = time.monotonic()
+    for at, call_seconds in schedule:
+        await asyncio.sleep(max(0.0, started + at - time.monotonic()))
+        calls.append(asyncio.create_task(place_call(pool, sip, args, results, per_trunk, call_seconds)))
+    await asyncio.gather(*calls)
+
+    offered = len(schedule)
+    return {
+        "offered": offered,
+        "connect_rate": round(results["connected"] / offered, 3),
+        "failed_dials": results["trunk error"],
+        "retried": results.pop("retried", 0),
+        **dict(results),
+        "calls_per_trunk": dict(per_trunk),
+        "trunk_health": {
+            trunk_id: {"health": usage["health"], "failures": usage["failures"]}
+            for trunk_id, usage in pool.usage().items()
+        } if pool else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--rate", type=float, default=8, help="Call arrivals per second")
+    parser.add_argument("--call-seconds", type=float, nargs=2, default=(1.0, 3.0), help="Connected call length range")
+    parser.add_argument("--dial-timeout", type=float, default=1.0)
+    parser.add_argument("--cooldown", type=float, default=2.0)
+    parser.add_argument("--retries", type=int, default=3, help="Retries of a call rejected for lack of a trunk")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--failure-threshold", type=int, default=trunk_pool.FAILURE_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    for strategy in ("single", "no breaker", "pool"):
+        print(f"{strategy}: {json.dumps(asyncio.run(simulate(strategy, args)))}")
+
+
+if __name__ == "__main__":
+    main()
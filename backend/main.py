@@ -1,26 +1,72 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 from api.routes import router
+from services.patient_feed import get_patient_feed
+from services.stats_service import get_stats_service
+from services.patient_cache import get_patient_cache
+from services.search_service import get_search_index
+from services.supabase_service import get_supabase_service
+from services.structured_logging import configure_logging
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Log through a queue and listener thread, with per-call context and PII redaction
+configure_logging()
 
 logger = logging.getLogger(__name__)
 
+
+async def build_search_index(search_index):
+    try:
+        await search_index.rebuild(get_supabase_service())
+    except Exception as e:
+        logger.warning("Patient search index build failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Subscribe to patient row changes and build in-memory state on startup."""
+    feed = get_patient_feed()
+    stats_service = get_stats_service()
+    feed.add_listener(stats_service.apply_change)
+    feed.add_listener(get_patient_cache().apply_change)
+    search_index = get_search_index()
+    feed.add_listener(search_index.apply_change)
+    search_build = None
+
+    try:
+        # Subscribe before the initial scan so no change is missed while it runs
+        await feed.start()
+    except Exception as e:
+        logger.warning("Patient change feed unavailable - dashboard stats and search disabled: %s", e)
+    else:
+        # The search index builds in the background (/api/search returns 503 until it
+        # is ready) and fails on its own, so a failed stats scan doesn't leave it unbuilt
+        search_build = asyncio.create_task(build_search_index(search_index))
+        try:
+            await stats_service.rebuild(get_supabase_service())
+        except Exception as e:
+            logger.warning("Dashboard stats build failed - retry with /api/stats/reconcile: %s", e)
+
+    yield
+
+    if search_build is not None:
+        search_build.cancel()
+    await feed.stop()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Clinical Trial Agent API",
     description="API for launching outbound calls to clinical trial participants",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS for frontend communication
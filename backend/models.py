@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -13,10 +15,24 @@ class LaunchCallRequest(BaseModel):
     trial_description: str | None = Field(None, description="Brief description of the trial")
     compensation_info: str | None = Field(None, description="Compensation details for participants")
     contact_info: str | None = Field(None, description="Contact information for follow-up questions")
+    trial_duration: str | None = Field(None, description="Trial length and visit schedule, e.g. '3 months total. Two visits, about an hour each'")
+    canned_answers: dict[Literal["compensation", "duration", "consent", "not_interested"], str] | None = Field(
+        None, description="Per-trial fast-path answers, by intent, replacing the defaults"
+    )
 
     # Optional SIP configuration overrides
-    sip_trunk_id: str | None = Field(None, description="Override SIP trunk ID (uses env var if not provided)")
-    caller_id: str | None = Field(None, description="Override caller ID (uses env var if not provided)")
+    sip_trunk_id: str | None = Field(None, description="Override SIP trunk ID (picked from the SIP trunk pool if not provided)")
+    caller_id: str | None = Field(None, description="Override caller ID (picked from the SIP trunk pool if not provided)")
+
+    # Optional tracking identifiers recorded in the call ledger
+    patient_id: str | None = Field(None, description="CrobotMaster patient_id of the participant")
+    campaign_id: str | None = Field(None, description="Campaign this call belongs to")
+
+    # Optional media profile override
+    media_profile: Literal["full", "lite", "minimal"] | None = Field(None, description="Audio processing profile (uses AGENT_MEDIA_PROFILE if not provided)")
+
+    # Diagnostics
+    profile: bool = Field(False, description="Write a CPU/memory/event-loop profile report for this call")
 
 
 class LaunchCallResponse(BaseModel):
@@ -26,3 +42,139 @@ class LaunchCallResponse(BaseModel):
     room_name: str | None = Field(None, description="LiveKit room name where the call is taking place")
     message: str = Field(..., description="Status message or error description")
     job_id: str | None = Field(None, description="Agent job ID for tracking")
+
+
+class StatsResponse(BaseModel):
+    """Response model for dashboard aggregate counts."""
+
+    total: int = Field(..., description="Total number of patients")
+    study_types: dict[str, int] = Field(..., description="Patient count per qualified study type")
+    statuses: dict[str, int] = Field(..., description="Patient count per contact status")
+    eligibility_labels: dict[str, int] = Field(..., description="Patient count per eligibility label")
+    built_at: str | None = Field(None, description="When the counters were last rebuilt from a full scan")
+    last_change_at: str | None = Field(None, description="When the last row change was applied")
+
+
+class StatsReconcileResponse(BaseModel):
+    """Response model for reconciling dashboard counters against a full scan."""
+
+    consistent: bool = Field(..., description="Whether the live counters matched the full scan")
+    drift: dict = Field(..., description="Differences found (live minus scanned), keyed by dimension")
+    stats: StatsResponse = Field(..., description="Counters after reconciliation")
+
+
+class WorkerHeartbeat(BaseModel):
+    """Capacity snapshot reported periodically by an agent worker."""
+
+    worker_id: str = Field(..., description="LiveKit worker ID (or host-pid before registration)")
+    active_calls: int = Field(..., description="Calls currently running on the worker")
+    max_calls: int = Field(..., description="Maximum concurrent calls configured for the worker")
+    available_calls: int = Field(..., description="Calls the worker can still accept (0 when at load threshold)")
+    cpu: float = Field(..., description="Moving-average CPU usage between 0 and 1")
+    load: float = Field(..., description="Worker load reported to LiveKit (0-1)")
+    load_threshold: float = Field(..., description="Load at which the worker stops accepting jobs")
+
+
+class CapacityReport(BaseModel):
+    """Response model for fleet capacity."""
+
+    workers: list[WorkerHeartbeat] = Field(..., description="Workers that reported recently")
+    active_calls: int = Field(..., description="Calls running across the fleet")
+    available_calls: int = Field(..., description="Calls the fleet can accept right now")
+    batch_size: int | None = Field(None, description="Requested campaign batch size")
+    can_accept_batch: bool | None = Field(None, description="Whether the fleet can take a batch of batch_size calls")
+
+
+class ProviderQuota(BaseModel):
+    """Quota use for one provider on this host."""
+
+    rps: float = Field(..., description="Sustained requests per second allowed")
+    burst: float = Field(..., description="Token bucket size")
+    tokens: float = Field(..., description="Request tokens currently available")
+    concurrency: int = Field(..., description="Maximum concurrent sessions")
+    active: int = Field(..., description="Sessions held by running calls")
+    concurrency_used: float = Field(..., description="Fraction of the concurrency limit in use")
+    granted: int = Field(..., description="Requests let through since the limiter was created")
+    throttled: int = Field(..., description="Requests that found the bucket empty")
+
+
+class QuotaReport(BaseModel):
+    """Response model for provider quota use."""
+
+    providers: dict[str, ProviderQuota] = Field(..., description="Quota use keyed by provider")
+    accepting_calls: bool = Field(..., description="Whether a new call would get quota from every provider")
+
+
+class SearchResult(BaseModel):
+    """A patient matching a search query."""
+
+    patient_id: str = Field(..., description="CrobotMaster patient_id")
+    field: str = Field(..., description="Best matching field: name, email or phone")
+    match: str = Field(..., description="exact, prefix, word_prefix or substring")
+    score: int = Field(..., description="Rank score; higher is a better match")
+
+
+class SearchResponse(BaseModel):
+    """Response model for patient search."""
+
+    query: str = Field(..., description="The search query")
+    results: list[SearchResult] = Field(..., description="Matches, best first")
+    truncated: bool = Field(..., description="More patients matched than were returned")
+    took_ms: float = Field(..., description="Time spent searching the index")
+
+
+class TrunkCallerID(BaseModel):
+    """Use of one caller ID on a SIP trunk."""
+
+    capacity: int = Field(..., description="Maximum concurrent calls from this number")
+    active: int = Field(..., description="Calls currently using this number")
+
+
+class TrunkStatus(BaseModel):
+    """Load and health of one SIP trunk in the pool."""
+
+    capacity: int = Field(..., description="Maximum concurrent calls on this trunk")
+    active: int = Field(..., description="Calls currently leased to this trunk")
+    state: str = Field(..., description="closed (in rotation), open (out of rotation) or half_open (probing)")
+    health: float = Field(..., description="Recent dial success rate, 0-1 (exponentially weighted)")
+    consecutive_failures: int = Field(..., description="Trunk-side TwirpErrors since the last success")
+    reopens_in: float | None = Field(None, description="Seconds until a probe call is let through, while open")
+    calls: int = Field(..., description="Dial results recorded")
+    failures: int = Field(..., description="Dial results counted against the trunk")
+    last_error: str | None = Field(None, description="Most recent trunk failure")
+    caller_ids: dict[str, TrunkCallerID] = Field(..., description="Caller ID use keyed by number")
+
+
+class TrunkPoolReport(BaseModel):
+    """Response model for SIP trunk pool status."""
+
+    trunks: dict[str, TrunkStatus] = Field(..., description="Trunk status keyed by trunk ID")
+
+
+class CallRecord(BaseModel):
+    """A call ledger entry."""
+
+    job_id: str = Field(..., description="Agent dispatch ID returned by launch-call")
+    room_name: str = Field(..., description="LiveKit room of the call")
+    patient_id: str | None = Field(None, description="CrobotMaster patient_id of the participant")
+    phone_number: str = Field(..., description="Normalized phone number called")
+    participant_name: str | None = Field(None, description="Name of the participant")
+    campaign_id: str | None = Field(None, description="Campaign this call belongs to")
+    media_profile: str | None = Field(None, description="Requested media profile")
+    status: str = Field(..., description="dispatched, dialing, in_progress, no_answer, failed or ended")
+    outcome: str | None = Field(None, description="completed, voicemail, not_interested or hung_up")
+    error: str | None = Field(None, description="Error message when the call failed")
+    created_at: str = Field(..., description="When the call was dispatched")
+    started_at: str | None = Field(None, description="When the worker started dialing")
+    answered_at: str | None = Field(None, description="When the participant answered")
+    ended_at: str | None = Field(None, description="When the job ended")
+    ring_seconds: float | None = Field(None, description="Seconds from dialing to answer")
+    duration_seconds: float | None = Field(None, description="Seconds from answer to end")
+    updated_at: str = Field(..., description="Last ledger update")
+
+
+class CallListResponse(BaseModel):
+    """Response model for listing calls."""
+
+    calls: list[CallRecord] = Field(..., description="Calls, newest first")
+    next_cursor: str | None = Field(None, description="Pass as cursor to fetch the next page")
@@ -0,0 +1,247 @@
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+from services.supabase_service import SupabaseService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = Path(__file__).parent.parent / "data" / "call_ledger.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    job_id TEXT PRIMARY KEY,
+    room_name TEXT NOT NULL UNIQUE,
+    patient_id TEXT,
+    phone_number TEXT NOT NULL,
+    participant_name TEXT,
+    campaign_id TEXT,
+    media_profile TEXT,
+    status TEXT NOT NULL,
+    outcome TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    answered_at TEXT,
+    ended_at TEXT,
+    ring_seconds REAL,
+    duration_seconds REAL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_patient ON calls (patient_id, created_at);
+CREATE INDEX IF NOT EXISTS calls_phone ON calls (phone_number, created_at);
+CREATE INDEX IF NOT EXISTS calls_campaign ON calls (campaign_id, created_at);
+CREATE INDEX IF NOT EXISTS calls_created ON calls (created_at);
+"""
+
+# Columns the worker may update as a call progresses
+UPDATABLE_COLUMNS = {
+    "status", "outcome", "error", "started_at", "answered_at", "ended_at",
+    "ring_seconds", "duration_seconds",
+}
+FILTER_COLUMNS = ("patient_id", "phone_number", "campaign_id", "status")
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class CallLedger:
+    """
+    Local persistent record of every outbound call, stored in SQLite (WAL mode).
+
+    The API inserts a row before it dispatches a call, keyed by the room name it is
+    about to create (job_id holds the room name until the dispatch returns the real
+    one), so the worker on the same host always finds the row when it updates it
+    (by room name) with timings and the outcome. WAL lets the API read
+    while a worker writes, and synchronous=NORMAL keeps commits off the fsync path.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path or os.getenv("CALL_LEDGER_PATH") or DEFAULT_LEDGER_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        logger.info("Call ledger opened at %s", self.path)
+
+    def record_dispatch(
+        self,
+        room_name: str,
+        phone_number: str,
+        participant_name: str | None = None,
+        patient_id: str | None = None,
+        campaign_id: str | None = None,
+        media_profile: str | None = None,
+    ):
+        """Insert the ledger row for a call about to be dispatched to room_name."""
+        now = utc_now()
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO calls (
+                    job_id, room_name, patient_id, phone_number, participant_name,
+                    campaign_id, media_profile, status, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, 'dispatched', ?, ?)
+                """,
+                (
+                    room_name, room_name, patient_id,
+                    SupabaseService.normalize_phone_number(phone_number),
+                    participant_name, campaign_id, media_profile, now, now,
+                ),
+            )
+
+    def set_job_id(self, room_name: str, job_id: str) -> bool:
+        """
+        Replace the placeholder job_id once the dispatch has returned the real one.
+
+        Returns:
+            True if a ledger row was updated
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE calls SET job_id = ?, updated_at = ? WHERE room_name = ?",
+                (job_id, utc_now(), room_name),
+            )
+        return cursor.rowcount > 0
+
+    def update_call(self, room_name: str, **fields: Any) -> bool:
+        """
+        Update a call identified by its room name.
+
+        Args:
+            room_name: LiveKit room of the call
+            **fields: Columns to set (see UPDATABLE_COLUMNS)
+
+        Returns:
+            True if a ledger row was updated
+        """
+        unknown = set(fields) - UPDATABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"Cannot update call ledger columns: {', '.join(sorted(unknown))}")
+
+        fields["updated_at"] = utc_now()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                f"UPDATE calls SET {assignments} WHERE room_name = ?",
+                (*fields.values(), room_name),
+            )
+        return cursor.rowcount > 0
+
+    def get_call(self, job_id: str) -> Dict[str, Any] | None:
+        """Return the ledger row for a job ID, or None."""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM calls WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def latest_calls(self, patient_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return each patient's most recent call plus their total call count.
+
+        One indexed query per batch of patients, so exports can join call outcomes
+        onto patient pages without scanning the ledger.
+
+        Args:
+            patient_ids: Patients to look up (at most a few thousand per call)
+
+        Returns:
+            Dict of patient_id -> latest call row with an added call_count
+        """
+        if not patient_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in patient_ids)
+        with self.lock:
+            rows = self.conn.execute(
+                f"""
+                SELECT calls.*, counts.call_count FROM calls
+                JOIN (
+                    SELECT patient_id, MAX(created_at) AS created_at, COUNT(*) AS call_count
+                    FROM calls WHERE patient_id IN ({placeholders}) GROUP BY patient_id
+                ) AS counts USING (patient_id, created_at)
+                """,
+                patient_ids,
+            ).fetchall()
+        return {row["patient_id"]: dict(row) for row in rows}
+
+    def list_calls(
+        self,
+        filters: Dict[str, Any],
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> tuple[List[Dict[str, Any]], str | None]:
+        """
+        List calls newest first.
+
+        Filters on patient_id, phone_number, campaign_id and status use the
+        (column, created_at) indexes; pagination is keyset-based on
+        (created_at, job_id) so deep pages cost the same as the first.
+
+        Args:
+            filters: Column -> value equality filters (None values ignored)
+            since: Only calls created at or after this ISO timestamp
+            until: Only calls created before this ISO timestamp
+            limit: Page size
+            cursor: next_cursor from the previous page
+
+        Returns:
+            Tuple of (calls, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If cursor is not a next_cursor value
+        """
+        clauses, params = [], []
+        for column in FILTER_COLUMNS:
+            value = filters.get(column)
+            if value is None:
+                continue
+            if column == "phone_number":
+                value = SupabaseService.normalize_phone_number(value)
+            clauses.append(f"{column} = ?")
+            params.append(value)
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if cursor:
+            created_at, separator, job_id = cursor.partition("|")
+            if not separator or not created_at or not job_id:
+                raise ValueError(f"Invalid cursor: {cursor!r}")
+            clauses.append("(created_at, job_id) < (?, ?)")
+            params.extend([created_at, job_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM calls {where} ORDER BY created_at DESC, job_id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+
+        calls = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = calls[-1]
+            next_cursor = f"{last['created_at']}|{last['job_id']}"
+        return calls, next_cursor
+
+
+_call_ledger: CallLedger | None = None
+
+
+def get_call_ledger() -> CallLedger:
+    """Return the process-wide call ledger."""
+    global _call_ledger
+    if _call_ledger is None:
+        _call_ledger = CallLedger()
+    return _call_ledger
@@ -0,0 +1,57 @@
+import os
+import time
+import logging
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class FleetCapacityService:
+    """Tracks the latest capacity heartbeat from each agent worker."""
+
+    def __init__(self):
+        # Workers that have not reported within this window are treated as gone
+        self.stale_after = float(os.getenv("CAPACITY_STALE_SECONDS", "15"))
+        self.heartbeats: Dict[str, tuple[Dict[str, Any], float]] = {}
+
+    def record(self, heartbeat: Dict[str, Any]):
+        """Store a worker heartbeat."""
+        self.heartbeats[heartbeat["worker_id"]] = (heartbeat, time.monotonic())
+
+    def report(self, batch_size: int | None = None) -> Dict[str, Any]:
+        """
+        Summarize fleet capacity from recent heartbeats.
+
+        Args:
+            batch_size: Optional number of calls in the next campaign batch
+
+        Returns:
+            Dictionary with live workers, totals and whether the batch fits
+        """
+        cutoff = time.monotonic() - self.stale_after
+        for worker_id, (_, received_at) in list(self.heartbeats.items()):
+            if received_at < cutoff:
+                logger.info("Dropping stale worker heartbeat: %s", worker_id)
+                del self.heartbeats[worker_id]
+
+        workers = [heartbeat for heartbeat, _ in self.heartbeats.values()]
+        available_calls = sum(worker["available_calls"] for worker in workers)
+
+        return {
+            "workers": workers,
+            "active_calls": sum(worker["active_calls"] for worker in workers),
+            "available_calls": available_calls,
+            "batch_size": batch_size,
+            "can_accept_batch": available_calls >= batch_size if batch_size is not None else None,
+        }
+
+
+_capacity_service: FleetCapacityService | None = None
+
+
+def get_capacity_service() -> FleetCapacityService:
+    """Return the process-wide fleet capacity service."""
+    global _capacity_service
+    if _capacity_service is None:
+        _capacity_service = FleetCapacityService()
+    return _capacity_service
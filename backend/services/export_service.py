@@ -0,0 +1,337 @@
+import io
+import csv
+import json
+import re
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from services.stats_service import match_study_types
+
+logger = logging.getLogger(__name__)
+
+# Call outcome columns joined from the call ledger (latest call per patient)
+CALL_COLUMNS: Dict[str, str] = {
+    "call_count": "call_count",
+    "last_call_status": "status",
+    "last_call_outcome": "outcome",
+    "last_call_at": "created_at",
+    "last_call_duration_seconds": "duration_seconds",
+    "last_call_campaign_id": "campaign_id",
+}
+
+# Patient columns filtered upstream with equality filters
+PATIENT_FILTERS = ("status", "eligibility_label")
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+COLUMN_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class ExportQuery:
+    """A validated export request: projection, filters and batch size."""
+
+    def __init__(
+        self,
+        columns: str | None = None,
+        filters: Dict[str, Any] | None = None,
+        study_type: str | None = None,
+        call_outcome: str | None = None,
+        batch_size: int = 1000,
+    ):
+        """
+        Args:
+            columns: Comma-separated output columns (patient and/or call columns); all when omitted
+            filters: Patient column -> value filters (see PATIENT_FILTERS)
+            study_type: Only patients matching this study type
+            call_outcome: Only patients whose latest call has this outcome
+
+        Raises:
+            ValueError if a column or filter name is invalid
+        """
+        requested = [c.strip() for c in columns.split(",") if c.strip()] if columns else []
+        for column in requested:
+            if not COLUMN_NAME.match(column):
+                raise ValueError(f"Invalid column name: {column}")
+
+        self.columns = requested or None
+        self.call_columns = [c for c in requested if c in CALL_COLUMNS] if requested else list(CALL_COLUMNS)
+        patient_columns = [c for c in requested if c not in CALL_COLUMNS]
+        # patient_id drives keyset pagination and the ledger join, so it is always fetched
+        if requested:
+            fetched = list(dict.fromkeys(["patient_id", *patient_columns]))
+            if study_type and "qualified_disease" not in fetched:
+                fetched.append("qualified_disease")
+            self.select = ",".join(fetched)
+        else:
+            self.select = "*"
+
+        self.filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        unknown = set(self.filters) - set(PATIENT_FILTERS)
+        if unknown:
+            raise ValueError(f"Unsupported export filters: {', '.join(sorted(unknown))}")
+        self.study_type = study_type
+        self.call_outcome = call_outcome
+        if call_outcome and "last_call_outcome" not in self.call_columns:
+            self.call_columns.append("last_call_outcome")
+        self.batch_size = batch_size
+        # Output columns in order, once resolved against the table; None until then
+        self.output_columns: List[str] | None = self.columns
+
+    def resolve_columns(self, table_columns: List[str] | None):
+        """
+        Check the projection against the patient table's columns and fix the output columns.
+
+        Called before the response starts, so a bad column is a 400 rather than an
+        error partway through a 200 stream, and an empty result still gets a CSV
+        header or an Arrow/Parquet schema.
+
+        Args:
+            table_columns: CrobotMaster columns, or None if they could not be read (empty table)
+
+        Raises:
+            ValueError if a requested column is neither a patient nor a call column
+        """
+        if table_columns is None:
+            return
+        if self.columns:
+            unknown = [c for c in self.columns if c not in CALL_COLUMNS and c not in table_columns]
+            if unknown:
+                raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+        else:
+            self.output_columns = [*table_columns, *self.call_columns]
+
+
+def fetch_batches(supabase_service, query: ExportQuery) -> Iterator[List[Dict[str, Any]]]:
+    """Stage 1: keyset-paginated patient batches with upstream filters."""
+    yield from supabase_service.iter_patient_batches(query.select, query.batch_size, query.filters)
+
+
+def filter_study_type(batches: Iterable[List[Dict[str, Any]]], study_type: str | None):
+    """Stage 2: keep patients whose qualified disease matches the study type."""
+    for batch in batches:
+        if study_type:
+            batch = [row for row in batch if study_type in match_study_types(row.get("qualified_disease"))]
+        if batch:
+            yield batch
+
+
+def join_call_outcomes(batches: Iterable[List[Dict[str, Any]]], call_ledger, query: ExportQuery):
+    """Stage 3: add each patient's latest call outcome from the call ledger, one query per batch."""
+    for batch in batches:
+        if query.call_columns:
+            latest = call_ledger.latest_calls([row["patient_id"] for row in batch])
+            for row in batch:
+                call = latest.get(row["patient_id"])
+                for column in query.call_columns:
+                    if column == "call_count":
+                        row[column] = call["call_count"] if call else 0
+                    else:
+                        row[column] = call[CALL_COLUMNS[column]] if call else None
+        if query.call_outcome:
+            batch = [row for row in batch if row.get("last_call_outcome") == query.call_outcome]
+        if batch:
+            yield batch
+
+
+def project(batches: Iterable[List[Dict[str, Any]]], columns: List[str] | None):
+    """Stage 4: keep only the requested columns, in request order."""
+    for batch in batches:
+        if columns:
+            batch = [{column: row.get(column) for column in columns} for row in batch]
+        yield batch
+
+
+def export_batches(supabase_service, call_ledger, query: ExportQuery) -> Iterator[List[Dict[str, Any]]]:
+    """Compose the export pipeline; only one batch is held in memory at a time."""
+    batches = fetch_batches(supabase_service, query)
+    batches = filter_study_type(batches, query.study_type)
+    batches = join_call_outcomes(batches, call_ledger, query)
+    return project(batches, query.columns)
+
+
+def encode_csv(batches: Iterable[List[Dict[str, Any]]], columns: List[str] | None = None) -> Iterator[bytes]:
+    """
+    Encode batches as CSV, one chunk per batch.
+
+    The header is written first from columns, or from the first row when the
+    columns aren't known up front.
+    """
+    buffer = io.StringIO()
+    writer = None
+    if columns:
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    for batch in batches:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(batch[0]), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def encode_ndjson(batches: Iterable[List[Dict[str, Any]]], columns: List[str] | None = None) -> Iterator[bytes]:
+    """Encode batches as newline-delimited JSON, one chunk per batch."""
+    for batch in batches:
+        yield "".join(json.dumps(row, default=str) + "\n" for row in batch).encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the generator draining it."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _arrow_schema(columns: List[str]):
+    """
+    Schema for the export columns.
+
+    Call columns keep their types; patient columns are exported as strings because
+    CrobotMaster columns are free-form and a later batch may hold a different type.
+    """
+    import pyarrow as pa
+
+    call_types = {
+        "call_count": pa.int64(),
+        "last_call_duration_seconds": pa.float64(),
+    }
+    return pa.schema([(column, call_types.get(column, pa.string())) for column in columns])
+
+
+def _record_batch(batch: List[Dict[str, Any]], schema):
+    import pyarrow as pa
+
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in batch]
+        if field.type == pa.string():
+            values = [None if v is None else v if isinstance(v, str) else json.dumps(v, default=str) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _encode_arrow_file(batches: Iterable[List[Dict[str, Any]]], columns: List[str] | None, open_writer) -> Iterator[bytes]:
+    """
+    Drive an Arrow-format writer over the batches, yielding bytes as they are written.
+
+    The schema comes from columns, or from the first batch when the columns aren't
+    known up front; with neither, an empty-schema file is written so the output is
+    always a valid file.
+    """
+    sink = _ChunkSink()
+    schema = _arrow_schema(columns) if columns else None
+    writer = open_writer(sink, schema) if schema is not None else None
+    for batch in batches:
+        if writer is None:
+            schema = _arrow_schema(list(batch[0]))
+            writer = open_writer(sink, schema)
+        writer.write_batch(_record_batch(batch, schema))
+        yield sink.drain()
+    if writer is None:
+        writer = open_writer(sink, _arrow_schema([]))
+    writer.close()
+    yield sink.drain()
+
+
+def encode_arrow(batches: Iterable[List[Dict[str, Any]]], columns: List[str] | None = None) -> Iterator[bytes]:
+    """Encode batches as an Arrow IPC stream, one record batch per chunk."""
+    import pyarrow as pa
+
+    def open_writer(sink, schema):
+        return pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+
+    return _encode_arrow_file(batches, columns, open_writer)
+
+
+def encode_parquet(batches: Iterable[List[Dict[str, Any]]], columns: List[str] | None = None) -> Iterator[bytes]:
+    """
+    Encode batches as Parquet, one row group per batch; the footer is written last.
+
+    The writer keeps each row group's metadata until the footer, so memory grows
+    slightly with the number of batches; larger batch sizes keep it down.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def open_writer(sink, schema):
+        return pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+
+    return _encode_arrow_file(batches, columns, open_writer)
+
+
+ENCODERS: Dict[str, Callable[[Iterable[List[Dict[str, Any]]], List[str] | None], Iterator[bytes]]] = {
+    "csv": encode_csv,
+    "ndjson": encode_ndjson,
+    "arrow": encode_arrow,
+    "parquet": encode_parquet,
+}
+
+
+def check_format(export_format: str):
+    """
+    Raises:
+        ValueError if the format is unknown or its encoder's dependency is missing
+        (arrow and parquet need the "export" extra)
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if export_format in ("arrow", "parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError(f"{export_format} export requires pyarrow")
+
+
+def stream_export(supabase_service, call_ledger, query: ExportQuery, export_format: str) -> Iterator[bytes]:
+    """
+    Stream the export in the requested format.
+
+    Args:
+        supabase_service: Source of patient batches (iter_patient_batches)
+        call_ledger: Call ledger for the outcome join
+        query: Validated export query
+        export_format: One of EXPORT_FORMATS
+
+    Yields:
+        Encoded chunks, roughly one per upstream batch
+    """
+    rows = 0
+
+    def counted(batches):
+        nonlocal rows
+        for batch in batches:
+            rows += len(batch)
+            yield batch
+
+    try:
+        batches = counted(export_batches(supabase_service, call_ledger, query))
+        yield from ENCODERS[export_format](batches, query.output_columns)
+    finally:
+        logger.info("Exported %d rows as %s", rows, export_format)
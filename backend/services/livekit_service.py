@@ -4,6 +4,7 @@ import logging
 import uuid
 from typing import Dict, Any
 from livekit import api
+from services.structured_logging import bind_call_context
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +30,12 @@ class LiveKitService:
             api_secret=self.api_secret,
         )
 
-        logger.info(f"LiveKitService initialized with URL: {self.url}")
+        logger.info("LiveKitService initialized with URL: %s", self.url)
+
+    @staticmethod
+    def new_room_name() -> str:
+        """Generate a unique room name for an outbound call."""
+        return f"outbound-call-{uuid.uuid4().hex[:12]}"
 
     async def create_room(self, room_name: str | None = None) -> str:
         """
@@ -42,18 +48,18 @@ class LiveKitService:
             The name of the created room.
         """
         if not room_name:
-            room_name = f"outbound-call-{uuid.uuid4().hex[:12]}"
+            room_name = self.new_room_name()
 
         try:
             # Create the room
             room = await self.livekit_api.room.create_room(
                 api.CreateRoomRequest(name=room_name)
             )
-            logger.info(f"Created LiveKit room: {room.name}")
+            logger.info("Created LiveKit room: %s", room.name)
             return room.name
 
         except Exception as e:
-            logger.error(f"Failed to create LiveKit room: {e}")
+            logger.error("Failed to create LiveKit room: %s", e)
             raise
 
     async def dispatch_agent(
@@ -70,6 +76,9 @@ class LiveKitService:
 
         Returns:
             Job ID of the dispatched agent
+
+        Raises:
+            RuntimeError: If LiveKit returns a dispatch without an ID
         """
         try:
             # Convert trial data to JSON string for metadata
@@ -84,23 +93,22 @@ class LiveKitService:
                 )
             )
 
-            # Get job ID from response - try different possible field names
-            job_id = None
-            if hasattr(job, 'agent_dispatch_id'):
-                job_id = job.agent_dispatch_id
-            elif hasattr(job, 'id'):
-                job_id = job.id
-            else:
-                # If no ID field found, just use the room name as identifier
-                job_id = room_name
+            # The dispatch ID keys the call in the ledger; a call without one couldn't be
+            # tracked, so close the room before the worker dials and fail the launch
+            job_id = job.id
+            if not job_id:
+                await self.livekit_api.room.delete_room(api.DeleteRoomRequest(room=room_name))
+                raise RuntimeError(f"Agent dispatch for room {room_name} returned no dispatch ID")
 
-            logger.info(f"Dispatched agent to room {room_name} with job ID: {job_id}")
-            logger.info(f"Trial data: {trial_data}")
+            bind_call_context(job_id=job_id)
+            logger.info("Dispatched agent to room %s with job ID: %s", room_name, job_id)
+            # Names, phone numbers and conditions are redacted when the record is written
+            logger.debug("Trial data", extra={"trial_data": trial_data})
 
             return job_id
 
         except Exception as e:
-            logger.error(f"Failed to dispatch agent to room {room_name}: {e}")
+            logger.error("Failed to dispatch agent to room %s: %s", room_name, e)
             raise
 
     async def launch_outbound_call(
@@ -112,8 +120,16 @@ class LiveKitService:
         trial_description: str | None = None,
         compensation_info: str | None = None,
         contact_info: str | None = None,
+        trial_duration: str | None = None,
+        canned_answers: Dict[str, str] | None = None,
         sip_trunk_id: str | None = None,
         caller_id: str | None = None,
+        sip_lease_id: str | None = None,
+        media_profile: str | None = None,
+        patient_id: str | None = None,
+        campaign_id: str | None = None,
+        profile: bool = False,
+        room_name: str | None = None,
     ) -> tuple[str, str]:
         """
         Launch an outbound call to a clinical trial participant.
@@ -126,14 +142,23 @@ class LiveKitService:
             trial_description: Description of the trial (optional)
             compensation_info: Compensation details (optional)
             contact_info: Contact information (optional)
+            trial_duration: Trial length and visit schedule, for the fast-path duration answer (optional)
+            canned_answers: Per-trial fast-path answers by intent (optional)
             sip_trunk_id: Override SIP trunk ID (optional)
             caller_id: Override caller ID (optional)
+            sip_lease_id: SIP trunk pool lease the worker reports to and releases (optional)
+            media_profile: Audio processing profile name (optional)
+            patient_id: CrobotMaster patient_id (optional)
+            campaign_id: Campaign identifier (optional)
+            profile: Ask the agent to profile this job (optional)
+            room_name: Room to create, e.g. one already recorded in the call ledger (optional)
 
         Returns:
             Tuple of (room_name, job_id)
         """
         # Create room
-        room_name = await self.create_room()
+        room_name = await self.create_room(room_name)
+        bind_call_context(room=room_name, patient_id=patient_id, campaign_id=campaign_id)
 
         # Prepare trial data for agent
         # Convert "Researcher with expertise in X" to "Patient with X who consented..."
@@ -154,11 +179,26 @@ class LiveKitService:
             "additional_context": patient_context,
         }
 
+        if trial_duration:
+            trial_data["trial_duration"] = trial_duration
+        if canned_answers:
+            trial_data["canned_answers"] = canned_answers
+
         # Add optional SIP configuration overrides
         if sip_trunk_id:
             trial_data["sip_trunk_id"] = sip_trunk_id
         if caller_id:
             trial_data["caller_id"] = caller_id
+        if sip_lease_id:
+            trial_data["sip_lease_id"] = sip_lease_id
+        if media_profile:
+            trial_data["media_profile"] = media_profile
+        if patient_id:
+            trial_data["patient_id"] = patient_id
+        if campaign_id:
+            trial_data["campaign_id"] = campaign_id
+        if profile:
+            trial_data["profile"] = True
 
         # Dispatch agent
         job_id = await self.dispatch_agent(room_name, trial_data)
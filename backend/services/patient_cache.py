@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+def compute_etag(record: Dict[str, Any]) -> str:
+    """Return a strong ETag derived from the record contents."""
+    body = json.dumps(record, sort_keys=True, default=str, separators=(",", ":"))
+    return f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+class PatientCache:
+    """
+    Size-bounded LRU + TTL read-through cache of CrobotMaster records.
+
+    Entries are keyed by patient_id; a secondary index maps normalized phone numbers
+    to patient_id so lookups by either key share one entry. Entries are dropped when
+    a row change for that patient arrives, when they expire, or when evicted as least
+    recently used.
+
+    Every invalidation stamps the patient_id and phone with a new generation. A caller
+    takes generation() before reading the database on a miss and passes it to put(),
+    which refuses the record if either key changed in between, so a row read before
+    a change can't be cached after the change's invalidation. max_entries=0 disables
+    caching.
+    """
+
+    def __init__(self, max_entries: int | None = None, ttl_seconds: float | None = None):
+        if max_entries is None:
+            max_entries = int(os.getenv("PATIENT_CACHE_MAX_ENTRIES", "1024"))
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("PATIENT_CACHE_TTL_SECONDS", "300"))
+        if max_entries < 0:
+            raise ValueError("max_entries must be >= 0")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # patient_id -> (record, etag, expires_at)
+        self.entries: OrderedDict[str, tuple[Dict[str, Any], str, float]] = OrderedDict()
+        self.phone_index: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+        # ("id" | "phone", key) -> generation of its last invalidation; the oldest are
+        # forgotten past CHANGED_KEYS_LIMIT, and loads older than changed_floor refused
+        self.generation_counter = 0
+        self.changed_at: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self.changed_floor = 0
+        self.changed_keys_limit = max(4 * self.max_entries, 4096)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.not_modified = 0
+        self.stale_loads = 0
+
+    @staticmethod
+    def _normalize_phone(phone: str) -> str:
+        from services.supabase_service import SupabaseService
+
+        return SupabaseService.normalize_phone_number(phone)
+
+    def _drop(self, patient_id: str):
+        record, _, _ = self.entries.pop(patient_id)
+        phone = record.get("phone")
+        if phone:
+            normalized = self._normalize_phone(str(phone))
+            # The phone may have moved to another patient's entry since this one was cached
+            if self.phone_index.get(normalized) == patient_id:
+                del self.phone_index[normalized]
+
+    def _mark_changed(self, key: tuple[str, str]):
+        self.generation_counter += 1
+        self.changed_at[key] = self.generation_counter
+        self.changed_at.move_to_end(key)
+        while len(self.changed_at) > self.changed_keys_limit:
+            _, self.changed_floor = self.changed_at.popitem(last=False)
+
+    def _changed_since(self, generation: int, keys: list[tuple[str, str]]) -> bool:
+        if generation < self.changed_floor:
+            return True
+        return any(self.changed_at.get(key, 0) > generation for key in keys)
+
+    def generation(self) -> int:
+        """Return the current generation; take it before loading a record on a miss."""
+        with self.lock:
+            return self.generation_counter
+
+    def get(self, patient_id: str) -> tuple[Dict[str, Any], str] | None:
+        """
+        Look up a record by patient_id.
+
+        Returns:
+            Tuple of (record, etag) or None on a miss
+        """
+        with self.lock:
+            entry = self.entries.get(patient_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            record, etag, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._drop(patient_id)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(patient_id)
+            self.hits += 1
+            return record, etag
+
+    def get_by_phone(self, normalized_phone: str) -> tuple[Dict[str, Any], str] | None:
+        """Look up a record by normalized phone number."""
+        with self.lock:
+            patient_id = self.phone_index.get(normalized_phone)
+        if patient_id is None:
+            with self.lock:
+                self.misses += 1
+            return None
+        return self.get(patient_id)
+
+    def put(self, record: Dict[str, Any], generation: int | None = None) -> str:
+        """
+        Store a record and return its ETag.
+
+        Args:
+            record: Full patient record (must include patient_id)
+            generation: generation() taken before the record was read; the record is
+                not cached if the patient or its phone was invalidated since
+        """
+        patient_id = record["patient_id"]
+        etag = compute_etag(record)
+        phone = record.get("phone")
+        normalized = self._normalize_phone(str(phone)) if phone else None
+
+        with self.lock:
+            if self.max_entries == 0:
+                return etag
+            keys = [("id", patient_id)] + ([("phone", normalized)] if normalized else [])
+            if generation is not None and self._changed_since(generation, keys):
+                self.stale_loads += 1
+                return etag
+
+            if patient_id in self.entries:
+                self._drop(patient_id)
+
+            self.entries[patient_id] = (record, etag, time.monotonic() + self.ttl_seconds)
+            if normalized:
+                previous = self.phone_index.get(normalized)
+                if previous is not None and previous != patient_id and previous in self.entries:
+                    # Two patients can't share a phone lookup; keep the newer record
+                    self._drop(previous)
+                self.phone_index[normalized] = patient_id
+
+            while len(self.entries) > self.max_entries:
+                oldest = next(iter(self.entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+        return etag
+
+    def invalidate(self, patient_id: str | None = None, phone: str | None = None):
+        """Drop the entry for a patient_id and/or phone number, if cached."""
+        normalized = self._normalize_phone(phone) if phone else None
+        with self.lock:
+            if normalized:
+                self._mark_changed(("phone", normalized))
+                if patient_id is None:
+                    patient_id = self.phone_index.get(normalized)
+            if patient_id is not None:
+                self._mark_changed(("id", patient_id))
+            if patient_id is not None and patient_id in self.entries:
+                self._drop(patient_id)
+                self.invalidations += 1
+
+    def apply_change(self, event_type: str, new: Dict[str, Any] | None, old: Dict[str, Any] | None = None):
+        """Patient change feed listener: invalidate the affected patient."""
+        for row in (new, old):
+            if not row:
+                continue
+            self.invalidate(patient_id=row.get("patient_id"))
+            if row.get("phone"):
+                self.invalidate(phone=str(row["phone"]))
+
+    def record_not_modified(self):
+        with self.lock:
+            self.not_modified += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_loads": self.stale_loads,
+                "size": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+_patient_cache: PatientCache | None = None
+
+
+def get_patient_cache() -> PatientCache:
+    """Return the process-wide patient cache."""
+    global _patient_cache
+    if _patient_cache is None:
+        _patient_cache = PatientCache()
+    return _patient_cache
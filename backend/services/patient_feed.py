@@ -0,0 +1,103 @@
+import os
+import logging
+from typing import Any, Callable, Dict, List
+from supabase import acreate_client, AsyncClient
+
+logger = logging.getLogger(__name__)
+
+# Listener signature: (event_type, new_record, old_record)
+PatientChangeListener = Callable[[str, Dict[str, Any] | None, Dict[str, Any] | None], None]
+
+
+def parse_change_payload(payload: Dict[str, Any]) -> tuple[str, Dict[str, Any] | None, Dict[str, Any] | None]:
+    """
+    Normalize a Supabase realtime postgres_changes payload.
+
+    Accepts both the realtime-py shape ({"data": {"type", "record", "old_record"}})
+    and the supabase-js shape ({"eventType", "new", "old"}) used by the dashboard.
+
+    Args:
+        payload: Raw payload delivered by the realtime channel
+
+    Returns:
+        Tuple of (event_type, new_record, old_record); records are None when empty
+    """
+    data = payload.get("data", payload)
+    event_type = (data.get("type") or data.get("eventType") or "").upper()
+    new = data.get("record", data.get("new")) or None
+    old = data.get("old_record", data.get("old")) or None
+    return event_type, new, old
+
+
+class PatientChangeFeed:
+    """Fans out CrobotMaster row changes from Supabase realtime to in-process listeners."""
+
+    def __init__(self):
+        self.url = os.getenv("SUPABASE_URL")
+        self.key = os.getenv("SUPABASE_SK")
+        self.listeners: List[PatientChangeListener] = []
+        self.client: AsyncClient | None = None
+        self.channel = None
+
+    def add_listener(self, listener: PatientChangeListener):
+        """Register a callback invoked for every INSERT, UPDATE and DELETE."""
+        self.listeners.append(listener)
+
+    def publish(self, event_type: str, new: Dict[str, Any] | None, old: Dict[str, Any] | None = None):
+        """
+        Deliver a row change to all listeners.
+
+        Used by the realtime channel, and directly by backend code that writes rows so
+        local state is updated without waiting for the round trip.
+        """
+        for listener in self.listeners:
+            try:
+                listener(event_type, new, old)
+            except Exception as e:
+                logger.error("Patient change listener %r failed on %s: %s", listener, event_type, e)
+
+    def _on_postgres_change(self, payload: Dict[str, Any]):
+        event_type, new, old = parse_change_payload(payload)
+        if event_type in ("INSERT", "UPDATE", "DELETE"):
+            self.publish(event_type, new, old)
+
+    async def start(self):
+        """
+        Subscribe to CrobotMaster changes.
+
+        Raises:
+            ValueError if Supabase configuration is missing
+        """
+        if not self.url or not self.key:
+            raise ValueError(
+                "Missing required Supabase configuration. "
+                "Ensure SUPABASE_URL and SUPABASE_SK are set in environment."
+            )
+
+        self.client = await acreate_client(self.url, self.key)
+        self.channel = self.client.channel("patients-changes")
+        await self.channel.on_postgres_changes(
+            "*",
+            schema="public",
+            table="CrobotMaster",
+            callback=self._on_postgres_change,
+        ).subscribe()
+        logger.info("Subscribed to CrobotMaster realtime changes")
+
+    async def stop(self):
+        """Unsubscribe from realtime changes."""
+        if self.channel is not None:
+            await self.channel.unsubscribe()
+            self.channel = None
+        logger.info("Unsubscribed from CrobotMaster realtime changes")
+
+
+_feed: PatientChangeFeed | None = None
+
+
+def get_patient_feed() -> PatientChangeFeed:
+    """Return the process-wide patient change feed."""
+    global _feed
+    if _feed is None:
+        _feed = PatientChangeFeed()
+    return _feed
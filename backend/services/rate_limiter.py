@@ -0,0 +1,244 @@
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# /dev/shm keeps the limiter state in shared memory on Linux; falls back to the temp dir
+DEFAULT_LIMITER_PATH = (
+    Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(os.getenv("TMPDIR", "/tmp"))
+) / "crobot_provider_quotas.db"
+
+# Default per-host quotas; override with e.g. OPENAI_QUOTA="rps=8,burst=20,concurrency=40"
+DEFAULT_QUOTAS: Dict[str, Dict[str, float]] = {
+    "deepgram": {"rps": 10, "burst": 20, "concurrency": 50},
+    "openai": {"rps": 8, "burst": 20, "concurrency": 50},
+    "cartesia": {"rps": 10, "burst": 20, "concurrency": 20},
+}
+
+# Providers that hold a streaming session for the whole call
+CALL_PROVIDERS = ("deepgram", "openai", "cartesia")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    provider TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    granted INTEGER NOT NULL DEFAULT 0,
+    throttled INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS leases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    provider TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    acquired_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leases_provider ON leases (provider);
+"""
+
+
+def parse_quota(provider: str) -> Dict[str, float]:
+    """Read a provider's quota from <PROVIDER>_QUOTA, falling back to DEFAULT_QUOTAS."""
+    quota = dict(DEFAULT_QUOTAS.get(provider, {"rps": 5, "burst": 10, "concurrency": 10}))
+    override = os.getenv(f"{provider.upper()}_QUOTA")
+    if override:
+        for part in override.split(","):
+            key, value = part.split("=")
+            quota[key.strip()] = float(value)
+    return quota
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class ProviderRateLimiter:
+    """
+    Token-bucket request limiter and concurrency limiter shared by every process on a host.
+
+    State lives in one SQLite file in shared memory; each check runs in a short
+    BEGIN IMMEDIATE transaction, so all worker processes see one bucket per provider.
+    Concurrency slots are leases tagged with the owning pid; leases of dead processes
+    are reclaimed, so a crashed job never leaks quota.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path or os.getenv("PROVIDER_LIMITER_PATH") or DEFAULT_LIMITER_PATH)
+        self.quotas = {provider: parse_quota(provider) for provider in DEFAULT_QUOTAS}
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")  # state is ephemeral by design
+        self.conn.executescript(SCHEMA)
+
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def _refill(self, provider: str, now: float) -> float:
+        """Return the current token count for provider (inside a transaction)."""
+        quota = self.quotas[provider]
+        row = self.conn.execute("SELECT tokens, updated_at FROM buckets WHERE provider = ?", (provider,)).fetchone()
+        if row is None:
+            self.conn.execute(
+                "INSERT INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+                (provider, quota["burst"], now),
+            )
+            return quota["burst"]
+        tokens, updated_at = row
+        return min(quota["burst"], tokens + (now - updated_at) * quota["rps"])
+
+    def try_acquire_request(self, provider: str, cost: float = 1.0) -> bool:
+        """Take cost tokens from the provider's bucket; returns False when throttled."""
+        now = time.time()
+        with self.lock:
+            self._transaction()
+            try:
+                tokens = self._refill(provider, now)
+                granted = tokens >= cost
+                if granted:
+                    tokens -= cost
+                self.conn.execute(
+                    f"UPDATE buckets SET tokens = ?, updated_at = ?, "
+                    f"{'granted' if granted else 'throttled'} = {'granted' if granted else 'throttled'} + 1 "
+                    f"WHERE provider = ?",
+                    (tokens, now, provider),
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return granted
+
+    async def wait_for_request(self, provider: str, timeout: float) -> bool:
+        """
+        Wait up to timeout seconds for a request token.
+
+        Returns:
+            True if a token was taken, False if the wait timed out
+        """
+        deadline = time.monotonic() + timeout
+        delay = 1.0 / self.quotas[provider]["rps"]
+        while True:
+            # The transaction can wait on other processes' locks, so keep it off the event loop
+            if await asyncio.to_thread(self.try_acquire_request, provider):
+                return True
+            if time.monotonic() + delay > deadline:
+                return False
+            await asyncio.sleep(delay)
+
+    def _reclaim_dead_leases(self, provider: str):
+        for lease_id, pid in self.conn.execute(
+            "SELECT id, pid FROM leases WHERE provider = ?", (provider,)
+        ).fetchall():
+            if not _pid_alive(pid):
+                self.conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+
+    def acquire_call_slots(self, providers: tuple[str, ...] = CALL_PROVIDERS) -> list[int] | None:
+        """
+        Take one concurrency slot from every provider a call uses, all or nothing.
+
+        Returns:
+            Lease IDs to pass to release(), or None if any provider is at its limit
+        """
+        now = time.time()
+        with self.lock:
+            self._transaction()
+            try:
+                for provider in providers:
+                    self._reclaim_dead_leases(provider)
+                    (active,) = self.conn.execute(
+                        "SELECT COUNT(*) FROM leases WHERE provider = ?", (provider,)
+                    ).fetchone()
+                    if active >= self.quotas[provider]["concurrency"]:
+                        self.conn.execute("ROLLBACK")
+                        logger.warning("Provider %s at concurrency limit (%d)", provider, active)
+                        return None
+
+                lease_ids = [
+                    self.conn.execute(
+                        "INSERT INTO leases (provider, pid, acquired_at) VALUES (?, ?, ?)",
+                        (provider, os.getpid(), now),
+                    ).lastrowid
+                    for provider in providers
+                ]
+                self.conn.execute("COMMIT")
+                return lease_ids
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def release(self, lease_ids: list[int]):
+        """Return concurrency slots taken by acquire_call_slots()."""
+        with self.lock:
+            self.conn.executemany("DELETE FROM leases WHERE id = ?", [(lease_id,) for lease_id in lease_ids])
+
+    def has_call_capacity(
+        self, providers: tuple[str, ...] = CALL_PROVIDERS, usage: Dict[str, Dict[str, Any]] | None = None
+    ) -> bool:
+        """
+        Whether a new call could get a slot and a request token from every provider.
+
+        Args:
+            providers: Providers the call streams to
+            usage: A usage() result to check instead of reading the shared state again
+        """
+        usage = usage or self.usage()
+        return all(
+            usage[provider]["active"] < usage[provider]["concurrency"] and usage[provider]["tokens"] >= 1
+            for provider in providers
+        )
+
+    def usage(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider quota use: tokens left, active leases and grant/throttle counts."""
+        now = time.time()
+        result = {}
+        with self.lock:
+            self._transaction()
+            try:
+                for provider, quota in self.quotas.items():
+                    self._reclaim_dead_leases(provider)
+                    tokens = self._refill(provider, now)
+                    granted, throttled = self.conn.execute(
+                        "SELECT granted, throttled FROM buckets WHERE provider = ?", (provider,)
+                    ).fetchone()
+                    (active,) = self.conn.execute(
+                        "SELECT COUNT(*) FROM leases WHERE provider = ?", (provider,)
+                    ).fetchone()
+                    result[provider] = {
+                        "rps": quota["rps"],
+                        "burst": quota["burst"],
+                        "tokens": round(tokens, 2),
+                        "concurrency": int(quota["concurrency"]),
+                        "active": active,
+                        "concurrency_used": round(active / quota["concurrency"], 3),
+                        "granted": granted,
+                        "throttled": throttled,
+                    }
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return result
+
+
+_rate_limiter: ProviderRateLimiter | None = None
+
+
+def get_rate_limiter() -> ProviderRateLimiter:
+    """Return this process's handle on the host-wide provider limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = ProviderRateLimiter()
+    return _rate_limiter
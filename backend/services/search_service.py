@@ -0,0 +1,375 @@
+import time
+import heapq
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List
+
+from services.supabase_service import SupabaseService
+
+logger = logging.getLogger(__name__)
+
+# Only the searchable columns are fetched during a full scan
+SEARCH_COLUMNS = "patient_id,name,email,phone"
+SEARCH_FIELDS = ("name", "email", "phone")
+# Position of each field in a stored document tuple (patient_id, name, email, phone)
+FIELD_POSITIONS = {field: position for position, field in enumerate(SEARCH_FIELDS, start=1)}
+# Ties between match types go to the field the dashboard shows first
+FIELD_WEIGHTS = {"name": 3, "email": 2, "phone": 1}
+
+MIN_QUERY_LENGTH = 2
+# Matches verified per candidate pass. Passes run best match type first, so a very broad
+# query (e.g. "com") is only approximate among its weakest matches: those are ranked over
+# the first SCAN_LIMIT in index order, and the response is flagged as truncated
+SCAN_LIMIT = 2000
+# Rarest-postings IDs intersected per step in _candidates
+INTERSECT_CHUNK = 4096
+# Binary search survivors instead of intersecting when a postings range is this many times longer
+SEARCH_RATIO = 16
+# Rebuild postings once this fraction of indexed documents are stale
+COMPACT_RATIO = 0.25
+
+# Match types, best first
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = 4, 3, 2, 1
+MATCH_NAMES = {EXACT: "exact", PREFIX: "prefix", WORD_PREFIX: "word_prefix", SUBSTRING: "substring"}
+# Marks the posting of a value's first two characters, so prefix matches get their own pass
+START = "^"
+
+Document = tuple[str, str, str, str]
+
+
+def normalize_field(field: str, value: Any) -> str:
+    """Lowercase text fields; reduce phones to the digits of SupabaseService's E.164 form."""
+    if value is None:
+        return ""
+    text = str(value).strip()
+    if not text:
+        return ""
+    if field == "phone":
+        return SupabaseService.normalize_phone_number(text).lstrip("+")
+    return " ".join(text.lower().split())
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of a field value, padded so word starts get their own (" jo")."""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def query_trigrams(query: str) -> set[str]:
+    """Trigrams a matching value must contain: its substrings, or " xy" for a 2-character word prefix."""
+    if len(query) < 3:
+        return {f" {query}"}
+    return {query[i:i + 3] for i in range(len(query) - 2)}
+
+
+def candidate_passes(needle: str) -> list[set[str]]:
+    """Trigrams for each candidate pass, best match type first: value start, word start, anywhere."""
+    passes = [query_trigrams(needle) | {START + needle[:2]}, query_trigrams(f" {needle}")]
+    if len(needle) >= 3:
+        passes.append(query_trigrams(needle))
+    return passes
+
+
+def row_documents(rows: Iterable[Dict[str, Any]]) -> Iterable[Document]:
+    for row in rows:
+        yield (row["patient_id"], *(normalize_field(field, row.get(field)) for field in SEARCH_FIELDS))
+
+
+def contains(postings: array, doc_id: int, first: int, last: int) -> bool:
+    i = bisect_left(postings, doc_id, first, last)
+    return i < last and postings[i] == doc_id
+
+
+def match_type(value: str, query: str) -> int | None:
+    if value == query:
+        return EXACT
+    position = value.find(query)
+    if position < 0:
+        return None
+    if position == 0:
+        return PREFIX
+    # The first occurrence may be mid-word ("charles lee" for "le"); look for one at a word start
+    while position > 0:
+        if value[position - 1] in " .@_-":
+            return WORD_PREFIX
+        position = value.find(query, position + 1)
+    # 2-character queries only match word starts (their trigram is " xy")
+    return SUBSTRING if len(query) >= 3 else None
+
+
+class PatientSearchIndex:
+    """
+    In-memory trigram index over patient name, email and phone.
+
+    Each document gets an increasing integer ID; postings are compact sorted
+    array('I') lists per (field, trigram), so ID ranges are found by binary search.
+    A query intersects the postings of its trigrams rarest-first, verifies the
+    surviving candidates against the field values and ranks them by match type
+    (exact > prefix > word prefix > substring), field and value length.
+
+    Updates re-index a patient only when a searchable field changed; the old
+    document becomes stale and postings are compacted once COMPACT_RATIO of them are.
+    Rebuilds and compactions index into fresh structures in a worker thread while
+    the current index keeps serving searches and updates; changes received in the
+    meantime are queued and replayed onto the new index when it is swapped in.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, array] = defaultdict(lambda: array("I"))
+        self.documents: List[Document | None] = []
+        self.doc_ids: Dict[str, int] = {}
+        self.stale = 0
+        self.ready = False
+        self.built_at: datetime | None = None
+        self.queries = 0
+        self.query_seconds = 0.0
+        # Changes to replay onto the index being built in the background, if any
+        self._pending: List[tuple[str, Dict[str, Any] | None, Dict[str, Any] | None]] | None = None
+        # One build at a time, so a reconcile and a compaction don't share the pending queue
+        self._build_lock = asyncio.Lock()
+        self._compaction: asyncio.Task | None = None
+
+    def _add(self, document: Document):
+        doc_id = len(self.documents)
+        self.documents.append(document)
+        self.doc_ids[document[0]] = doc_id
+        for field, position in FIELD_POSITIONS.items():
+            value = document[position]
+            if value:
+                prefix = field[0]
+                for gram in trigrams(value):
+                    self.postings[prefix + gram].append(doc_id)
+                if len(value) >= MIN_QUERY_LENGTH:
+                    self.postings[prefix + START + value[:2]].append(doc_id)
+
+    def _remove(self, patient_id: str):
+        doc_id = self.doc_ids.pop(patient_id, None)
+        if doc_id is not None:
+            self.documents[doc_id] = None
+            self.stale += 1
+
+    def _apply(self, event_type: str, new: Dict[str, Any] | None, old: Dict[str, Any] | None):
+        patient_id = (new or old or {}).get("patient_id")
+        if patient_id is None:
+            return
+        if event_type == "DELETE":
+            self._remove(patient_id)
+        else:
+            doc_id = self.doc_ids.get(patient_id)
+            previous = self.documents[doc_id] if doc_id is not None else (patient_id, "", "", "")
+            # Realtime rows may be partial; fields missing from the payload keep their indexed value
+            document = (patient_id, *(
+                normalize_field(field, new[field]) if field in new else previous[position]
+                for field, position in FIELD_POSITIONS.items()
+            ))
+            if document == previous:
+                return  # e.g. a status update: nothing searchable changed
+            self._remove(patient_id)
+            self._add(document)
+
+        if self.stale > COMPACT_RATIO * len(self.documents):
+            self._start_compaction()
+
+    def apply_change(self, event_type: str, new: Dict[str, Any] | None, old: Dict[str, Any] | None = None):
+        """Patient change feed listener: re-index the changed patient."""
+        self._apply(event_type, new, old)
+        if self._pending is not None:
+            self._pending.append((event_type, new, old))
+
+    def _start_compaction(self):
+        if self._pending is not None or (self._compaction and not self._compaction.done()):
+            return  # the build in progress drops the stale documents anyway
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, tests): compact in place
+            self._swap(self._index(document for document in self.documents if document is not None))
+            return
+        self._compaction = loop.create_task(self._compact())
+
+    async def _compact(self):
+        started = time.perf_counter()
+        # A shallow copy, so the worker thread doesn't see documents added while it runs
+        documents = list(self.documents)
+        replayed = await self._build_in_background(lambda: (document for document in documents if document is not None))
+        logger.info(
+            "Compacted search index to %d patients in %.2fs (%d changes replayed)",
+            len(self.doc_ids), time.perf_counter() - started, replayed,
+        )
+
+    @staticmethod
+    def _index(documents: Iterable[Document]) -> "PatientSearchIndex":
+        fresh = PatientSearchIndex()
+        for document in documents:
+            fresh._add(document)
+        return fresh
+
+    def _swap(self, fresh: "PatientSearchIndex"):
+        """Swap in a fully built index, so searches never see a partial one."""
+        self.postings, self.documents, self.doc_ids = fresh.postings, fresh.documents, fresh.doc_ids
+        self.stale = 0
+
+    async def _build_in_background(self, documents: Callable[[], Iterable[Document]]) -> int:
+        """Index documents in a worker thread, swap the result in and replay the changes received meanwhile."""
+        async with self._build_lock:
+            self._pending = []
+            try:
+                fresh = await asyncio.to_thread(lambda: self._index(documents()))
+                # No await from here on, so no change arrives between the swap and the replay
+                self._swap(fresh)
+                for event_type, new, old in self._pending:
+                    self._apply(event_type, new, old)
+                return len(self._pending)
+            finally:
+                self._pending = None
+
+    def build(self, rows: Iterable[Dict[str, Any]]):
+        """Replace the index with the given patient rows."""
+        self._swap(self._index(row_documents(rows)))
+
+    async def rebuild(self, supabase_service):
+        """
+        Rebuild the index from a full scan of CrobotMaster (searchable columns only).
+
+        The current index keeps serving searches until the new one is swapped in.
+        """
+        started = time.perf_counter()
+        replayed = await self._build_in_background(
+            lambda: row_documents(supabase_service.iter_patients(columns=SEARCH_COLUMNS))
+        )
+        self.ready = True
+        self.built_at = datetime.now(timezone.utc)
+        logger.info(
+            "Built search index for %d patients in %.1fs (%d changes replayed)",
+            len(self.doc_ids), time.perf_counter() - started, replayed,
+        )
+
+    def _candidates(self, field: str, grams: set[str]) -> Iterable[int]:
+        """Document IDs whose field has every one of the postings keys, in index order."""
+        prefix = field[0]
+        lists = []
+        for gram in grams:
+            postings = self.postings.get(prefix + gram)
+            if not postings:
+                return ()
+            lists.append(postings)
+        lists.sort(key=len)
+        rarest, others = lists[0], lists[1:]
+
+        # Intersect a chunk of the rarest postings at a time with the matching ID range of
+        # the others, so set operations run in C and broad queries can stop after SCAN_LIMIT
+        for start in range(0, len(rarest), INTERSECT_CHUNK):
+            chunk = rarest[start:start + INTERSECT_CHUNK]
+            low, high = chunk[0], chunk[-1]
+            survivors = set(chunk)
+            for postings in others:
+                first = bisect_left(postings, low)
+                last = bisect_right(postings, high, first)
+                if last - first > SEARCH_RATIO * len(survivors):
+                    # Few survivors against a long run: binary search each instead of scanning it
+                    survivors = {doc_id for doc_id in survivors if contains(postings, doc_id, first, last)}
+                else:
+                    survivors.intersection_update(postings[first:last])
+                if not survivors:
+                    break
+            yield from sorted(survivors)
+
+    def search(self, query: str, limit: int = 20) -> tuple[List[Dict[str, Any]], bool]:
+        """
+        Return the top matches for a name, email or phone query.
+
+        Candidates are verified in passes, best match type first, and later passes are
+        skipped once there are more matches than the limit.
+
+        Args:
+            query: Search text; digits-only queries (any phone format) also search phones
+            limit: Maximum number of results
+
+        Returns:
+            (results, truncated): ranked results with patient_id, matched field, match
+            type and score, and whether more patients matched than were returned
+        """
+        started = time.perf_counter()
+        text = " ".join(query.lower().split())
+        if len(text) < MIN_QUERY_LENGTH:
+            return [], False
+
+        searches = [("name", text), ("email", text)]
+        digits = "".join(c for c in query if c.isdigit())
+        if len(digits) >= MIN_QUERY_LENGTH and not any(c.isalpha() for c in query):
+            # A complete number is normalized like stored phones, so any format matches
+            if len(digits) >= 10:
+                digits = normalize_field("phone", query)
+            searches = [("phone", digits)]
+
+        best: Dict[int, tuple[tuple[int, int, int], str, int]] = {}
+        verified = {field: set() for field, _ in searches}
+        passes = {field: candidate_passes(needle) for field, needle in searches}
+        scan_limited = False
+        for stage in range(max(len(field_passes) for field_passes in passes.values())):
+            matched = 0
+            for field, needle in searches:
+                if stage >= len(passes[field]):
+                    continue
+                for doc_id in self._candidates(field, passes[field][stage]):
+                    document = self.documents[doc_id]
+                    if document is None or doc_id in verified[field]:
+                        continue
+                    verified[field].add(doc_id)
+                    value = document[FIELD_POSITIONS[field]]
+                    kind = match_type(value, needle)
+                    if kind is None:
+                        continue
+                    score = (kind, FIELD_WEIGHTS[field], -len(value))
+                    if doc_id not in best or score > best[doc_id][0]:
+                        best[doc_id] = (score, field, kind)
+                    matched += 1
+                    if matched >= SCAN_LIMIT:
+                        scan_limited = True
+                        break
+                if scan_limited:
+                    break
+            # Later passes only find weaker match types, which can't make the top results
+            if scan_limited or len(best) > limit:
+                break
+
+        top = heapq.nlargest(limit, best.items(), key=lambda item: item[1][0])
+        self.queries += 1
+        self.query_seconds += time.perf_counter() - started
+        results = [
+            {
+                "patient_id": self.documents[doc_id][0],
+                "field": field,
+                "match": MATCH_NAMES[kind],
+                "score": kind * 10 + score[1],
+            }
+            for doc_id, (score, field, kind) in top
+        ]
+        return results, scan_limited or len(best) > limit
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "patients": len(self.doc_ids),
+            "stale_documents": self.stale,
+            "trigrams": len(self.postings),
+            "postings": sum(len(postings) for postings in self.postings.values()),
+            "queries": self.queries,
+            "avg_query_ms": round(self.query_seconds / self.queries * 1000, 2) if self.queries else None,
+            "built_at": self.built_at.isoformat() if self.built_at else None,
+        }
+
+
+_search_index: PatientSearchIndex | None = None
+
+
+def get_search_index() -> PatientSearchIndex:
+    """Return the process-wide patient search index."""
+    global _search_index
+    if _search_index is None:
+        _search_index = PatientSearchIndex()
+    return _search_index
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# Keyword aliases per study type - must stay in sync with matchesStudyType() in
+# frontend/bootstrapping-hackathon/app/dashboard/page.tsx
+STUDY_TYPE_KEYWORDS: Dict[str, tuple[str, ...]] = {
+    "Diabetes": ("diabetes",),
+    "CKD": ("ckd", "kidney"),
+    "CVD": ("cardiovascular", "cvd", "heart"),
+    "Oncology": ("oncology", "cancer"),
+    "Dermatology": ("dermatology", "eczema", "skin"),
+    "Metabolic": ("metabolic", "obesity"),
+    "Neurology": ("neurology", "stroke"),
+}
+
+# Only the columns the counters depend on are fetched during a full scan
+STATS_COLUMNS = "patient_id,qualified_disease,status,eligibility_label"
+TRACKED_FIELDS = ("qualified_disease", "status", "eligibility_label")
+
+
+def match_study_types(qualified_disease: str | None) -> tuple[str, ...]:
+    """Return every study type whose keywords appear in the qualified disease string."""
+    disease = (qualified_disease or "").lower()
+    return tuple(
+        study_type
+        for study_type, keywords in STUDY_TYPE_KEYWORDS.items()
+        if any(keyword in disease for keyword in keywords)
+    )
+
+
+class StatsCounters:
+    """Per-study-type, per-status and per-eligibility-label patient counts."""
+
+    def __init__(self):
+        self.total = 0
+        self.study_types: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.eligibility_labels: Counter = Counter()
+
+    def add(self, row: Dict[str, Any], sign: int = 1):
+        self.total += sign
+        for study_type in match_study_types(row.get("qualified_disease")):
+            self.study_types[study_type] += sign
+        self.statuses[row.get("status") or "Pending"] += sign
+        self.eligibility_labels[row.get("eligibility_label") or "Pending"] += sign
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "study_types": {t: self.study_types.get(t, 0) for t in STUDY_TYPE_KEYWORDS},
+            "statuses": {k: v for k, v in self.statuses.items() if v},
+            "eligibility_labels": {k: v for k, v in self.eligibility_labels.items() if v},
+        }
+
+
+def diff_counters(live: Dict[str, Any], scanned: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the non-zero (live - scanned) differences between two as_dict() snapshots."""
+    drift: Dict[str, Any] = {}
+    if live["total"] != scanned["total"]:
+        drift["total"] = live["total"] - scanned["total"]
+    for dimension in ("study_types", "statuses", "eligibility_labels"):
+        keys = set(live[dimension]) | set(scanned[dimension])
+        delta = {
+            key: live[dimension].get(key, 0) - scanned[dimension].get(key, 0)
+            for key in keys
+        }
+        delta = {key: value for key, value in delta.items() if value}
+        if delta:
+            drift[dimension] = delta
+    return drift
+
+
+class PatientStatsService:
+    """
+    Dashboard aggregates maintained incrementally from CrobotMaster row changes.
+
+    Counters are built once from a full scan, then adjusted by apply_change() for
+    each INSERT/UPDATE/DELETE so reads never touch the database. The tracked
+    fields of every patient are kept so deltas can be computed even when the
+    realtime payload carries only the primary key (DELETE) or a partial row.
+    """
+
+    def __init__(self):
+        self.counters = StatsCounters()
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.ready = False
+        self.built_at: datetime | None = None
+        self.last_change_at: datetime | None = None
+        # Changes received while a rebuild is scanning are queued and replayed
+        self._pending: List[tuple[str, Dict[str, Any] | None, Dict[str, Any] | None]] | None = None
+        # One scan at a time, so concurrent reconciles don't share the pending queue
+        self._rebuild_lock = asyncio.Lock()
+
+    def _apply(self, event_type: str, new: Dict[str, Any] | None, old: Dict[str, Any] | None):
+        patient_id = (new or old or {}).get("patient_id")
+        if patient_id is None:
+            return
+
+        previous = self.rows.pop(patient_id, None)
+        if previous is not None:
+            self.counters.add(previous, sign=-1)
+
+        if event_type == "DELETE":
+            return
+
+        # Realtime UPDATEs carry the full row; merge so partial rows keep unchanged fields
+        row = dict(previous or {})
+        row.update({field: new[field] for field in TRACKED_FIELDS if field in new})
+        self.rows[patient_id] = row
+        self.counters.add(row)
+
+    def apply_change(self, event_type: str, new: Dict[str, Any] | None, old: Dict[str, Any] | None = None):
+        """
+        Apply a single row change to the counters.
+
+        Args:
+            event_type: "INSERT", "UPDATE" or "DELETE"
+            new: New row (None for DELETE)
+            old: Previous row or primary key (may be None)
+        """
+        if self._pending is not None:
+            self._pending.append((event_type, new, old))
+            return
+
+        self._apply(event_type, new, old)
+        self.last_change_at = datetime.now(timezone.utc)
+
+    def _build(self, rows: Iterable[Dict[str, Any]]) -> tuple[StatsCounters, Dict[str, Dict[str, Any]]]:
+        counters = StatsCounters()
+        tracked: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            entry = {field: row.get(field) for field in TRACKED_FIELDS}
+            tracked[row["patient_id"]] = entry
+            counters.add(entry)
+        return counters, tracked
+
+    async def rebuild(self, supabase_service) -> Dict[str, Any]:
+        """
+        Rebuild the counters from a full scan of CrobotMaster.
+
+        Args:
+            supabase_service: SupabaseService used to scan the table
+
+        Returns:
+            Drift between the counters before the rebuild and the scan result
+            (empty when they agreed, or on the first build)
+        """
+        async with self._rebuild_lock:
+            self._pending = []
+            try:
+                rows = await asyncio.to_thread(
+                    lambda: list(supabase_service.iter_patients(columns=STATS_COLUMNS))
+                )
+                counters, tracked = self._build(rows)
+            except BaseException:
+                # Keep the queued changes: apply them to the counters we still have
+                pending, self._pending = self._pending, None
+                for event_type, new, old in pending:
+                    self._apply(event_type, new, old)
+                raise
+
+            drift = diff_counters(self.counters.as_dict(), counters.as_dict()) if self.ready else {}
+            self.counters, self.rows = counters, tracked
+            self.ready = True
+            self.built_at = datetime.now(timezone.utc)
+
+            pending, self._pending = self._pending, None
+            for event_type, new, old in pending:
+                self._apply(event_type, new, old)
+
+        logger.info("Built dashboard stats from %d patients (%d changes replayed)", len(tracked), len(pending))
+        return drift
+
+    async def reconcile(self, supabase_service) -> Dict[str, Any]:
+        """
+        Compare the live counters against a full scan and repair any drift.
+
+        Returns:
+            Dictionary with consistency flag, drift (live - scanned) and repaired stats
+        """
+        drift = await self.rebuild(supabase_service)
+        if drift:
+            logger.warning("Dashboard stats drift repaired: %s", drift)
+        return {
+            "consistent": not drift,
+            "drift": drift,
+            "stats": self.snapshot(),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current counts; O(number of distinct keys), independent of table size."""
+        return {
+            **self.counters.as_dict(),
+            "built_at": self.built_at.isoformat() if self.built_at else None,
+            "last_change_at": self.last_change_at.isoformat() if self.last_change_at else None,
+        }
+
+
+_stats_service: PatientStatsService | None = None
+
+
+def get_stats_service() -> PatientStatsService:
+    """Return the process-wide dashboard stats service."""
+    global _stats_service
+    if _stats_service is None:
+        _stats_service = PatientStatsService()
+    return _stats_service
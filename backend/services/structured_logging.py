@@ -0,0 +1,211 @@
+import os
+import re
+import sys
+import json
+import zlib
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+# Records waiting for the listener thread; past this they are dropped rather than block the caller
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of calls (by room) logged at DEBUG when LOG_LEVEL is above DEBUG
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0"))
+# "text" (the existing line format plus call context) or "json"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Record attributes and dict keys whose values identify a patient
+PII_FIELDS = {
+    "participant_name", "participant_identity", "name", "first_name", "last_name",
+    "phone_number", "phone", "sip_call_to", "email", "transcript",
+    "eligibility_criteria", "additional_context", "participant_context",
+}
+# Phone-shaped numbers only: E.164 ("+15550102000"), international with separators
+# ("+44 20 7946 0958") and NANP ("(555) 010-2000", "555.010.2000", "1-555-010-2000").
+# NANP area codes start with 2-9 and digit runs must stand alone, so timestamps, dates,
+# epochs and IDs are left as they are
+PHONE_PATTERN = re.compile(
+    r"(?<![\w.+-])(?:"
+    r"\+[1-9]\d{7,14}"
+    r"|\+\d{1,3}(?:[\s.-]\(?\d{1,4}\)?){2,5}"
+    r"|(?:\+?1[\s.-]?)?(?:\([2-9]\d{2}\)\s?|[2-9]\d{2}[\s.-]?)\d{3}[\s.-]?\d{4}"
+    r")(?![\w-]|\.\d)"
+)
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+# Attributes every LogRecord has; anything else was passed in extra=
+STANDARD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "call_context", "taskName"}
+
+_call_context: ContextVar[Dict[str, Any]] = ContextVar("call_context", default={})
+
+
+def bind_call_context(**fields):
+    """
+    Attach fields (room, job_id, call_state, ...) to every record logged from this context.
+
+    Context variables follow asyncio tasks, so binding at the top of a job or request
+    covers every task it starts afterwards. Binding a room also decides whether this
+    call is sampled for DEBUG records.
+    """
+    context = {**_call_context.get(), **{key: value for key, value in fields.items() if value is not None}}
+    if "room" in fields and "debug" not in context:
+        context["debug"] = zlib.crc32(str(fields["room"]).encode()) % 10000 < LOG_DEBUG_SAMPLE_RATE * 10000
+    _call_context.set(context)
+
+
+def call_context() -> Dict[str, Any]:
+    return _call_context.get()
+
+
+def mask_phone(value: Any) -> str:
+    digits = re.sub(r"\D", "", str(value))
+    if len(digits) < 10:
+        return str(value)
+    return f"***{digits[-2:]}"
+
+
+def redact_text(text: str) -> str:
+    """Mask phone numbers and email addresses in free text."""
+    text = PHONE_PATTERN.sub(lambda match: mask_phone(match.group()), text)
+    return EMAIL_PATTERN.sub("[email]", text)
+
+
+def redact_value(key: str, value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: redact_value(k, v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Items are redacted as values of the enclosing key ("phone": [...] masks each)
+        items = [redact_value(key, item) for item in value]
+        return items if isinstance(value, list) else tuple(items)
+    if key in PII_FIELDS and value:
+        return mask_phone(value) if "phone" in key or key in ("sip_call_to", "participant_identity") else "[redacted]"
+    if isinstance(value, str):
+        return redact_text(value)
+    return value
+
+
+class CallContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread without formatting them.
+
+    The stock QueueHandler renders every message on the calling thread; here the
+    caller only snapshots the call context and enqueues, so %-style arguments are
+    rendered (and redacted) on the listener thread. Pass values, not objects the
+    caller mutates right after logging. DEBUG records outside a sampled call are
+    dropped before they are queued.
+    """
+
+    def __init__(self, log_queue: queue.Queue, debug_all: bool):
+        super().__init__(log_queue)
+        self.debug_all = debug_all
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and not self.debug_all:
+            context = _call_context.get()
+            sampled = context["debug"] if "debug" in context else random.random() < LOG_DEBUG_SAMPLE_RATE
+            if not sampled:
+                return False
+        return super().filter(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.call_context = _call_context.get()  # bound dicts are replaced, never mutated
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RedactingQueueListener(logging.handlers.QueueListener):
+    """Renders and redacts records on the listener thread before the real handlers see them."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = redact_text(message), None, None
+        for key in record.__dict__.keys() - STANDARD_ATTRS:
+            setattr(record, key, redact_value(key, record.__dict__[key]))
+        record.call_context = {key: value for key, value in getattr(record, "call_context", {}).items() if key != "debug"}
+        return record
+
+
+class ContextFormatter(logging.Formatter):
+    """The usual text line, followed by the call context and extra fields as key=value."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        fields = {**getattr(record, "call_context", {}), **{key: record.__dict__[key] for key in record.__dict__.keys() - STANDARD_ATTRS}}
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record: level, logger, message, call context and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+            **getattr(record, "call_context", {}),
+            **{key: record.__dict__[key] for key in record.__dict__.keys() - STANDARD_ATTRS},
+        }
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+_listener: RedactingQueueListener | None = None
+_handler: CallContextQueueHandler | None = None
+
+
+def configure_logging(level: str | None = None) -> CallContextQueueHandler:
+    """
+    Route this process's logging through a queue and a listener thread.
+
+    Whatever handlers the root logger already has (livekit's IPC forwarder in a
+    job process, or a stream handler added here when there are none) move behind
+    the listener, so formatting, redaction and I/O leave the event loop. Safe to
+    call more than once.
+    """
+    global _listener, _handler
+    if _handler is not None:
+        return _handler
+
+    level_no = logging.getLevelName((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    if not handlers:
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(JsonLineFormatter() if LOG_FORMAT == "json" else ContextFormatter(TEXT_FORMAT))
+        handlers.append(stream)
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _handler = CallContextQueueHandler(log_queue, debug_all=level_no <= logging.DEBUG)
+    root.addHandler(_handler)
+    # Sampled calls need DEBUG records created; the queue handler drops the rest
+    root.setLevel(logging.DEBUG if LOG_DEBUG_SAMPLE_RATE > 0 else level_no)
+
+    _listener = RedactingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _handler
+
+
+def flush_logs():
+    """Block until the listener has handled everything queued so far (call off the event loop)."""
+    if _listener is not None and _listener._thread is not None:
+        _handler.queue.join()
@@ -1,7 +1,9 @@
 import os
 import logging
 from datetime import datetime, timezone
+from typing import Any, Dict, List
 from supabase import create_client, Client
+from services.patient_cache import PatientCache, get_patient_cache
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +11,12 @@ logger = logging.getLogger(__name__)
 class SupabaseService:
     """Service for interacting with Supabase database."""
 
-    def __init__(self):
+    def __init__(self, cache: PatientCache | None = None):
+        """
+        Args:
+            cache: Patient cache to read through; defaults to the process-wide cache,
+                which the API keeps fresh from the patient change feed
+        """
         self.url = os.getenv("SUPABASE_URL")
         self.key = os.getenv("SUPABASE_SK")  # Service key for backend operations
 
@@ -21,9 +28,11 @@ class SupabaseService:
 
         # Create Supabase client
         self.client: Client = create_client(self.url, self.key)
+        self.cache = cache if cache is not None else get_patient_cache()
         logger.info("SupabaseService initialized successfully")
 
-    def normalize_phone_number(self, phone: str) -> str:
+    @staticmethod
+    def normalize_phone_number(phone: str) -> str:
         """
         Normalize phone number format for consistent matching.
 
@@ -69,7 +78,7 @@ class SupabaseService:
             # Get current timestamp in ISO format with timezone
             current_timestamp = datetime.now(timezone.utc).isoformat()
 
-            logger.info(f"Updating status for phone: {normalized_phone} to '{status}' at {current_timestamp}")
+            logger.info("Updating status for phone: %s to '%s' at %s", normalized_phone, status, current_timestamp)
 
             # Update both status and last_contacted columns
             update_data = {
@@ -89,7 +98,7 @@ class SupabaseService:
             # If no match found, try without +1 prefix
             if not result.data:
                 phone_without_plus = normalized_phone.lstrip('+')
-                logger.info(f"Trying alternate format: {phone_without_plus}")
+                logger.info("Trying alternate format: %s", phone_without_plus)
                 result = (
                     self.client.table("CrobotMaster")
                     .update(update_data)
@@ -100,7 +109,7 @@ class SupabaseService:
             # If still no match, try with just the 10 digits
             if not result.data and len(normalized_phone) > 10:
                 last_10_digits = normalized_phone[-10:]
-                logger.info(f"Trying last 10 digits: {last_10_digits}")
+                logger.info("Trying last 10 digits: %s", last_10_digits)
                 result = (
                     self.client.table("CrobotMaster")
                     .update(update_data)
@@ -109,7 +118,10 @@ class SupabaseService:
                 )
 
             if result.data:
-                logger.info(f"Successfully updated {len(result.data)} record(s) to status '{status}' with timestamp")
+                for record in result.data:
+                    self.cache.invalidate(patient_id=record.get("patient_id"))
+                self.cache.invalidate(phone=normalized_phone)
+                logger.info("Successfully updated %d record(s) to status '%s' with timestamp", len(result.data), status)
                 return {
                     "success": True,
                     "message": f"Updated {len(result.data)} record(s)",
@@ -118,20 +130,48 @@ class SupabaseService:
                     "last_contacted": current_timestamp
                 }
             else:
-                logger.warning(f"No records found for phone number: {normalized_phone}")
+                logger.warning("No records found for phone number: %s", normalized_phone)
                 return {
                     "success": False,
-                    "message": f"No records found for phone number: {normalized_phone}",
+                    "message": "No records found for this phone number",
                     "phone": normalized_phone
                 }
 
         except Exception as e:
-            logger.error(f"Failed to update patient status: {e}")
+            logger.error("Failed to update patient status: %s", e)
             raise
 
+    async def get_patient(self, patient_id: str) -> tuple[dict, str] | None:
+        """
+        Retrieve patient record by patient_id, served from the patient cache when fresh.
+
+        Args:
+            patient_id: Primary key of the patient
+
+        Returns:
+            Tuple of (patient record, ETag) or None if not found
+        """
+        cached = self.cache.get(patient_id)
+        if cached:
+            return cached
+
+        generation = self.cache.generation()
+        result = (
+            self.client.table("CrobotMaster")
+            .select("*")
+            .eq("patient_id", patient_id)
+            .execute()
+        )
+
+        if result.data:
+            record = result.data[0]
+            return record, self.cache.put(record, generation)
+
+        return None
+
     async def get_patient_by_phone(self, phone_number: str) -> dict | None:
         """
-        Retrieve patient record by phone number.
+        Retrieve patient record by phone number, served from the patient cache when fresh.
 
         Args:
             phone_number: Phone number of the participant
@@ -142,6 +182,11 @@ class SupabaseService:
         try:
             normalized_phone = self.normalize_phone_number(phone_number)
 
+            cached = self.cache.get_by_phone(normalized_phone)
+            if cached:
+                return cached[0]
+
+            generation = self.cache.generation()
             result = (
                 self.client.table("CrobotMaster")
                 .select("*")
@@ -150,10 +195,92 @@ class SupabaseService:
             )
 
             if result.data and len(result.data) > 0:
+                self.cache.put(result.data[0], generation)
                 return result.data[0]
 
             return None
 
         except Exception as e:
-            logger.error(f"Failed to retrieve patient: {e}")
+            logger.error("Failed to retrieve patient: %s", e)
             return None
+
+    def iter_patients(self, columns: str = "*", batch_size: int = 1000):
+        """
+        Yield every patient record, fetching in batches ordered by patient_id.
+
+        Args:
+            columns: Comma-separated column list to select (must include patient_id)
+            batch_size: Number of rows to fetch per request
+
+        Yields:
+            Patient record dicts
+        """
+        for batch in self.iter_patient_batches(columns, batch_size):
+            yield from batch
+
+    def patient_columns(self) -> List[str] | None:
+        """
+        Return the CrobotMaster column names, read from one row.
+
+        Returns:
+            Column names in table order, or None if the table is empty
+        """
+        result = self.client.table("CrobotMaster").select("*").limit(1).execute()
+        return list(result.data[0]) if result.data else None
+
+    def iter_patient_batches(
+        self,
+        columns: str = "*",
+        batch_size: int = 1000,
+        filters: Dict[str, Any] | None = None,
+    ):
+        """
+        Yield lists of patient records, ordered by patient_id.
+
+        Batches are fetched with keyset pagination (patient_id > last seen) so each
+        request stays cheap no matter how deep into the table the scan is.
+
+        Args:
+            columns: Comma-separated column list to select (must include patient_id)
+            batch_size: Number of rows to fetch per request
+            filters: Column -> value equality filters applied upstream
+
+        Yields:
+            Lists of up to batch_size patient record dicts
+        """
+        last_id = None
+        while True:
+            query = (
+                self.client.table("CrobotMaster")
+                .select(columns)
+                .order("patient_id")
+                .limit(batch_size)
+            )
+            for column, value in (filters or {}).items():
+                query = query.eq(column, value)
+            if last_id is not None:
+                query = query.gt("patient_id", last_id)
+
+            rows = query.execute().data or []
+            if rows:
+                yield rows
+
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["patient_id"]
+
+
+_supabase_service: SupabaseService | None = None
+
+
+def get_supabase_service() -> SupabaseService:
+    """
+    Return a process-wide SupabaseService, created on first use.
+
+    Raises:
+        ValueError if Supabase configuration is missing
+    """
+    global _supabase_service
+    if _supabase_service is None:
+        _supabase_service = SupabaseService()
+    return _supabase_service
@@ -0,0 +1,392 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Shared by the API (which picks trunks) and the agent workers (which report dial results)
+DEFAULT_POOL_PATH = (
+    Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(os.getenv("TMPDIR", "/tmp"))
+) / "crobot_sip_trunks.db"
+
+# Concurrent calls per trunk when the pool comes from OUTBOUND_SIP_TRUNK_ID
+DEFAULT_TRUNK_CAPACITY = int(os.getenv("SIP_TRUNK_CAPACITY", "20"))
+# Consecutive trunk failures (TwirpErrors with a trunk-side SIP status) that take a trunk out of rotation
+FAILURE_THRESHOLD = int(os.getenv("SIP_TRUNK_FAILURE_THRESHOLD", "5"))
+# Seconds a tripped trunk stays out before one probe call is let through; doubles on each failed probe
+COOLDOWN_SECONDS = float(os.getenv("SIP_TRUNK_COOLDOWN_SECONDS", "60"))
+MAX_COOLDOWN_SECONDS = float(os.getenv("SIP_TRUNK_MAX_COOLDOWN_SECONDS", "900"))
+# Leases are released by the worker when the call ends and renewed by it every
+# LEASE_HEARTBEAT_SECONDS while the call runs. A lease not renewed within the TTL
+# (the job never ran, or its worker died) is reclaimed, so the TTL is a bound on
+# dispatch delay rather than on call length
+LEASE_TTL_SECONDS = float(os.getenv("SIP_TRUNK_LEASE_TTL_SECONDS", "90"))
+LEASE_HEARTBEAT_SECONDS = LEASE_TTL_SECONDS / 3
+
+# Weight of the latest dial result in a trunk's health score (an EWMA of successes)
+HEALTH_ALPHA = 0.2
+# Floor on health when weighting load, so a degraded trunk still gets some traffic
+MIN_HEALTH = 0.1
+
+# SIP responses that point at the trunk: rejected credentials or caller ID (401, 403,
+# 407), no final response from the carrier (408), no common codec (488) and
+# carrier/server errors (5xx). Anything else - busy, declined, temporarily unavailable,
+# no such number - describes the callee and leaves the trunk's health untouched.
+# A phone that rings out never gets here: the agent stops waiting at 60s, before
+# LiveKit's own ringing timeout, and doesn't record a result.
+TRUNK_SIP_STATUSES = {"401", "403", "407", "408", "488"}
+# TwirpError codes that count against the trunk when the error carries no SIP status:
+# the INVITE never got a response
+TRUNK_TWIRP_CODES = {"deadline_exceeded", "unavailable"}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trunks (
+    trunk_id TEXT PRIMARY KEY,
+    health REAL NOT NULL DEFAULT 1.0,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    open_until REAL,
+    cooldown REAL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS leases (
+    lease_id TEXT PRIMARY KEY,
+    trunk_id TEXT NOT NULL,
+    caller_id TEXT NOT NULL,
+    probe INTEGER NOT NULL DEFAULT 0,
+    acquired_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leases_trunk ON leases (trunk_id);
+"""
+
+
+def parse_trunk_pool() -> List[Dict[str, Any]]:
+    """
+    Read the trunk pool from SIP_TRUNK_POOL, falling back to OUTBOUND_SIP_TRUNK_ID.
+
+    SIP_TRUNK_POOL is a JSON list of trunks; caller IDs are numbers authorized on that
+    trunk, optionally with their own concurrent call limit:
+        [{"trunk_id": "ST_abc", "capacity": 30,
+          "caller_ids": ["+15550001111", {"number": "+15550002222", "capacity": 5}]}]
+
+    Without it, OUTBOUND_SIP_TRUNK_ID and TWILIO_CALLER_ID (comma-separated for several
+    numbers) form a single trunk of SIP_TRUNK_CAPACITY calls.
+    """
+    raw = os.getenv("SIP_TRUNK_POOL")
+    if raw:
+        entries = json.loads(raw)
+    elif os.getenv("OUTBOUND_SIP_TRUNK_ID") and os.getenv("TWILIO_CALLER_ID"):
+        entries = [{
+            "trunk_id": os.getenv("OUTBOUND_SIP_TRUNK_ID"),
+            "caller_ids": [number.strip() for number in os.getenv("TWILIO_CALLER_ID").split(",")],
+        }]
+    else:
+        return []
+    return normalize_trunks(entries)
+
+
+def normalize_trunks(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill in default capacities and expand plain caller ID strings."""
+    trunks = []
+    for entry in entries:
+        capacity = int(entry.get("capacity", DEFAULT_TRUNK_CAPACITY))
+        caller_ids = [
+            {"number": caller, "capacity": capacity} if isinstance(caller, str)
+            else {"number": caller["number"], "capacity": int(caller.get("capacity", capacity))}
+            for caller in entry.get("caller_ids", [])
+        ]
+        if not caller_ids:
+            raise ValueError(f"SIP trunk {entry['trunk_id']} has no caller IDs")
+        trunks.append({"trunk_id": entry["trunk_id"], "capacity": capacity, "caller_ids": caller_ids})
+    return trunks
+
+
+def is_trunk_failure(sip_status_code: str | None, twirp_code: str | None = None) -> bool:
+    """
+    Whether a TwirpError counts against the trunk (as opposed to the callee being busy etc.).
+
+    The SIP status decides when there is one; otherwise the Twirp error code does.
+    """
+    code = str(sip_status_code or "")
+    if not code:
+        return twirp_code in TRUNK_TWIRP_CODES
+    return code in TRUNK_SIP_STATUSES or (len(code) == 3 and code.startswith("5"))
+
+
+class SIPTrunkPool:
+    """
+    Pool of outbound SIP trunks and caller IDs, shared by every process on a host.
+
+    The API leases a trunk and caller ID for each call it dispatches; the worker
+    renews the lease while the call runs, reports the dial result and releases the
+    lease when the job ends. A call goes to
+    the trunk with the lowest load relative to its capacity and health, and to that
+    trunk's least busy caller ID.
+
+    Each trunk has a circuit breaker: FAILURE_THRESHOLD consecutive trunk-side TwirpErrors
+    (see is_trunk_failure; a call nobody answers is not one) open it, and it gets no calls for a cooldown. After that, one probe call is
+    let through (half-open); success puts the trunk back in rotation, failure reopens it
+    for twice as long.
+
+    State lives in one SQLite file like ProviderRateLimiter's, and each decision runs
+    in a BEGIN IMMEDIATE transaction, so API replicas and workers agree on it.
+    """
+
+    def __init__(self, path: str | Path | None = None, trunks: List[Dict[str, Any]] | None = None):
+        self.path = Path(path or os.getenv("SIP_TRUNK_POOL_PATH") or DEFAULT_POOL_PATH)
+        trunks = normalize_trunks(trunks) if trunks is not None else parse_trunk_pool()
+        self.trunks = {trunk["trunk_id"]: trunk for trunk in trunks}
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")  # health and leases are rebuilt quickly if lost
+        self.conn.executescript(SCHEMA)
+        if "heartbeat_at" not in {row[1] for row in self.conn.execute("PRAGMA table_info(leases)")}:
+            # Pool file from before lease heartbeats; its leases are reclaimed on the next check
+            self.conn.execute("ALTER TABLE leases ADD COLUMN heartbeat_at REAL NOT NULL DEFAULT 0")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO trunks (trunk_id) VALUES (?)", [(trunk_id,) for trunk_id in self.trunks]
+        )
+        if self.trunks:
+            logger.info("SIP trunk pool: %s", ", ".join(f"{t} ({c['capacity']} calls)" for t, c in self.trunks.items()))
+
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def _trunk_states(self, now: float) -> Dict[str, Dict[str, Any]]:
+        """Per configured trunk: breaker state, health and active leases (inside a transaction)."""
+        self.conn.execute("DELETE FROM leases WHERE heartbeat_at < ?", (now - LEASE_TTL_SECONDS,))
+        leases: Dict[str, List[tuple[str, int]]] = {trunk_id: [] for trunk_id in self.trunks}
+        for trunk_id, caller_id, probe in self.conn.execute("SELECT trunk_id, caller_id, probe FROM leases"):
+            if trunk_id in leases:
+                leases[trunk_id].append((caller_id, probe))
+
+        states = {}
+        for trunk_id, health, failures, open_until, calls, total_failures, last_error in self.conn.execute(
+            "SELECT trunk_id, health, consecutive_failures, open_until, calls, failures, last_error FROM trunks"
+        ):
+            if trunk_id not in self.trunks:
+                continue
+            if open_until is None:
+                state = CLOSED
+            elif now < open_until:
+                state = OPEN
+            else:
+                state = HALF_OPEN
+            states[trunk_id] = {
+                "state": state,
+                "health": health,
+                "consecutive_failures": failures,
+                "open_until": open_until,
+                "calls": calls,
+                "failures": total_failures,
+                "last_error": last_error,
+                "leases": leases[trunk_id],
+            }
+        return states
+
+    def _pick(self, states: Dict[str, Dict[str, Any]], caller_id: str | None) -> tuple[str, str, bool] | None:
+        """Choose (trunk_id, caller_id, probe) for a new call, or None if nothing is available."""
+        best, best_score = None, None
+        for trunk_id, state in states.items():
+            trunk = self.trunks[trunk_id]
+            active = len(state["leases"])
+            if state["state"] == OPEN or active >= trunk["capacity"]:
+                continue
+            probe = state["state"] == HALF_OPEN
+            if probe and any(is_probe for _, is_probe in state["leases"]):
+                continue  # one probe call at a time while half-open
+
+            in_use = {caller["number"]: 0 for caller in trunk["caller_ids"]}
+            for number, _ in state["leases"]:
+                if number in in_use:
+                    in_use[number] += 1
+            free = [
+                caller for caller in trunk["caller_ids"]
+                if in_use[caller["number"]] < caller["capacity"]
+                and (caller_id is None or caller["number"] == caller_id)
+            ]
+            if not free:
+                continue
+            number = min(free, key=lambda caller: in_use[caller["number"]] / caller["capacity"])["number"]
+
+            # Least loaded relative to capacity, discounted by health
+            score = (active + 1) / (trunk["capacity"] * max(state["health"], MIN_HEALTH))
+            if best_score is None or score < best_score:
+                best, best_score = (trunk_id, number, probe), score
+        return best
+
+    def acquire(self, caller_id: str | None = None) -> Dict[str, str] | None:
+        """
+        Lease a trunk and caller ID for one call.
+
+        Args:
+            caller_id: Caller ID requested by the caller of the API; the pool still picks
+                the trunk (preferring one it is configured on) but does not change the number
+
+        Returns:
+            {"lease_id", "trunk_id", "caller_id"}, or None if every trunk is full or out of rotation
+        """
+        now = time.time()
+        with self.lock:
+            self._transaction()
+            try:
+                states = self._trunk_states(now)
+                choice = self._pick(states, caller_id)
+                if choice is None and caller_id is not None:
+                    # Requested number is not in the pool (or is busy everywhere): any trunk will do
+                    choice = self._pick(states, None)
+                if choice is None:
+                    self.conn.execute("ROLLBACK")
+                    return None
+
+                trunk_id, number, probe = choice
+                number = caller_id or number
+                lease_id = uuid.uuid4().hex
+                self.conn.execute(
+                    "INSERT INTO leases (lease_id, trunk_id, caller_id, probe, acquired_at, heartbeat_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (lease_id, trunk_id, number, int(probe), now, now),
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        if probe:
+            logger.info("SIP trunk %s half-open: sending a probe call", trunk_id)
+        return {"lease_id": lease_id, "trunk_id": trunk_id, "caller_id": number}
+
+    def renew(self, lease_id: str, trunk_id: str, caller_id: str):
+        """
+        Heartbeat for a lease held by a running call; restores it if it was already reclaimed.
+
+        Args:
+            lease_id: Lease from acquire()
+            trunk_id: Trunk the call is on, to restore the lease with
+            caller_id: Caller ID the call uses, to restore the lease with
+        """
+        now = time.time()
+        with self.lock:
+            updated = self.conn.execute(
+                "UPDATE leases SET heartbeat_at = ? WHERE lease_id = ?", (now, lease_id)
+            ).rowcount
+            if not updated:
+                # The worker stalled past the TTL, but the call is still up and using the trunk
+                self.conn.execute(
+                    "INSERT INTO leases (lease_id, trunk_id, caller_id, probe, acquired_at, heartbeat_at) "
+                    "VALUES (?, ?, ?, 0, ?, ?)",
+                    (lease_id, trunk_id, caller_id, now, now),
+                )
+        if not updated:
+            logger.warning("SIP trunk lease %s had expired and was restored", lease_id)
+
+    def release(self, lease_id: str):
+        """Return a lease taken by acquire(); releasing twice is harmless."""
+        with self.lock:
+            self.conn.execute("DELETE FROM leases WHERE lease_id = ?", (lease_id,))
+
+    def record_result(self, trunk_id: str, success: bool, error: str | None = None):
+        """
+        Record the outcome of a dial attempt on a trunk.
+
+        Args:
+            trunk_id: Trunk the call was placed on (trunks outside the pool are ignored)
+            success: True if the call connected; callee-side failures and calls nobody
+                answered (see is_trunk_failure) should not be recorded at all
+            error: Description of the failure, kept as the trunk's last error
+        """
+        if trunk_id not in self.trunks:
+            return
+        now = time.time()
+        with self.lock:
+            self._transaction()
+            try:
+                health, failures, open_until, cooldown = self.conn.execute(
+                    "SELECT health, consecutive_failures, open_until, cooldown FROM trunks WHERE trunk_id = ?",
+                    (trunk_id,),
+                ).fetchone()
+                health = (1 - HEALTH_ALPHA) * health + HEALTH_ALPHA * (1.0 if success else 0.0)
+
+                if success:
+                    if open_until is not None:
+                        logger.info("SIP trunk %s recovered, back in rotation", trunk_id)
+                    failures, open_until, cooldown = 0, None, None
+                else:
+                    failures += 1
+                    half_open = open_until is not None and now >= open_until
+                    if half_open or (open_until is None and failures >= FAILURE_THRESHOLD):
+                        cooldown = min(cooldown * 2, MAX_COOLDOWN_SECONDS) if half_open and cooldown else COOLDOWN_SECONDS
+                        open_until = now + cooldown
+                        logger.warning(
+                            "SIP trunk %s out of rotation for %.0fs after %d consecutive failures (last: %s)",
+                            trunk_id, cooldown, failures, error,
+                        )
+
+                self.conn.execute(
+                    """
+                    UPDATE trunks SET health = ?, consecutive_failures = ?, open_until = ?, cooldown = ?,
+                        calls = calls + 1, failures = failures + ?, last_error = COALESCE(?, last_error)
+                    WHERE trunk_id = ?
+                    """,
+                    (health, failures, open_until, cooldown, int(not success), None if success else error, trunk_id),
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def usage(self) -> Dict[str, Dict[str, Any]]:
+        """Per-trunk capacity, active calls, breaker state and health."""
+        now = time.time()
+        with self.lock:
+            self._transaction()
+            try:
+                states = self._trunk_states(now)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        result = {}
+        for trunk_id, state in states.items():
+            trunk = self.trunks[trunk_id]
+            numbers = [number for number, _ in state["leases"]]
+            result[trunk_id] = {
+                "capacity": trunk["capacity"],
+                "active": len(state["leases"]),
+                "state": state["state"],
+                "health": round(state["health"], 3),
+                "consecutive_failures": state["consecutive_failures"],
+                "reopens_in": round(state["open_until"] - now, 1) if state["state"] == OPEN else None,
+                "calls": state["calls"],
+                "failures": state["failures"],
+                "last_error": state["last_error"],
+                "caller_ids": {
+                    caller["number"]: {"capacity": caller["capacity"], "active": numbers.count(caller["number"])}
+                    for caller in trunk["caller_ids"]
+                },
+            }
+        return result
+
+
+_trunk_pool: SIPTrunkPool | None = None
+
+
+def get_trunk_pool() -> SIPTrunkPool:
+    """Return this process's handle on the host-wide SIP trunk pool."""
+    global _trunk_pool
+    if _trunk_pool is None:
+        _trunk_pool = SIPTrunkPool()
+    return _trunk_pool
@@ -0,0 +1,87 @@
+import pytest
+
+from services.call_ledger import CallLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return CallLedger(tmp_path / "ledger.db")
+
+
+def dispatch(ledger, room_name, patient_id="p1", campaign_id="fall"):
+    ledger.record_dispatch(
+        room_name=room_name,
+        phone_number="(555) 000-1111",
+        participant_name="Test Patient",
+        patient_id=patient_id,
+        campaign_id=campaign_id,
+    )
+
+
+def test_row_exists_before_job_id_is_known(ledger):
+    dispatch(ledger, "room-1")
+    # The worker can update the call before the API has the dispatch's job ID
+    assert ledger.update_call("room-1", status="ringing", started_at="2026-01-01T00:00:00")
+
+    assert ledger.set_job_id("room-1", "AJ_1")
+    call = ledger.get_call("AJ_1")
+    assert call["status"] == "ringing"
+    assert call["phone_number"] == "+15550001111"
+
+
+def test_update_without_row_reports_no_match(ledger):
+    assert ledger.update_call("missing-room", status="ended") is False
+    assert ledger.set_job_id("missing-room", "AJ_1") is False
+
+
+def test_update_rejects_unknown_columns(ledger):
+    dispatch(ledger, "room-1")
+    with pytest.raises(ValueError):
+        ledger.update_call("room-1", phone_number="+15550002222")
+
+
+def test_list_calls_pages_with_cursor(ledger):
+    for i in range(5):
+        dispatch(ledger, f"room-{i}")
+        ledger.set_job_id(f"room-{i}", f"AJ_{i}")
+    with ledger.conn:
+        # Two calls share a timestamp so the job_id tiebreak is exercised
+        for i, created_at in enumerate(["2026-01-01T00:00:01", "2026-01-01T00:00:02", "2026-01-01T00:00:02",
+                                        "2026-01-01T00:00:03", "2026-01-01T00:00:04"]):
+            ledger.conn.execute("UPDATE calls SET created_at = ? WHERE job_id = ?", (created_at, f"AJ_{i}"))
+
+    seen, cursor = [], None
+    while True:
+        calls, cursor = ledger.list_calls({"patient_id": "p1"}, limit=2, cursor=cursor)
+        seen += [call["job_id"] for call in calls]
+        if cursor is None:
+            break
+
+    assert seen == ["AJ_4", "AJ_3", "AJ_2", "AJ_1", "AJ_0"]
+
+
+def test_list_calls_filters(ledger):
+    dispatch(ledger, "room-1", patient_id="p1", campaign_id="fall")
+    dispatch(ledger, "room-2", patient_id="p2", campaign_id="spring")
+
+    calls, cursor = ledger.list_calls({"campaign_id": "spring", "phone_number": "555-000-1111"})
+    assert [call["room_name"] for call in calls] == ["room-2"]
+    assert cursor is None
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "|AJ_1", "2026-01-01T00:00:00|"])
+def test_list_calls_rejects_malformed_cursor(ledger, cursor):
+    with pytest.raises(ValueError):
+        ledger.list_calls({}, cursor=cursor)
+
+
+def test_latest_calls_per_patient(ledger):
+    dispatch(ledger, "room-1", patient_id="p1")
+    dispatch(ledger, "room-2", patient_id="p1")
+    with ledger.conn:
+        ledger.conn.execute("UPDATE calls SET created_at = '2099-01-01' WHERE room_name = 'room-2'")
+
+    latest = ledger.latest_calls(["p1", "p2"])
+    assert latest["p1"]["room_name"] == "room-2"
+    assert latest["p1"]["call_count"] == 2
+    assert "p2" not in latest
@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip("livekit.agents")
+
+from livekit.agents import llm  # noqa: E402
+
+from context_window import ContextWindow, item_tokens  # noqa: E402
+
+
+def turn(role: str, text: str) -> llm.ChatMessage:
+    return llm.ChatMessage(role=role, content=[text])
+
+
+def call_context(turns: int) -> llm.ChatContext:
+    """Instructions, then user/assistant pairs (~29 tokens each) with a tool call after the first pair."""
+    items = [turn("system", "You are Jocelyn, a recruiter.")]
+    for i in range(turns):
+        items.append(turn("user", f"user turn {i}: " + "x" * 80))
+        items.append(turn("assistant", f"assistant turn {i}: " + "y" * 80))
+        if i == 0:
+            items.append(llm.FunctionCall(call_id="c1", name="mark_contacted", arguments="{}"))
+            items.append(llm.FunctionCallOutput(call_id="c1", name="mark_contacted", output="ok", is_error=False))
+    return llm.ChatContext(items)
+
+
+def texts(chat_ctx: llm.ChatContext) -> list[str]:
+    return [item.text_content if item.type == "message" else item.type for item in chat_ctx.items]
+
+
+def test_short_history_is_sent_unchanged():
+    chat_ctx = call_context(2)
+    bounded = ContextWindow(token_budget=1000).apply(chat_ctx)
+    assert [item.id for item in bounded.items] == [item.id for item in chat_ctx.items]
+
+
+def test_over_budget_history_is_trimmed_to_the_trim_target():
+    window = ContextWindow(token_budget=300)
+    bounded = window.apply(call_context(10))
+
+    history = [item for item in bounded.items if item.type == "message" and item.role in ("user", "assistant")]
+    assert sum(item_tokens(item) for item in history) <= 300 * 0.6
+    assert history[-1].text_content.startswith("assistant turn 9")
+    assert window.dropped_ids
+
+
+def test_instructions_and_tool_items_are_pinned():
+    bounded = ContextWindow(token_budget=300).apply(call_context(10))
+    sent = texts(bounded)
+
+    assert sent[0] == "You are Jocelyn, a recruiter."
+    assert "function_call" in sent and "function_call_output" in sent
+    assert not any(text.startswith("user turn 0") for text in sent)
+
+
+def test_dropped_caller_turns_are_summarized_after_the_instructions():
+    bounded = ContextWindow(token_budget=300).apply(call_context(10))
+    summary = bounded.items[1]
+
+    assert summary.role == "system"
+    assert summary.text_content.startswith("Earlier in this call")
+    assert '"user turn 0: ' in summary.text_content
+    assert "assistant turn" not in summary.text_content
+
+
+def test_cutoff_only_moves_when_history_exceeds_the_budget():
+    window = ContextWindow(token_budget=300)
+    chat_ctx = call_context(10)
+    first = window.apply(chat_ctx)
+    dropped = set(window.dropped_ids)
+
+    # One more turn fits in the headroom left by trimming, so the prefix is reused
+    chat_ctx.items.append(turn("user", "one more question"))
+    second = window.apply(chat_ctx)
+
+    assert window.dropped_ids == dropped
+    assert [item.id for item in second.items[2:-1]] == [item.id for item in first.items[2:]]
+
+
+def test_summary_respects_its_token_budget():
+    bounded = ContextWindow(token_budget=300, summary_tokens=30).apply(call_context(10))
+    summary = bounded.items[1].text_content
+    assert summary.count('"user turn') == 1
+    assert '"user turn 0: ' not in summary
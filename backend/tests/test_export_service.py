@@ -0,0 +1,125 @@
+import io
+import csv
+import json
+
+import pytest
+
+from services.export_service import ENCODERS, ExportQuery, check_format, stream_export
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def iter_patient_batches(self, columns="*", batch_size=1000, filters=None):
+        rows = [row for row in self.rows if all(row.get(k) == v for k, v in (filters or {}).items())]
+        for i in range(0, len(rows), batch_size):
+            yield [dict(row) for row in rows[i:i + batch_size]]
+
+
+class FakeLedger:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def latest_calls(self, patient_ids):
+        return {pid: self.calls[pid] for pid in patient_ids if pid in self.calls}
+
+
+PATIENTS = [
+    {"patient_id": "p1", "status": "Pending", "qualified_disease": "Type 2 diabetes", "age": 54},
+    {"patient_id": "p2", "status": "Contacted", "qualified_disease": "Chronic kidney disease", "age": 61},
+    {"patient_id": "p3", "status": "Pending", "qualified_disease": "Breast cancer", "age": 47},
+]
+CALLS = {"p2": {"call_count": 2, "status": "ended", "outcome": "completed", "created_at": "2026-01-01",
+                "duration_seconds": 42.5, "campaign_id": "fall"}}
+TABLE_COLUMNS = list(PATIENTS[0])
+
+
+def export(export_format, query, rows=PATIENTS):
+    return b"".join(stream_export(FakeSupabase(rows), FakeLedger(CALLS), query, export_format))
+
+
+def test_csv_joins_latest_call_and_projects_columns():
+    query = ExportQuery(columns="patient_id,last_call_outcome,call_count", batch_size=2)
+    query.resolve_columns(TABLE_COLUMNS)
+
+    rows = list(csv.DictReader(io.StringIO(export("csv", query).decode())))
+    assert rows == [
+        {"patient_id": "p1", "last_call_outcome": "", "call_count": "0"},
+        {"patient_id": "p2", "last_call_outcome": "completed", "call_count": "2"},
+        {"patient_id": "p3", "last_call_outcome": "", "call_count": "0"},
+    ]
+
+
+def test_filters_study_type_and_call_outcome():
+    query = ExportQuery(columns="patient_id", study_type="Oncology")
+    assert [json.loads(line)["patient_id"] for line in export("ndjson", query).splitlines()] == ["p3"]
+
+    query = ExportQuery(columns="patient_id", call_outcome="completed")
+    assert [json.loads(line)["patient_id"] for line in export("ndjson", query).splitlines()] == ["p2"]
+
+
+def test_resolve_columns_rejects_unknown_column():
+    query = ExportQuery(columns="patient_id,favourite_colour")
+    with pytest.raises(ValueError, match="favourite_colour"):
+        query.resolve_columns(TABLE_COLUMNS)
+
+
+def test_invalid_column_name_and_format():
+    with pytest.raises(ValueError):
+        ExportQuery(columns="patient_id;drop")
+    with pytest.raises(ValueError):
+        check_format("xlsx")
+
+
+def test_empty_csv_still_has_header():
+    query = ExportQuery(columns="patient_id,status,last_call_outcome")
+    query.resolve_columns(TABLE_COLUMNS)
+    assert export("csv", query, rows=[]).decode().splitlines() == ["patient_id,status,last_call_outcome"]
+
+
+def test_full_export_columns_come_from_table():
+    query = ExportQuery()
+    query.resolve_columns(TABLE_COLUMNS)
+    header = export("csv", query, rows=[]).decode().splitlines()[0]
+    assert header.split(",")[:4] == TABLE_COLUMNS
+    assert "last_call_outcome" in header
+
+
+def test_arrow_stream_types_and_empty_result():
+    query = ExportQuery(columns="patient_id,age,call_count,last_call_duration_seconds", batch_size=2)
+    query.resolve_columns(TABLE_COLUMNS)
+
+    table = pa.ipc.open_stream(export("arrow", query)).read_all()
+    assert table.column("age").to_pylist() == ["54", "61", "47"]
+    assert table.schema.field("call_count").type == pa.int64()
+    assert table.column("last_call_duration_seconds").to_pylist() == [None, 42.5, None]
+
+    empty = pa.ipc.open_stream(export("arrow", query, rows=[])).read_all()
+    assert empty.num_rows == 0
+    assert empty.schema.names == query.output_columns
+
+
+def test_parquet_row_groups_and_empty_result():
+    query = ExportQuery(columns="patient_id,status", batch_size=2)
+    query.resolve_columns(TABLE_COLUMNS)
+
+    parquet_file = pq.ParquetFile(io.BytesIO(export("parquet", query)))
+    assert parquet_file.num_row_groups == 2
+    assert parquet_file.read().column("status").to_pylist() == ["Pending", "Contacted", "Pending"]
+
+    empty = pq.read_table(io.BytesIO(export("parquet", query, rows=[])))
+    assert empty.num_rows == 0
+    assert empty.schema.names == ["patient_id", "status"]
+
+
+@pytest.mark.parametrize("export_format", ["arrow", "parquet"])
+def test_unknown_columns_still_write_a_valid_file(export_format):
+    data = b"".join(ENCODERS[export_format](iter([]), None))
+    if export_format == "arrow":
+        assert pa.ipc.open_stream(data).read_all().num_rows == 0
+    else:
+        assert pq.read_table(io.BytesIO(data)).num_rows == 0
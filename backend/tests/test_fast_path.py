@@ -0,0 +1,64 @@
+import pytest
+
+from fast_path import DEFAULT_ANSWERS, FastPathStats, build_answer_table, match_intent
+
+
+@pytest.mark.parametrize("transcript, intent", [
+    ("How much does it pay?", "compensation"),
+    ("Will I get paid?", "compensation"),
+    ("How long is the study?", "duration"),
+    ("How many visits?", "duration"),
+    ("What's the time commitment?", "duration"),
+    ("When did I consent to this?", "consent"),
+    ("I never agreed to this", "consent"),
+    ("No thanks, I'm not interested.", "not_interested"),
+])
+def test_short_questions_match_their_intent(transcript, intent):
+    assert match_intent(transcript) == intent
+
+
+@pytest.mark.parametrize("transcript", [
+    "How long will this call take?",
+    "How long is this phone call going to be?",
+    "How much does it pay but what are the side effects?",
+    "I'm not interested in the side effects, how much does it pay and how many visits are there?",
+    "How much does it pay and how many visits?",
+    "Who is this?",
+    "",
+])
+def test_other_turns_fall_back_to_the_llm(transcript):
+    assert match_intent(transcript) is None
+
+
+def test_answer_table_defaults():
+    assert build_answer_table({}) == DEFAULT_ANSWERS
+
+
+def test_answer_table_uses_trial_values_and_overrides():
+    answers = build_answer_table({
+        "compensation_info": "$200 per visit.",
+        "trial_duration": "3 months total. Two visits",
+        "canned_answers": {"consent": "You opted in on our website."},
+    })
+    assert answers["compensation"] == "$200 per visit. Plus free treatment."
+    assert answers["duration"] == "3 months total. Two visits."
+    assert answers["consent"] == "You opted in on our website."
+    assert answers["not_interested"] == DEFAULT_ANSWERS["not_interested"]
+
+
+def test_canned_answers_win_over_trial_values():
+    answers = build_answer_table({"compensation_info": "$200 per visit", "canned_answers": {"compensation": "$1,000 total."}})
+    assert answers["compensation"] == "$1,000 total."
+
+
+def test_stats_count_matches_fallbacks_and_corrections():
+    stats = FastPathStats()
+    assert stats.match("How much does it pay?") == "compensation"
+    assert stats.match("No, that's not what I asked") is None
+    assert stats.match("Who is this?") is None
+
+    summary = stats.summary()
+    assert summary["matches"] == {"compensation": 1}
+    assert summary["fallbacks"] == 2
+    assert summary["corrections"] == 1
+    assert summary["precision"] == 0.0
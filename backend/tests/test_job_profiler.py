@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import job_profiler
+from job_profiler import enforce_retention
+
+
+def write_report(directory, name: str, age: int, size: int = 100, folded: bool = True):
+    """A JSON report (and its folded stacks) last modified age seconds ago."""
+    paths = [directory / f"{name}.json"] + ([directory / f"{name}.folded"] if folded else [])
+    for path in paths:
+        path.write_bytes(b"x" * size)
+        os.utime(path, (1_000_000 - age, 1_000_000 - age))
+
+
+def remaining(directory) -> list[str]:
+    return sorted(path.name for path in directory.iterdir())
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    def set_limits(reports: int = 50, mb: float = 200):
+        monkeypatch.setattr(job_profiler, "PROFILE_MAX_REPORTS", reports)
+        monkeypatch.setattr(job_profiler, "PROFILE_MAX_MB", mb)
+    return set_limits
+
+
+def test_oldest_reports_over_the_count_are_deleted(tmp_path, limits):
+    limits(reports=2)
+    for age, name in enumerate(["new", "mid", "old"]):
+        write_report(tmp_path, name, age)
+
+    enforce_retention(tmp_path)
+    assert remaining(tmp_path) == ["mid.folded", "mid.json", "new.folded", "new.json"]
+
+
+def test_reports_over_the_size_limit_are_deleted_with_their_stacks(tmp_path, limits):
+    # Each report and its folded stacks take 2 KB; 5 KB fits two of them
+    limits(mb=5 / 1024)
+    for age, name in enumerate(["a", "b", "c", "d"]):
+        write_report(tmp_path, name, age, size=1024)
+
+    enforce_retention(tmp_path)
+    assert remaining(tmp_path) == ["a.folded", "a.json", "b.folded", "b.json"]
+
+
+def test_reports_without_folded_stacks_and_within_limits_are_kept(tmp_path, limits):
+    limits(reports=2)
+    write_report(tmp_path, "a", 0, folded=False)
+    write_report(tmp_path, "b", 1)
+
+    enforce_retention(tmp_path)
+    assert remaining(tmp_path) == ["a.json", "b.folded", "b.json"]
@@ -0,0 +1,43 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("livekit.api")
+
+from livekit import api  # noqa: E402
+
+from services.livekit_service import LiveKitService  # noqa: E402
+
+
+class FakeLiveKitAPI:
+    def __init__(self, dispatch_id: str):
+        self.deleted_rooms = []
+
+        async def create_dispatch(request):
+            return api.AgentDispatch(id=dispatch_id, room=request.room)
+
+        async def delete_room(request):
+            self.deleted_rooms.append(request.room)
+
+        self.agent_dispatch = SimpleNamespace(create_dispatch=create_dispatch)
+        self.room = SimpleNamespace(delete_room=delete_room)
+
+
+def service(dispatch_id: str) -> LiveKitService:
+    livekit_service = LiveKitService.__new__(LiveKitService)
+    livekit_service.livekit_api = FakeLiveKitAPI(dispatch_id)
+    return livekit_service
+
+
+def test_dispatch_returns_the_dispatch_id():
+    livekit_service = service("AD_abc123")
+    assert asyncio.run(livekit_service.dispatch_agent("outbound-1", {})) == "AD_abc123"
+    assert livekit_service.livekit_api.deleted_rooms == []
+
+
+def test_dispatch_without_an_id_closes_the_room_and_fails():
+    livekit_service = service("")
+    with pytest.raises(RuntimeError, match="no dispatch ID"):
+        asyncio.run(livekit_service.dispatch_agent("outbound-1", {}))
+    assert livekit_service.livekit_api.deleted_rooms == ["outbound-1"]
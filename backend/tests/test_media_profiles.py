@@ -0,0 +1,27 @@
+import pytest
+
+import media_profiles
+from media_profiles import MEDIA_PROFILES, select_media_profile
+
+
+def test_dispatch_metadata_picks_the_profile():
+    assert select_media_profile({"media_profile": "minimal"}) is MEDIA_PROFILES["minimal"]
+
+
+def test_environment_default_applies_without_metadata(monkeypatch):
+    monkeypatch.setattr(media_profiles, "DEFAULT_MEDIA_PROFILE", "lite")
+    assert select_media_profile({}) is MEDIA_PROFILES["lite"]
+    assert select_media_profile({"media_profile": None}) is MEDIA_PROFILES["lite"]
+
+
+@pytest.mark.parametrize("trial_data", [{"media_profile": "ultra"}, {}])
+def test_unknown_names_fall_back_to_full(monkeypatch, trial_data):
+    monkeypatch.setattr(media_profiles, "DEFAULT_MEDIA_PROFILE", "bogus")
+    assert select_media_profile(trial_data) is MEDIA_PROFILES["full"]
+
+
+def test_profiles_are_consistent():
+    for name, profile in MEDIA_PROFILES.items():
+        assert profile.name == name
+        assert profile.vad_sample_rate in (8000, 16000)
+        assert profile.stt_sample_rate in (8000, 16000)
@@ -0,0 +1,113 @@
+from services.patient_cache import PatientCache, compute_etag, etag_matches
+
+
+def record(patient_id, phone, status="Pending"):
+    return {"patient_id": patient_id, "phone": phone, "status": status}
+
+
+def test_put_and_lookup_by_either_key():
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    etag = cache.put(record("p1", "+15550001111"))
+
+    assert cache.get("p1") == (record("p1", "+15550001111"), etag)
+    assert cache.get_by_phone("+15550001111")[1] == etag
+    assert etag_matches(f'W/{etag}, "other"', etag)
+    assert compute_etag(record("p1", "+15550001111")) == etag
+
+
+def test_apply_change_invalidates_by_id_and_phone():
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    cache.put(record("p1", "+15550001111"))
+    cache.put(record("p2", "+15550002222"))
+
+    cache.apply_change("UPDATE", record("p1", "+15550001111", status="Contacted"))
+    cache.apply_change("DELETE", None, {"phone": "+15550002222"})
+
+    assert cache.get("p1") is None
+    assert cache.get("p2") is None
+    assert cache.phone_index == {}
+
+
+def test_put_refuses_record_read_before_a_change():
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    generation = cache.generation()
+    # The change lands while the miss is reading the old row
+    cache.apply_change("UPDATE", record("p1", "+15550001111", status="Contacted"))
+    cache.put(record("p1", "+15550001111"), generation)
+
+    assert cache.get("p1") is None
+    assert cache.metrics()["stale_loads"] == 1
+
+    cache.put(record("p1", "+15550001111", status="Contacted"), cache.generation())
+    assert cache.get("p1")[0]["status"] == "Contacted"
+
+
+def test_put_refuses_phone_lookup_after_phone_change():
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    generation = cache.generation()
+    cache.invalidate(phone="+15550001111")
+    cache.put(record("p1", "+15550001111"), generation)
+
+    assert cache.get_by_phone("+15550001111") is None
+
+
+def test_unrelated_change_does_not_block_put():
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    generation = cache.generation()
+    cache.apply_change("UPDATE", record("p2", "+15550002222"))
+    cache.put(record("p1", "+15550001111"), generation)
+
+    assert cache.get("p1") is not None
+
+
+def test_forgotten_changes_refuse_older_loads():
+    cache = PatientCache(max_entries=1, ttl_seconds=60)
+    generation = cache.generation()
+    for i in range(cache.changed_keys_limit + 1):
+        cache.invalidate(patient_id=f"other-{i}")
+    cache.put(record("p1", "+15550001111"), generation)
+
+    assert cache.get("p1") is None
+
+
+def test_drop_keeps_phone_owned_by_another_patient():
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    cache.put(record("p1", "+15550001111"))
+    # The number was reassigned to p2; p1's entry goes with it
+    cache.put(record("p2", "+15550001111"))
+    assert cache.get("p1") is None
+
+    assert cache.get_by_phone("+15550001111")[0]["patient_id"] == "p2"
+
+    # An entry whose phone the index already gives to someone else leaves it alone
+    cache.put(record("p3", "+15550003333"))
+    cache.phone_index["+15550003333"] = "p2"
+    cache.invalidate(patient_id="p3")
+    assert cache.phone_index["+15550003333"] == "p2"
+
+
+def test_lru_eviction_and_expiry():
+    cache = PatientCache(max_entries=2, ttl_seconds=60)
+    cache.put(record("p1", "+15550001111"))
+    cache.put(record("p2", "+15550002222"))
+    cache.get("p1")
+    cache.put(record("p3", "+15550003333"))
+
+    assert cache.get("p2") is None
+    assert cache.get("p1") is not None
+    assert cache.metrics()["evictions"] == 1
+
+    expired = PatientCache(max_entries=2, ttl_seconds=0)
+    expired.put(record("p1", "+15550001111"))
+    assert expired.get("p1") is None
+    assert expired.metrics()["expirations"] == 1
+
+
+def test_zero_max_entries_disables_caching(monkeypatch):
+    monkeypatch.setenv("PATIENT_CACHE_MAX_ENTRIES", "1024")
+    cache = PatientCache(max_entries=0)
+    etag = cache.put(record("p1", "+15550001111"))
+
+    assert cache.max_entries == 0
+    assert etag == compute_etag(record("p1", "+15550001111"))
+    assert cache.get("p1") is None
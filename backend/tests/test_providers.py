@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+
+import providers
+from media_profiles import MEDIA_PROFILES
+
+
+@pytest.fixture
+def imports(monkeypatch):
+    """Record plugin imports instead of importing the real LiveKit plugins."""
+    imported = []
+
+    def import_module(name):
+        imported.append(name)
+        return SimpleNamespace(
+            NC=lambda: "NC",
+            BVCTelephony=lambda: "BVCTelephony",
+            VAD=SimpleNamespace(load=lambda **kwargs: kwargs),
+        )
+
+    monkeypatch.setattr(providers, "_plugins", {})
+    monkeypatch.setattr(providers, "_vads", {})
+    monkeypatch.setattr(providers.importlib, "import_module", import_module)
+    return imported
+
+
+@pytest.mark.parametrize("name, noise_cancellation", [("full", True), ("lite", True), ("minimal", False)])
+def test_plugins_for_profile(name, noise_cancellation):
+    names = providers.plugins_for_profile(MEDIA_PROFILES[name])
+    assert names[:4] == ["deepgram", "openai", "cartesia", "silero"]
+    assert ("noise_cancellation" in names) is noise_cancellation
+
+
+def test_minimal_profile_never_imports_noise_cancellation(imports):
+    providers.load_plugins(MEDIA_PROFILES["minimal"])
+    assert providers.build_noise_cancellation(MEDIA_PROFILES["minimal"]) is None
+    assert "livekit.plugins.noise_cancellation" not in imports
+
+
+def test_plugins_are_imported_once(imports):
+    providers.load_plugins(MEDIA_PROFILES["full"])
+    providers.load_plugins(MEDIA_PROFILES["lite"])
+    assert sorted(imports) == sorted(providers.PLUGIN_MODULES.values())
+
+
+def test_noise_cancellation_follows_the_profile(imports):
+    assert providers.build_noise_cancellation(MEDIA_PROFILES["full"]) == "BVCTelephony"
+    assert providers.build_noise_cancellation(MEDIA_PROFILES["lite"]) == "NC"
+
+
+def test_vad_is_loaded_once_per_profile(imports):
+    full = providers.build_vad(MEDIA_PROFILES["full"])
+    assert providers.build_vad(MEDIA_PROFILES["full"]) is full
+    assert full["sample_rate"] == 16000
+    assert providers.build_vad(MEDIA_PROFILES["minimal"])["sample_rate"] == 8000
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from services.rate_limiter import ProviderRateLimiter, parse_quota
+
+
+@pytest.fixture
+def limiter(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEEPGRAM_QUOTA", "rps=1,burst=2,concurrency=2")
+    monkeypatch.setenv("CARTESIA_QUOTA", "rps=1,burst=2,concurrency=1")
+    return ProviderRateLimiter(tmp_path / "quotas.db")
+
+
+def test_parse_quota_override(monkeypatch):
+    monkeypatch.setenv("OPENAI_QUOTA", "rps=3, burst=6")
+    assert parse_quota("openai") == {"rps": 3.0, "burst": 6.0, "concurrency": 50}
+
+
+def test_bucket_throttles_past_burst_and_refills(limiter, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.rate_limiter.time.time", lambda: now[0])
+
+    assert limiter.try_acquire_request("deepgram")
+    assert limiter.try_acquire_request("deepgram")
+    assert not limiter.try_acquire_request("deepgram")
+
+    now[0] += 1.0
+    assert limiter.try_acquire_request("deepgram")
+
+    usage = limiter.usage()["deepgram"]
+    assert usage["granted"] == 3
+    assert usage["throttled"] == 1
+
+
+def test_drawn_bucket_blocks_call_capacity(limiter):
+    assert limiter.has_call_capacity()
+    while limiter.try_acquire_request("cartesia"):
+        pass
+    assert not limiter.has_call_capacity()
+    assert limiter.has_call_capacity(providers=("deepgram", "openai"))
+
+
+def test_call_slots_are_all_or_nothing(limiter):
+    leases = limiter.acquire_call_slots()
+    assert len(leases) == 3
+    # Cartesia allows one concurrent call, so nothing is taken from the others either
+    assert limiter.acquire_call_slots() is None
+    assert limiter.usage()["deepgram"]["active"] == 1
+
+    limiter.release(leases)
+    assert limiter.usage()["cartesia"]["active"] == 0
+
+
+def test_dead_process_leases_are_reclaimed(limiter):
+    with limiter.lock:
+        limiter.conn.execute(
+            "INSERT INTO leases (provider, pid, acquired_at) VALUES ('cartesia', 2147483646, 0)"
+        )
+    assert limiter.usage()["cartesia"]["active"] == 0
+    assert limiter.acquire_call_slots() is not None
+
+
+def test_wait_for_request_times_out(limiter):
+    async def main():
+        results = [await limiter.wait_for_request("cartesia", timeout=0.1) for _ in range(3)]
+        return results
+
+    assert asyncio.run(main()) == [True, True, False]
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from services import search_service
+from services.search_service import PatientSearchIndex, normalize_field
+
+PATIENTS = [
+    {"patient_id": "p1", "name": "John Smith", "email": "john.smith@example.com", "phone": "(555) 010-2000"},
+    {"patient_id": "p2", "name": "Mary Johnson", "email": "mj@example.org", "phone": "555-010-3000"},
+    {"patient_id": "p3", "name": "Ajohn Lee", "email": "lee@example.net", "phone": "+1 555 010 4000"},
+    {"patient_id": "p4", "name": "John", "email": None, "phone": None},
+]
+
+
+class FakeSupabase:
+    def __init__(self, rows, on_scan=None):
+        self.rows = rows
+        self.on_scan = on_scan
+
+    def iter_patients(self, columns="*"):
+        if self.on_scan:
+            self.on_scan()
+        yield from self.rows
+
+
+@pytest.fixture
+def index():
+    index = PatientSearchIndex()
+    index.build(PATIENTS)
+    return index
+
+
+def ids(index, query, limit=20):
+    results, _ = index.search(query, limit)
+    return [result["patient_id"] for result in results]
+
+
+def test_ranks_by_match_type(index):
+    results, truncated = index.search("john")
+    assert [(r["patient_id"], r["match"]) for r in results] == [
+        ("p4", "exact"), ("p1", "prefix"), ("p2", "word_prefix"), ("p3", "substring"),
+    ]
+    assert not truncated
+
+
+def test_two_character_queries_match_word_starts(index):
+    assert ids(index, "jo") == ["p4", "p1", "p2"]
+
+
+def test_phone_in_any_format(index):
+    assert ids(index, "5550102000") == ["p1"]
+    assert ids(index, "+1 (555) 010-3000") == ["p2"]
+    assert ids(index, "010-40") == ["p3"]
+
+
+def test_truncation_keeps_best_match_types(monkeypatch):
+    # Weaker matches come first in index order, so a cut in index order would keep only them
+    index = PatientSearchIndex()
+    index.build(reversed(PATIENTS[:3]))
+    monkeypatch.setattr(search_service, "SCAN_LIMIT", 1)
+
+    results, truncated = index.search("john", limit=1)
+    assert [(r["patient_id"], r["match"]) for r in results] == [("p1", "prefix")]
+    assert truncated
+
+
+def test_updates_reindex_changed_fields(index):
+    index.apply_change("UPDATE", {"patient_id": "p2", "name": "Mary Jones"})
+    assert "p2" not in ids(index, "johnson")
+    assert ids(index, "jones") == ["p2"]
+    # The email was not in the payload, so it keeps its indexed value
+    assert ids(index, "mj@example") == ["p2"]
+
+    index.apply_change("DELETE", None, {"patient_id": "p4"})
+    assert "p4" not in ids(index, "john")
+
+
+def test_compaction_drops_stale_documents(index):
+    for i in range(4):
+        index.apply_change("UPDATE", {"patient_id": "p1", "name": f"John Smith {i}"})
+    assert index.stale == 0
+    assert len(index.documents) == len(index.doc_ids) == 4
+    assert ids(index, "smith 3") == ["p1"]
+
+
+def test_rebuild_swaps_in_and_replays_changes_made_during_scan(index):
+    async def main():
+        loop = asyncio.get_running_loop()
+
+        def change_during_scan():
+            # The scan runs in a worker thread; the change arrives on the event loop meanwhile
+            asyncio.run_coroutine_threadsafe(publish(), loop).result()
+
+        async def publish():
+            index.apply_change("INSERT", {"patient_id": "p5", "name": "Jon Snow"})
+            # The current index keeps serving searches until the new one is swapped in
+            assert ids(index, "mary") == ["p2"]
+            assert ids(index, "snow") == ["p5"]
+
+        await index.rebuild(FakeSupabase(PATIENTS[:1], on_scan=change_during_scan))
+
+    asyncio.run(main())
+    assert index.ready
+    assert sorted(index.doc_ids) == ["p1", "p5"]
+    assert ids(index, "snow") == ["p5"]
+
+
+def test_compaction_runs_in_background_on_event_loop(index):
+    async def main():
+        for i in range(4):
+            index.apply_change("UPDATE", {"patient_id": "p1", "name": f"John Smith {i}"})
+        assert index.stale > 0
+        assert ids(index, "smith 3") == ["p1"]
+        await index._compaction
+
+    asyncio.run(main())
+    assert index.stale == 0
+    assert ids(index, "smith 3") == ["p1"]
+    assert ids(index, "smith 0") == []
+
+
+def test_normalize_field():
+    assert normalize_field("name", "  Mary   JOHNSON ") == "mary johnson"
+    assert normalize_field("phone", "(555) 010-2000") == "15550102000"
+    assert normalize_field("email", None) == ""
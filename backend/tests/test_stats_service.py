@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from services.stats_service import PatientStatsService, diff_counters, match_study_types
+
+
+class FakeSupabase:
+    def __init__(self, rows, fail=False, on_scan=None):
+        self.rows = rows
+        self.fail = fail
+        self.on_scan = on_scan
+
+    def iter_patients(self, columns=None):
+        if self.on_scan:
+            self.on_scan()
+        if self.fail:
+            raise RuntimeError("scan failed")
+        return iter(self.rows)
+
+
+def row(patient_id, disease="Type 2 diabetes", status="Pending", label="Eligible"):
+    return {"patient_id": patient_id, "qualified_disease": disease, "status": status, "eligibility_label": label}
+
+
+def test_match_study_types_uses_keyword_aliases():
+    assert match_study_types("Chronic kidney disease and cancer") == ("CKD", "Oncology")
+    assert match_study_types(None) == ()
+
+
+def test_apply_change_moves_counts_between_keys():
+    stats = PatientStatsService()
+    stats.apply_change("INSERT", row("p1"))
+    stats.apply_change("UPDATE", {"patient_id": "p1", "status": "Contacted"})
+
+    snapshot = stats.snapshot()
+    assert snapshot["total"] == 1
+    assert snapshot["statuses"] == {"Contacted": 1}
+    assert snapshot["study_types"]["Diabetes"] == 1
+
+    stats.apply_change("DELETE", None, {"patient_id": "p1"})
+    assert stats.snapshot()["total"] == 0
+
+
+def test_rebuild_reports_drift_and_replays_changes_made_during_the_scan():
+    stats = PatientStatsService()
+    asyncio.run(stats.rebuild(FakeSupabase([row("p1"), row("p2")])))
+    stats.apply_change("DELETE", None, {"patient_id": "p2"})  # pretend this was a missed delete...
+    stats.apply_change("INSERT", row("p2"))  # ...and re-added, so live matches again
+
+    supabase = FakeSupabase([row("p1")], on_scan=lambda: stats.apply_change("INSERT", row("p3", status="Contacted")))
+    drift = asyncio.run(stats.rebuild(supabase))
+
+    assert drift == {"total": 1, "statuses": {"Pending": 1}, "study_types": {"Diabetes": 1}, "eligibility_labels": {"Eligible": 1}}
+    assert stats.snapshot()["total"] == 2  # p1 from the scan plus p3 from the feed
+    assert stats.snapshot()["statuses"] == {"Pending": 1, "Contacted": 1}
+
+
+def test_failed_rebuild_keeps_changes_queued_during_the_scan():
+    stats = PatientStatsService()
+    asyncio.run(stats.rebuild(FakeSupabase([row("p1")])))
+
+    supabase = FakeSupabase([], fail=True, on_scan=lambda: stats.apply_change("INSERT", row("p2")))
+    with pytest.raises(RuntimeError):
+        asyncio.run(stats.rebuild(supabase))
+
+    assert stats.snapshot()["total"] == 2
+    stats.apply_change("INSERT", row("p3"))  # the feed is applied directly again
+    assert stats.snapshot()["total"] == 3
+
+
+def test_concurrent_rebuilds_do_not_lose_each_others_changes():
+    stats = PatientStatsService()
+
+    async def run():
+        first = FakeSupabase([row("p1")], on_scan=lambda: stats.apply_change("INSERT", row("p2")))
+        second = FakeSupabase([row("p1"), row("p2")], on_scan=lambda: stats.apply_change("INSERT", row("p3")))
+        await asyncio.gather(stats.rebuild(first), stats.rebuild(second))
+
+    asyncio.run(run())
+    assert stats.snapshot()["total"] == 3
+
+
+def test_diff_counters_only_reports_nonzero_differences():
+    live = {"total": 2, "study_types": {"CKD": 1}, "statuses": {"Pending": 2}, "eligibility_labels": {}}
+    scanned = {"total": 2, "study_types": {"CKD": 1}, "statuses": {"Pending": 1, "Contacted": 1}, "eligibility_labels": {}}
+    assert diff_counters(live, scanned) == {"statuses": {"Pending": 1, "Contacted": -1}}
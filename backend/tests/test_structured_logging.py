@@ -0,0 +1,66 @@
+import logging
+
+import pytest
+
+from services.structured_logging import RedactingQueueListener, redact_text, redact_value
+
+
+@pytest.mark.parametrize("text", [
+    "+15550102000",
+    "(555) 010-2000",
+    "555.010.2000",
+    "555 010 2000",
+    "1-555-010-2000",
+    "+1 555 010 2000",
+    "+44 20 7946 0958",
+])
+def test_phone_shapes_are_masked(text):
+    assert redact_text(f"calling {text} now") == f"calling ***{text[-2:]} now"
+
+
+@pytest.mark.parametrize("text", [
+    "2026-10-19 18:59:08,123",
+    "2026-10-19T18:59:08.123456+00:00",
+    "epoch 1760000000",
+    "epoch 1760000000.123",
+    "epoch_ms 1760000000123",
+    "20261019185908",
+    "job AJ_5550102000",
+    "room outbound-1760000000-ab12",
+    "took 12.3456789012s",
+    "192.168.100.200",
+])
+def test_timestamps_epochs_and_ids_are_left_alone(text):
+    assert redact_text(text) == text
+
+
+def test_emails_are_masked():
+    assert redact_text("sent to jane.doe+trial@example.com") == "sent to [email]"
+
+
+def test_redact_value_recurses_into_containers():
+    value = {
+        "phone": ["+15550102000", "(555) 010-3000"],
+        "participants": ({"name": "Jane Doe", "sip_call_to": "+15550102000"},),
+        "notes": ["call back on 555-010-4000", 3],
+    }
+    assert redact_value("metadata", value) == {
+        "phone": ["***00", "***00"],
+        "participants": ({"name": "[redacted]", "sip_call_to": "***00"},),
+        "notes": ["call back on ***00", 3],
+    }
+
+
+def test_listener_renders_and_redacts_message_args_and_extras():
+    record = logging.makeLogRecord({
+        "msg": "Dialing %s for %s",
+        "args": ("+15550102000", "room-1"),
+        "transcript": "my number is 555 010 2000",
+        "sip_metadata": {"sip_call_to": "+15550102000", "sip_status_code": "486"},
+    })
+    listener = RedactingQueueListener(None)
+    record = listener.prepare(record)
+
+    assert record.getMessage() == "Dialing ***00 for room-1"
+    assert record.transcript == "[redacted]"
+    assert record.sip_metadata == {"sip_call_to": "***00", "sip_status_code": "486"}
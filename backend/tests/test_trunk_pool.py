@@ -0,0 +1,114 @@
+import sqlite3
+
+import pytest
+
+from services import trunk_pool
+from services.trunk_pool import CLOSED, HALF_OPEN, OPEN, SIPTrunkPool, is_trunk_failure
+
+TRUNKS = [
+    {"trunk_id": "ST_a", "capacity": 2, "caller_ids": ["+15550001001", {"number": "+15550001002", "capacity": 1}]},
+    {"trunk_id": "ST_b", "capacity": 1, "caller_ids": ["+15550002001"]},
+]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.trunk_pool.time.time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def pool(tmp_path, clock):
+    return SIPTrunkPool(tmp_path / "trunks.db", trunks=TRUNKS)
+
+
+@pytest.mark.parametrize("code, twirp_code, expected", [
+    ("503", "unavailable", True), ("500", "internal", True), ("403", "permission_denied", True),
+    ("488", None, True), ("408", "deadline_exceeded", True),
+    ("486", "unavailable", False), ("603", None, False), ("480", "unavailable", False), ("487", None, False),
+    # No SIP response at all: the Twirp code decides
+    (None, "deadline_exceeded", True), ("", "unavailable", True),
+    (None, "invalid_argument", False), (None, None, False),
+])
+def test_only_trunk_side_errors_are_failures(code, twirp_code, expected):
+    assert is_trunk_failure(code, twirp_code) is expected
+
+
+def test_acquire_spreads_load_and_respects_capacity(pool):
+    leases = [pool.acquire() for _ in range(3)]
+    assert sorted(lease["trunk_id"] for lease in leases) == ["ST_a", "ST_a", "ST_b"]
+    # ST_a's two calls use different caller IDs (the second number allows one call)
+    assert {lease["caller_id"] for lease in leases if lease["trunk_id"] == "ST_a"} == {"+15550001001", "+15550001002"}
+    assert pool.acquire() is None
+
+    pool.release(leases[0]["lease_id"])
+    pool.release(leases[0]["lease_id"])
+    assert pool.acquire() is not None
+
+
+def test_breaker_opens_probes_and_recovers(pool, clock, monkeypatch):
+    monkeypatch.setattr(trunk_pool, "FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(trunk_pool, "COOLDOWN_SECONDS", 10)
+
+    pool.record_result("ST_b", False, "TwirpError: Service Unavailable")
+    assert pool.usage()["ST_b"]["state"] == CLOSED
+    pool.record_result("ST_b", False, "TwirpError: Service Unavailable")
+    assert pool.usage()["ST_b"]["state"] == OPEN
+    assert all(pool.acquire()["trunk_id"] == "ST_a" for _ in range(2))
+    assert pool.acquire() is None
+
+    clock[0] += 10
+    assert pool.usage()["ST_b"]["state"] == HALF_OPEN
+    probe = pool.acquire()
+    assert probe["trunk_id"] == "ST_b"
+
+    # A failed probe reopens the trunk for twice as long
+    pool.record_result("ST_b", False, "TwirpError: Service Unavailable")
+    assert pool.usage()["ST_b"]["reopens_in"] == 20
+    pool.release(probe["lease_id"])
+
+    clock[0] += 20
+    pool.record_result("ST_b", True)
+    usage = pool.usage()["ST_b"]
+    assert usage["state"] == CLOSED
+    assert usage["consecutive_failures"] == 0
+
+
+def test_unrenewed_leases_expire_and_heartbeats_keep_them(pool, clock):
+    held = pool.acquire()
+    pool.acquire()  # its job never runs, so nothing renews it
+    assert pool.usage()["ST_a"]["active"] == 2
+
+    # The held call outlives the TTL several times over
+    for _ in range(6):
+        clock[0] += trunk_pool.LEASE_HEARTBEAT_SECONDS
+        pool.renew(held["lease_id"], held["trunk_id"], held["caller_id"])
+
+    assert pool.usage()["ST_a"]["active"] == 1
+
+
+def test_renew_restores_a_reclaimed_lease(pool, clock):
+    lease = pool.acquire(caller_id="+15550002001")
+    assert lease["trunk_id"] == "ST_b"
+    clock[0] += trunk_pool.LEASE_TTL_SECONDS + 1
+    assert pool.usage()["ST_b"]["active"] == 0
+
+    pool.renew(lease["lease_id"], lease["trunk_id"], lease["caller_id"])
+    assert pool.usage()["ST_b"]["caller_ids"]["+15550002001"]["active"] == 1
+
+
+def test_pool_file_without_heartbeat_column_is_migrated(tmp_path, clock):
+    path = tmp_path / "trunks.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE leases (lease_id TEXT PRIMARY KEY, trunk_id TEXT NOT NULL, caller_id TEXT NOT NULL, "
+        "probe INTEGER NOT NULL DEFAULT 0, acquired_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO leases VALUES ('old', 'ST_b', '+15550002001', 0, 999)")
+    conn.commit()
+    conn.close()
+
+    pool = SIPTrunkPool(path, trunks=TRUNKS)
+    assert pool.usage()["ST_b"]["active"] == 0
+    assert pool.acquire(caller_id="+15550002001")["trunk_id"] == "ST_b"
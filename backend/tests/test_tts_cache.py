@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+pytest.importorskip("livekit.rtc")
+
+import tts_cache  # noqa: E402
+from tts_cache import CachedAudio, TTSCache  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_DIR", tmp_path)
+    return TTSCache("sonic-2", "voice-a")
+
+
+def audio(num_bytes: int) -> CachedAudio:
+    return CachedAudio(b"\x01\x00" * (num_bytes // 2), 24000, 1)
+
+
+def test_key_ignores_whitespace_but_not_model_voice_or_wording(cache):
+    assert cache.key("Thank you!  Have a\ngreat day!") == cache.key("Thank you! Have a great day!")
+    assert cache.key("Thank you!") != cache.key("thank you")
+    assert TTSCache("sonic-2", "voice-b").key("Thank you!") != cache.key("Thank you!")
+    assert TTSCache("sonic-3", "voice-a").key("Thank you!") != cache.key("Thank you!")
+
+
+def test_memory_evicts_least_recently_used(cache):
+    cache.max_memory_bytes = 250
+    cache._remember("a", audio(100))
+    cache._remember("b", audio(100))
+    cache.memory.move_to_end("a")  # a lookup hit
+    cache._remember("c", audio(100))
+
+    assert list(cache.memory) == ["a", "c"]
+    assert cache.memory_bytes == 200
+
+
+def test_memory_keeps_an_entry_larger_than_the_limit(cache):
+    cache.max_memory_bytes = 50
+    cache._remember("a", audio(100))
+    assert list(cache.memory) == ["a"]
+
+
+def test_disk_is_trimmed_oldest_first(cache, tmp_path):
+    cache._write_disk("a", audio(1000))
+    size = (tmp_path / "a.wav").stat().st_size
+    cache._write_disk("b", audio(1000))
+    os.utime(tmp_path / "a.wav", (1, 1))
+    os.utime(tmp_path / "b.wav", (2, 2))
+
+    cache.max_disk_bytes = 2 * size
+    cache._write_disk("c", audio(1000))
+
+    assert sorted(path.name for path in tmp_path.glob("*.wav")) == ["b.wav", "c.wav"]
+    assert cache.disk_bytes == 2 * size
+
+
+def test_disk_round_trip(cache):
+    cache._write_disk("a", audio(1000))
+    restored = cache._read_disk("a")
+    assert (restored.pcm, restored.sample_rate, restored.num_channels) == (audio(1000).pcm, 24000, 1)
+    assert cache._read_disk("missing") is None
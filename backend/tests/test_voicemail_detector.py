@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from voicemail_detector import FRAME_MS, HUMAN, MACHINE, UNKNOWN, VoicemailDetector
+
+RATE = 8000
+FRAME = RATE * FRAME_MS // 1000
+
+
+def line_noise(ms: int, rng) -> np.ndarray:
+    return rng.normal(0, 30, RATE * ms // 1000)
+
+
+def speech(ms: int, rng) -> np.ndarray:
+    """Voice-like audio: a gliding pitch with harmonics, in 250ms syllables with short dips between them."""
+    t = np.arange(RATE * ms // 1000) / RATE
+    pitch = 140 + 40 * np.sin(2 * np.pi * 3 * t)
+    phase = 2 * np.cumsum(np.pi * pitch / RATE)
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.where((t % 0.25) < 0.19, 1.0, 0.0)
+    return envelope * (4000 * voiced + rng.normal(0, 800, len(t))) + rng.normal(0, 30, len(t))
+
+
+def beep(ms: int, hz: float = 1000.0) -> np.ndarray:
+    t = np.arange(RATE * ms // 1000) / RATE
+    return 8000 * np.sin(2 * np.pi * hz * t)
+
+
+def run(detector: VoicemailDetector, *segments: np.ndarray) -> str | None:
+    audio = np.clip(np.concatenate(segments), -32768, 32767).astype(np.int16)
+    verdict = None
+    for start in range(0, len(audio) - FRAME + 1, FRAME):
+        verdict = detector.push(audio[start:start + FRAME].tobytes())
+        if verdict is not None:
+            break
+    return verdict
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
+
+
+def test_beep_is_a_machine(rng):
+    detector = VoicemailDetector(RATE)
+    assert run(detector, line_noise(300, rng), beep(400)) == MACHINE
+    assert detector.reason == "beep at 1000Hz"
+
+
+def test_short_greeting_then_pause_is_a_person(rng):
+    detector = VoicemailDetector(RATE)
+    assert run(detector, line_noise(300, rng), speech(600, rng), line_noise(600, rng)) == HUMAN
+
+
+def test_silence_after_answer_is_a_person(rng):
+    assert run(VoicemailDetector(RATE), line_noise(2500, rng)) == HUMAN
+
+
+def test_greeting_cadence_is_a_machine(rng):
+    detector = VoicemailDetector(RATE)
+    assert run(detector, line_noise(300, rng), speech(2000, rng)) == MACHINE
+    assert "5 words" in detector.reason
+    assert detector.decided_at_ms < 1600
+
+
+def test_quick_words_then_pause_are_a_person(rng):
+    # Four short words ("Hello? Hello? Who's this?") stay under the greeting cadence
+    detector = VoicemailDetector(RATE)
+    assert run(detector, line_noise(300, rng), speech(1000, rng), line_noise(600, rng)) == HUMAN
+
+
+def test_long_speech_is_undecided_without_speech_cue(rng):
+    detector = VoicemailDetector(RATE, speech_cue=False)
+    assert run(detector, line_noise(300, rng), speech(2500, rng)) == UNKNOWN
+
+
+def test_verdict_is_sticky(rng):
+    detector = VoicemailDetector(RATE)
+    run(detector, line_noise(300, rng), beep(400))
+    assert detector.push(np.zeros(FRAME, dtype=np.int16).tobytes()) == MACHINE
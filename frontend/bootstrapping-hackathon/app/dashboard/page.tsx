@@ -17,6 +17,9 @@ export default function Dashboard() {
   const [searchQuery, setSearchQuery] = useState('');
   const [currentPage, setCurrentPage] = useState(1);
   const [sortBy, setSortBy] = useState<string>('last_contacted_desc');
+  const [serverStats, setServerStats] = useState<Record<string, number> | null>(null); // Study type counts from /api/stats
+  const [searchMatches, setSearchMatches] = useState<Set<string> | null>(null); // patient_ids from /api/search
+  const [searchTruncated, setSearchTruncated] = useState(false); // More patients matched than /api/search returned
   const [callNotification, setCallNotification] = useState<{ type: 'success' | 'error'; message: string } | null>(null);
   const ITEMS_PER_PAGE = 10;
 
@@ -33,9 +36,11 @@ export default function Dashboard() {
   // Load all patients once on mount
   useEffect(() => {
     loadPatients();
+    loadStats();
 
     const subscription = api.subscribeToPatients((payload) => {
       console.log('Realtime event:', payload.eventType, payload.new);
+      loadStats();
 
       if (payload.eventType === 'INSERT' && payload.new) {
         setAllPatients(prev => [...prev, payload.new]);
@@ -58,6 +63,39 @@ export default function Dashboard() {
     setCurrentPage(1);
   }, [selectedStudyTypes, searchQuery, sortBy]);
 
+  // Debounced server-side search; fall back to filtering locally if the backend is unreachable.
+  // The previous matches stay on screen while the next query is pending.
+  useEffect(() => {
+    const query = searchQuery.trim();
+    if (query.length < 2) {
+      setSearchMatches(null);
+      setSearchTruncated(false);
+      return;
+    }
+
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const result = await api.searchPatients(query);
+        if (!cancelled) {
+          setSearchMatches(new Set(result.results.map(r => r.patient_id)));
+          setSearchTruncated(result.truncated);
+        }
+      } catch (error) {
+        console.error('Failed to search patients:', error);
+        if (!cancelled) {
+          setSearchMatches(null);
+          setSearchTruncated(false);
+        }
+      }
+    }, 250);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery]);
+
   const loadPatients = async () => {
     try {
       setLoading(true);
@@ -73,6 +111,17 @@ export default function Dashboard() {
     }
   };
 
+  // Stat card counts are maintained by the backend; fall back to counting locally if it is unreachable
+  const loadStats = async () => {
+    try {
+      const stats = await api.getStats();
+      setServerStats(stats.study_types);
+    } catch (error) {
+      console.error('Failed to load stats:', error);
+      setServerStats(null);
+    }
+  };
+
   // Helper: Check if patient matches study type
   const matchesStudyType = (qualifiedDisease: string, studyType: string): boolean => {
     const lowerDisease = (qualifiedDisease || '').toLowerCase();
@@ -103,7 +152,9 @@ export default function Dashboard() {
     let filtered = allPatients.filter(p => p != null);
 
     // 1. Filter by search query (name, phone, email)
-    if (searchQuery.trim()) {
+    if (searchQuery.trim() && searchMatches) {
+      filtered = filtered.filter(patient => searchMatches.has(patient.patient_id));
+    } else if (searchQuery.trim()) {
       const search = searchQuery.trim().toLowerCase();
       const normalizedSearch = search.replace(/[\s\-]/g, '');
 
@@ -216,7 +267,7 @@ export default function Dashboard() {
     });
   };
 
-  const studyTypeCounts = availableStudyTypes.reduce((acc, type) => {
+  const studyTypeCounts = serverStats ?? availableStudyTypes.reduce((acc, type) => {
     acc[type.value] = allPatients.filter(p => {
       const disease = (p.qualified_disease || '').toLowerCase();
       return matchesStudyType(disease, type.value);
@@ -296,6 +347,11 @@ export default function Dashboard() {
                 onChange={(e) => setSearchQuery(e.target.value)}
                 className="w-full pl-12 pr-4 py-3 rounded-xl border border-gray-200 focus:outline-none focus:ring-2 focus:ring-blue-500"
               />
+              {searchTruncated && searchMatches && (
+                <p className="mt-2 text-sm text-[var(--muted)]">
+                  Showing the best {searchMatches.size} matches - refine your search to see the rest.
+                </p>
+              )}
             </div>
             <select
               value={sortBy}
@@ -43,14 +43,17 @@ export const api = {
   },
 
   async getPatient(id: string) {
-    const { data, error } = await supabase
-      .from(TABLE_NAME)
-      .select('*')
-      .eq('patient_id', id)
-      .single();
+    const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
-    if (error) throw error;
-    return data;
+    // Served from the backend patient cache; the browser revalidates with If-None-Match via the ETag
+    const response = await fetch(`${API_BASE_URL}/api/patients/${encodeURIComponent(id)}`);
+
+    if (!response.ok) {
+      const error = await response.text();
+      throw new Error(`Failed to load patient: ${error}`);
+    }
+
+    return response.json();
   },
 
   async updatePatient(id: string, updates: Record<string, any>) {
@@ -83,7 +86,8 @@ export const api = {
         trial_name: patient.qualified_disease || 'Clinical Trial',
         trial_description: 'A clinical trial testing a new diabetes treatment with monthly visits over 6 months.',
         compensation_info: '$500 per visit',
-        contact_info: 'For questions, contact research@clinicaltrials.com'
+        contact_info: 'For questions, contact research@clinicaltrials.com',
+        patient_id: patient.patient_id,
       }),
     });
 
@@ -95,6 +99,44 @@ export const api = {
     return response.json();
   },
 
+  async getStats(): Promise<{
+    total: number;
+    study_types: Record<string, number>;
+    statuses: Record<string, number>;
+    eligibility_labels: Record<string, number>;
+  }> {
+    const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+
+    const response = await fetch(`${API_BASE_URL}/api/stats`);
+
+    if (!response.ok) {
+      const error = await response.text();
+      throw new Error(`Failed to load stats: ${error}`);
+    }
+
+    return response.json();
+  },
+
+  async searchPatients(q: string, limit = 1000): Promise<{
+    query: string;
+    results: { patient_id: string; field: string; match: string; score: number }[];
+    truncated: boolean;
+    took_ms: number;
+  }> {
+    const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+
+    // Served from the backend trigram index instead of scanning CrobotMaster
+    const params = new URLSearchParams({ q, limit: String(limit) });
+    const response = await fetch(`${API_BASE_URL}/api/search?${params}`);
+
+    if (!response.ok) {
+      const error = await response.text();
+      throw new Error(`Failed to search patients: ${error}`);
+    }
+
+    return response.json();
+  },
+
   subscribeToPatients(callback: (payload: any) => void) {
     return supabase
       .channel('patients-changes')